@@ -0,0 +1,205 @@
+import os
+import time
+
+import cv2
+import numpy as np
+
+# Names accepted for CaptureConfig.backend
+CAPTURE_BACKENDS = {
+    "any": cv2.CAP_ANY,
+    "dshow": cv2.CAP_DSHOW,
+    "msmf": cv2.CAP_MSMF,
+    "v4l2": cv2.CAP_V4L2,
+    "avfoundation": cv2.CAP_AVFOUNDATION,
+    "ffmpeg": cv2.CAP_FFMPEG,
+}
+
+
+class CaptureConfig:
+    """Settings for opening a frame source.
+
+    Args:
+        source: Camera index, video file path, or "synthetic[:WIDTHxHEIGHT]"
+        width: Requested capture width (None keeps the driver default)
+        height: Requested capture height (None keeps the driver default)
+        fps: Requested capture frame rate (None keeps the driver default)
+        fourcc: Pixel format code such as "MJPG" or "YUYV" (None keeps the default)
+        backend: Key of CAPTURE_BACKENDS (None lets OpenCV choose)
+        buffer_size: Driver-side frame queue length; 1 keeps frames fresh, 0 keeps the driver default
+        max_drain: Maximum stale frames discarded per read when the loop falls behind (0 = never drain)
+    """
+
+    def __init__(self, source=0, width=None, height=None, fps=None, fourcc=None,
+                 backend=None, buffer_size=1, max_drain=4):
+        self.source = source
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.fourcc = fourcc
+        self.backend = backend
+        self.buffer_size = buffer_size
+        self.max_drain = max_drain
+
+    @classmethod
+    def from_env(cls, prefix="ASL_CAPTURE_", **defaults):
+        """Build a config from environment variables (e.g. ASL_CAPTURE_FOURCC=MJPG)."""
+        def get(name, cast=str):
+            value = os.getenv(prefix + name)
+            if value in (None, ""):
+                return defaults.get(name.lower())
+            return cast(value)
+
+        def get_int(name, default):
+            # 0 is meaningful (driver default buffer, no draining), so only unset falls back
+            value = get(name, int)
+            return default if value is None else value
+
+        source = get("SOURCE")
+        if isinstance(source, str) and source.isdigit():
+            source = int(source)
+        return cls(
+            source=0 if source is None else source,
+            width=get("WIDTH", int),
+            height=get("HEIGHT", int),
+            fps=get("FPS", int),
+            fourcc=get("FOURCC"),
+            backend=get("BACKEND"),
+            buffer_size=get_int("BUFFER", 1),
+            max_drain=get_int("MAX_DRAIN", 4),
+        )
+
+
+class VideoSource:
+    """OpenCV camera or video file with stale-frame draining and timestamps.
+
+    Live cameras use a grab/retrieve split: when the loop has fallen behind,
+    frames that were already sitting in the driver queue (their grab returns
+    almost instantly) are discarded and only the freshest one is decoded.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.is_live = isinstance(config.source, int)
+
+        api = CAPTURE_BACKENDS.get(config.backend or "any", cv2.CAP_ANY)
+        self.cap = cv2.VideoCapture(config.source, api)
+
+        if self.is_live:
+            # FOURCC must be set before the frame size for most drivers
+            if config.fourcc:
+                self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*config.fourcc))
+            if config.width:
+                self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, config.width)
+            if config.height:
+                self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, config.height)
+            if config.fps:
+                self.cap.set(cv2.CAP_PROP_FPS, config.fps)
+            if config.buffer_size:
+                self.cap.set(cv2.CAP_PROP_BUFFERSIZE, config.buffer_size)
+
+        self.width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        self.fps = int(self.cap.get(cv2.CAP_PROP_FPS) or 30)
+        self.frame_interval = 1.0 / self.fps
+
+        self._last_read = None
+        self.frames = 0
+        self.stale_dropped = 0
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def _grab(self):
+        if not self.is_live or self._last_read is None:
+            return self.cap.grab()
+
+        # Only drain when we are late; otherwise the next grab is the fresh frame
+        behind = time.perf_counter() - self._last_read > 1.5 * self.frame_interval
+        if not behind:
+            return self.cap.grab()
+
+        for _ in range(self.config.max_drain + 1):
+            start = time.perf_counter()
+            if not self.cap.grab():
+                return False
+            # A grab that had to wait delivered a frame that was just captured
+            if time.perf_counter() - start >= 0.5 * self.frame_interval:
+                return True
+            self.stale_dropped += 1
+        # Every grab returned instantly; the last one is the newest we have
+        self.stale_dropped -= 1
+        return True
+
+    def read(self):
+        """Return (ok, frame, timestamp) with timestamp in time.perf_counter() seconds."""
+        if not self._grab():
+            return False, None, None
+        timestamp = time.perf_counter()
+        ok, frame = self.cap.retrieve()
+        self._last_read = time.perf_counter()
+        if ok:
+            self.frames += 1
+        return ok, frame, timestamp
+
+    def release(self):
+        self.cap.release()
+
+
+class SyntheticSource:
+    """Generated frames with a moving square, for tests without a camera.
+
+    Args:
+        width: Frame width
+        height: Frame height
+        fps: Frame rate to pace at (0 = as fast as possible)
+        count: Number of frames before reporting end of stream (None = endless)
+    """
+
+    is_live = False
+
+    def __init__(self, width=640, height=480, fps=30, count=None):
+        self.width = width
+        self.height = height
+        self.fps = fps or 30
+        self._pace = fps
+        self.count = count
+        self.frames = 0
+        self.stale_dropped = 0
+        self._next_frame = time.perf_counter()
+        self._opened = True
+
+    def isOpened(self):
+        return self._opened
+
+    def read(self):
+        if self.count is not None and self.frames >= self.count:
+            return False, None, None
+        if self._pace:
+            self._next_frame += 1.0 / self._pace
+            delay = self._next_frame - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+        frame = np.zeros((self.height, self.width, 3), dtype=np.uint8)
+        size = max(8, min(self.width, self.height) // 8)
+        x = (self.frames * 4) % max(1, self.width - size)
+        y = (self.height - size) // 2
+        frame[y:y + size, x:x + size] = (0, 200, 255)
+
+        self.frames += 1
+        return True, frame, time.perf_counter()
+
+    def release(self):
+        self._opened = False
+
+
+def open_capture(config=None):
+    """Open the frame source described by `config` (defaults to CaptureConfig.from_env())."""
+    config = config or CaptureConfig.from_env()
+    source = config.source
+    if isinstance(source, str) and source.startswith("synthetic"):
+        width, height = config.width or 640, config.height or 480
+        if ":" in source:
+            width, height = (int(v) for v in source.split(":", 1)[1].split("x"))
+        return SyntheticSource(width, height, 30 if config.fps is None else config.fps)
+    return VideoSource(config)
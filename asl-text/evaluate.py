@@ -0,0 +1,251 @@
+import argparse
+import json
+import multiprocessing
+import os
+import time
+
+import numpy as np
+
+from keypoints import PREPROCESSING_MODES, normalize_hands_batch, normalize_keypoints_batch
+from recorder import NO_LABEL, list_chunks, load_chunk
+
+# Features per frame: one hand from `landmarks` (see normalize_keypoints_batch),
+# both hands from a recorded `hands` column (see normalize_hands_batch)
+FEATURES = 21 * 3
+TWO_HAND_FEATURES = 2 * FEATURES
+
+# Loaded once per worker process by _init_worker
+_classifier = None
+_settings = None
+
+
+def find_shards(paths):
+    """Expand corpus paths into shard files.
+
+    A path can be a recording session directory (see recorder.py), a
+    directory of sessions, a single chunk, or an .npz file with `landmarks`
+    (N, 21, 3), `labels` (N,) and optionally `handedness` (N,) and `hands`
+    (N, 2, 21, 3).
+    """
+    shards = []
+    for path in paths:
+        if os.path.isdir(path):
+            if os.path.exists(os.path.join(path, "meta.json")):
+                shards.extend(list_chunks(path))
+            else:
+                for name in sorted(os.listdir(path)):
+                    sub = os.path.join(path, name)
+                    if os.path.isdir(sub) or name.endswith(".npz"):
+                        shards.extend(find_shards([sub]))
+        elif path.endswith(".npz") or os.path.exists(os.path.join(path, "landmarks.npy")):
+            shards.append(path)
+    return shards
+
+
+def _init_worker(model_path, settings):
+    global _classifier, _settings
+    # CPU only, one thread per process so shards scale across cores
+    os.environ["CUDA_VISIBLE_DEVICES"] = "-1"
+    from model_backends import load_classifier
+
+    _classifier = load_classifier(model_path)
+    _settings = settings
+
+
+def evaluate_shard(path):
+    """Score one shard in the current worker.
+
+    Returns:
+        Tuple of (confusion matrix, samples, seconds spent in inference)
+
+    Raises:
+        ValueError: If the model takes neither 63 nor 126 features, or the shard
+            lacks the label column (or the `hands` column a two-hand model needs)
+    """
+    settings = _settings
+    width = int(np.prod(_classifier.input_shape))
+    if width not in (FEATURES, TWO_HAND_FEATURES):
+        raise ValueError(
+            f"{_classifier.path} expects input {_classifier.input_shape}, but corpora hold hand landmarks "
+            f"({FEATURES} features per hand, {TWO_HAND_FEATURES} for both)"
+        )
+    num_classes = _classifier.num_classes
+    confusion = np.zeros((num_classes, num_classes), dtype=np.int64)
+    samples = 0
+    inference_seconds = 0.0
+
+    columns = load_chunk(path)
+    two_hands = width == TWO_HAND_FEATURES
+    if two_hands and "hands" not in columns:
+        raise ValueError(f"{path} has no 'hands' column, which the two-hand model {_classifier.path} needs")
+    landmarks = columns["hands" if two_hands else "landmarks"]
+    handedness = columns.get("handedness")
+    if settings["label_column"] not in columns:
+        raise ValueError(
+            f"{path} has no '{settings['label_column']}' column (columns: {', '.join(sorted(columns))})"
+        )
+    labels = columns[settings["label_column"]]
+    batch_size = settings["batch_size"]
+
+    for start in range(0, len(labels), batch_size):
+        batch_labels = np.asarray(labels[start:start + batch_size], dtype=np.int64)
+        batch_landmarks = np.asarray(landmarks[start:start + batch_size])
+
+        # Only frames with a hand and a label in the model's class range count
+        keep = (batch_labels != NO_LABEL) & (batch_labels >= 0) & (batch_labels < num_classes)
+        keep &= np.any(batch_landmarks.reshape(len(batch_landmarks), -1) != 0, axis=1)
+        if not np.any(keep):
+            continue
+
+        if two_hands:
+            features = normalize_hands_batch(batch_landmarks[keep], settings["mode"],
+                                             mirror_secondary=settings["mirror_secondary"])
+        else:
+            # Mirror like the live path did; corpora without a handedness column stay unmirrored
+            batch_handedness = None if handedness is None else np.asarray(handedness[start:start + batch_size])[keep]
+            features = normalize_keypoints_batch(batch_landmarks[keep], settings["mode"], batch_handedness,
+                                                 mirror_secondary=settings["mirror_secondary"])
+        model_input = features.reshape(-1, *_classifier.input_shape)
+
+        start_time = time.perf_counter()
+        predicted = np.argmax(_classifier.predict(model_input), axis=1)
+        inference_seconds += time.perf_counter() - start_time
+
+        truth = batch_labels[keep]
+        confusion += np.bincount(truth * num_classes + predicted, minlength=num_classes * num_classes).reshape(
+            num_classes, num_classes
+        )
+        samples += len(truth)
+
+    return confusion, samples, inference_seconds
+
+
+def per_class_metrics(confusion):
+    """Return precision, recall, F1 and support per class from a confusion matrix."""
+    true_positive = np.diag(confusion).astype(np.float64)
+    predicted = confusion.sum(axis=0)
+    support = confusion.sum(axis=1)
+    precision = np.divide(true_positive, predicted, out=np.zeros_like(true_positive), where=predicted > 0)
+    recall = np.divide(true_positive, support, out=np.zeros_like(true_positive), where=support > 0)
+    denominator = precision + recall
+    f1 = np.divide(2 * precision * recall, denominator, out=np.zeros_like(true_positive), where=denominator > 0)
+    return precision, recall, f1, support
+
+
+def evaluate(model_path, corpus, mode="centered_scaled", label_column="stable_label", batch_size=4096, workers=None,
+             mirror_secondary=True):
+    """Evaluate a classifier over a landmark corpus, sharded across processes.
+
+    Returns:
+        Report dict with accuracy, confusion matrix, per-class metrics and throughput
+    """
+    shards = find_shards(corpus)
+    if not shards:
+        raise ValueError(f"No shards found in {corpus}")
+
+    workers = workers or os.cpu_count() or 1
+    workers = min(workers, len(shards))
+    settings = {"mode": mode, "label_column": label_column, "batch_size": batch_size,
+                "mirror_secondary": mirror_secondary}
+
+    wall_start = time.perf_counter()
+    if workers == 1:
+        _init_worker(model_path, settings)
+        results = [evaluate_shard(path) for path in shards]
+    else:
+        # Keep BLAS single-threaded inside each worker; the pool provides the parallelism
+        for var in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS", "TF_NUM_INTRAOP_THREADS"):
+            os.environ.setdefault(var, "1")
+        context = multiprocessing.get_context("spawn")
+        with context.Pool(workers, initializer=_init_worker, initargs=(model_path, settings)) as pool:
+            results = pool.map(evaluate_shard, shards, chunksize=1)
+    wall_seconds = time.perf_counter() - wall_start
+
+    confusion = sum(r[0] for r in results)
+    samples = sum(r[1] for r in results)
+    inference_seconds = sum(r[2] for r in results)
+    precision, recall, f1, support = per_class_metrics(confusion)
+
+    return {
+        "model": os.path.basename(model_path),
+        "shards": len(shards),
+        "workers": workers,
+        "samples": int(samples),
+        "accuracy": float(np.trace(confusion) / samples) if samples else None,
+        "samples_per_sec": round(samples / wall_seconds, 1) if wall_seconds else None,
+        "inference_samples_per_sec": round(samples / inference_seconds, 1) if inference_seconds else None,
+        "wall_seconds": round(wall_seconds, 3),
+        "per_class": {
+            str(c): {
+                "precision": round(float(precision[c]), 4),
+                "recall": round(float(recall[c]), 4),
+                "f1": round(float(f1[c]), 4),
+                "support": int(support[c]),
+            }
+            for c in range(len(support))
+            if support[c] or confusion[:, c].any()
+        },
+        "confusion": confusion.tolist(),
+    }
+
+
+def print_report(report, class_labels=None):
+    class_labels = class_labels or {}
+    print(f"\n{'='*60}")
+    print(f"EVALUATION: {report['model']}  ({report['samples']} samples, {report['shards']} shards, "
+          f"{report['workers']} workers)")
+    print(f"{'='*60}")
+    if report["accuracy"] is not None:
+        print(f"Accuracy:                 {report['accuracy']:>10.4f}")
+    print(f"Samples/sec (end to end): {report['samples_per_sec']:>10}")
+    print(f"Samples/sec (inference):  {report['inference_samples_per_sec']:>10}")
+    print(f"\n{'class':<14}{'precision':>10}{'recall':>10}{'f1':>10}{'support':>10}")
+    for cls, m in report["per_class"].items():
+        name = class_labels.get(int(cls), f"Class_{cls}")
+        print(f"{name:<14}{m['precision']:>10.3f}{m['recall']:>10.3f}{m['f1']:>10.3f}{m['support']:>10}")
+
+    active = [int(c) for c in report["per_class"]]
+    confusion = np.asarray(report["confusion"])[np.ix_(active, active)]
+    print("\nConfusion matrix (rows = truth, cols = predicted):")
+    print("      " + "".join(f"{c:>6}" for c in active))
+    for c, row in zip(active, confusion):
+        print(f"{c:>6}" + "".join(f"{v:>6}" for v in row))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score a classifier on landmark corpora (CPU only).")
+    parser.add_argument("corpus", nargs="+", help="Recording sessions, chunk files or .npz corpora")
+    parser.add_argument("--model", default="best_cnn_asl_model.npz", help="Model file or export manifest")
+    parser.add_argument("--mode", default="centered_scaled", choices=PREPROCESSING_MODES,
+                        help="Keypoint preprocessing (must match training)")
+    parser.add_argument("--label-column", default="stable_label",
+                        help="Ground-truth column (default: stable_label, the recorder's label, which scores "
+                             "agreement with the live output); use labels for annotated .npz corpora")
+    parser.add_argument("--batch-size", type=int, default=4096)
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--output", help="Write the full report as JSON")
+    args = parser.parse_args()
+
+    try:
+        report = evaluate(args.model, args.corpus, args.mode, args.label_column, args.batch_size, args.workers,
+                          mirror_secondary=os.getenv("ASL_MIRROR_SECONDARY", "1") == "1")
+    except ValueError as e:
+        parser.error(str(e))
+
+    class_labels = None
+    for path in args.corpus:
+        meta_path = os.path.join(path, "meta.json")
+        if os.path.exists(meta_path):
+            with open(meta_path, "r", encoding="utf-8") as f:
+                class_labels = {int(k): v for k, v in json.load(f).get("class_labels", {}).items()}
+            break
+    print_report(report, class_labels)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReport written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
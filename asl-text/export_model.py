@@ -0,0 +1,212 @@
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from model_backends import load_classifier
+from numpy_cnn import extract_weights
+
+# Export formats and the backend that loads them
+FORMATS = {
+    "float32": "tflite",
+    "float16": "tflite",
+    "dynamic": "tflite",   # int8 weights, float activations
+    "int8": "tflite",      # full integer quantization (needs calibration data)
+    "onnx": "onnx",
+    "numpy": "numpy",      # weights .npz for the TensorFlow-free NumPy engine
+}
+
+CALIBRATION_SAMPLES = 200
+LATENCY_RUNS = 200
+
+
+def load_eval_data(path, input_shape):
+    """Load a held-out landmark set.
+
+    The file is an .npz with `keypoints` (N, 63) or already model-shaped
+    inputs, and optionally integer class `labels` (N,).
+
+    Returns:
+        Tuple of (inputs shaped (N, *input_shape), labels or None)
+    """
+    data = np.load(path)
+    inputs = np.asarray(data["keypoints"], dtype=np.float32).reshape(-1, *input_shape)
+    labels = np.asarray(data["labels"], dtype=np.int64) if "labels" in data else None
+    return inputs, labels
+
+
+def convert_tflite(model, quantization, calibration):
+    """Convert a Keras model to a TFLite flatbuffer.
+
+    Args:
+        model: Loaded tf.keras model
+        quantization: One of "float32", "float16", "dynamic", "int8"
+        calibration: Representative inputs used for full int8 quantization
+
+    Returns:
+        Serialized TFLite model bytes
+    """
+    import tensorflow as tf
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    if quantization == "float16":
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.target_spec.supported_types = [tf.float16]
+    elif quantization == "dynamic":
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    elif quantization == "int8":
+        def representative_dataset():
+            for sample in calibration[:CALIBRATION_SAMPLES]:
+                yield [sample[np.newaxis].astype(np.float32)]
+
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = representative_dataset
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        converter.inference_input_type = tf.int8
+        converter.inference_output_type = tf.int8
+    return converter.convert()
+
+
+def convert_onnx(model, output_path):
+    """Convert a Keras model to ONNX (requires tf2onnx)."""
+    import tensorflow as tf
+    import tf2onnx
+
+    spec = (tf.TensorSpec((None, *model.input_shape[1:]), tf.float32, name="input"),)
+    tf2onnx.convert.from_keras(model, input_signature=spec, opset=13, output_path=output_path)
+
+
+def measure(path, inputs, labels, reference):
+    """Load an artifact and measure size, load time, latency and accuracy."""
+    classifier = load_classifier(path)
+
+    # Single-sample latency, matching how the live loop calls the model
+    sample = inputs[:1]
+    classifier.predict(sample)
+    timings = []
+    for _ in range(LATENCY_RUNS):
+        start = time.perf_counter()
+        classifier.predict(sample)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    probs = np.concatenate([classifier.predict(inputs[i:i + 1]) for i in range(len(inputs))])
+    predicted = np.argmax(probs, axis=1)
+
+    result = {
+        "backend": classifier.backend,
+        "size_bytes": os.path.getsize(path),
+        "load_ms": classifier.load_ms,
+        "latency_ms_p50": round(float(np.percentile(timings, 50)), 4),
+        "latency_ms_p95": round(float(np.percentile(timings, 95)), 4),
+        "agreement": round(float(np.mean(predicted == np.argmax(reference, axis=1))), 4),
+        "max_abs_diff": round(float(np.max(np.abs(probs - reference))), 6),
+        "accuracy": None,
+    }
+    if labels is not None:
+        result["accuracy"] = round(float(np.mean(predicted == labels)), 4)
+    return result
+
+
+def export(model_path, formats, output_dir, eval_data=None, min_agreement=0.99):
+    """Export a Keras model to the requested formats and write a manifest.
+
+    Args:
+        model_path: Source .keras model
+        formats: Iterable of keys from FORMATS
+        output_dir: Directory for the artifacts and manifest.json
+        eval_data: Optional held-out .npz (see load_eval_data); random inputs
+            are used for agreement checks when omitted
+        min_agreement: Minimum top-1 agreement with the source model for an
+            artifact to be marked usable
+
+    Returns:
+        The manifest dict
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    source = load_classifier(model_path)
+    input_shape = source.input_shape
+
+    if eval_data:
+        inputs, labels = load_eval_data(eval_data, input_shape)
+    else:
+        print("No evaluation data given, checking agreement on random inputs")
+        inputs = np.random.default_rng(0).normal(size=(256, *input_shape)).astype(np.float32)
+        labels = None
+
+    reference = source.predict(inputs)
+    stem = os.path.splitext(os.path.basename(model_path))[0]
+
+    artifacts = []
+    baseline = measure(model_path, inputs, labels, reference)
+    baseline.update(format="keras", path=os.path.relpath(model_path, output_dir), accuracy_ok=True)
+    artifacts.append(baseline)
+
+    for fmt in formats:
+        if fmt == "onnx":
+            path = os.path.join(output_dir, f"{stem}.onnx")
+        elif fmt == "numpy":
+            path = os.path.join(output_dir, f"{stem}.npz")
+        else:
+            path = os.path.join(output_dir, f"{stem}_{fmt}.tflite")
+
+        print(f"Exporting {fmt} -> {path}")
+        try:
+            if fmt == "onnx":
+                convert_onnx(source.model, path)
+            elif fmt == "numpy":
+                extract_weights(model_path, path)
+            else:
+                with open(path, "wb") as f:
+                    f.write(convert_tflite(source.model, fmt, inputs))
+            result = measure(path, inputs, labels, reference)
+        except Exception as e:
+            print(f"  Failed: {e}")
+            artifacts.append({"format": fmt, "backend": FORMATS[fmt], "error": str(e), "accuracy_ok": False})
+            continue
+
+        result.update(
+            format=fmt,
+            path=os.path.basename(path),
+            accuracy_ok=result["agreement"] >= min_agreement,
+        )
+        artifacts.append(result)
+        print(
+            f"  {result['size_bytes'] / 1024:.1f} KiB, load {result['load_ms']:.1f} ms, "
+            f"p50 {result['latency_ms_p50']:.3f} ms, agreement {result['agreement']:.2%}"
+        )
+
+    manifest = {
+        "source": os.path.basename(model_path),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "input_shape": list(input_shape),
+        "num_classes": source.num_classes,
+        "eval_samples": int(len(inputs)),
+        "eval_data": os.path.basename(eval_data) if eval_data else None,
+        "min_agreement": min_agreement,
+        "artifacts": artifacts,
+    }
+    manifest_path = os.path.join(output_dir, "manifest.json")
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    print(f"Manifest written to {manifest_path}")
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export a bundled .keras classifier to smaller runtime formats.")
+    parser.add_argument("model", help="Source .keras model (e.g. best_cnn_asl_model.keras)")
+    parser.add_argument("--formats", nargs="+", choices=sorted(FORMATS), default=["float16", "int8"],
+                        help="Formats to export (default: float16 int8)")
+    parser.add_argument("--output-dir", default="exports", help="Output directory (default: exports)")
+    parser.add_argument("--eval-data", help="Held-out landmark set (.npz with keypoints and labels)")
+    parser.add_argument("--min-agreement", type=float, default=0.99,
+                        help="Minimum top-1 agreement with the source model (default: 0.99)")
+    args = parser.parse_args()
+
+    export(args.model, args.formats, args.output_dir, args.eval_data, args.min_agreement)
+
+
+if __name__ == "__main__":
+    main()
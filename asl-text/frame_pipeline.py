@@ -0,0 +1,325 @@
+import json
+import time
+
+import numpy as np
+
+import metrics
+from inference_scheduler import MotionGatedScheduler
+from keypoint_filter import create_keypoint_filter
+from keypoints import HandFeatureBuilder
+from labels import CLASS_LABELS
+from quality_controller import AdaptiveQualityController, KeypointExtrapolator
+from runtime_config import RuntimeConfig
+from sentence_assembler import SentenceAssembler
+
+# Preprocessing options - try different combinations if model doesn't work well
+# ASL Alphabet models often use raw MediaPipe coordinates (normalized 0-1) without centering
+PREPROCESSING_MODE = "centered_scaled"  # Options: "raw", "centered", "centered_scaled"
+# "raw" = Use MediaPipe coordinates as-is (normalized 0-1)
+# "centered" = Center relative to wrist (current)
+# "centered_scaled" = Center and normalize by hand size
+
+# MediaPipe confidence thresholds (changing them at runtime rebuilds the graph)
+MIN_DETECTION_CONFIDENCE = 0.6
+MIN_TRACKING_CONFIDENCE = 0.6
+
+# Inference and smoothing parameters
+PREDICTION_STRIDE = 1        # run model every frame for faster response (~30 Hz at 30 fps)
+UNFILTERED_SMOOTHING_WINDOW = 5   # smaller window for quicker updates (reduced from 10)
+# Filtered keypoints (keypoint_filter one_euro|kalman) have less jitter,
+# so fewer probability vectors need to be averaged
+FILTERED_SMOOTHING_WINDOW = 2
+CONFIDENCE_THRESHOLD = 0.6   # minimum probability to show a gesture
+
+# Motion gating: reuse the last probabilities while the hand pose is still
+MOTION_THRESHOLD = 0.02      # mean landmark displacement that counts as movement
+MAX_PREDICTION_STRIDE = 8    # refresh cached probabilities at least this often
+
+# Sentence assembly: control gestures, debounce and repeat policy
+RESET_TOKENS = ("Reset",)    # clear the sentence
+EOS_TOKENS = ("EOS",)        # send the sentence
+HOLD_TIME = 0.0              # seconds a label must be held before it counts
+REPEAT_WORD_GAP = 2.0        # seconds before the same word may be added again
+
+inference_ms = metrics.histogram("asl_inference_ms", "Classifier time per prediction")
+inference_skipped = metrics.counter("asl_inference_skipped_total", "Predictions reused by motion gating")
+
+
+def default_smoothing_window(filter_name):
+    """Smoothing window for a keypoint filter (filtered keypoints need less averaging)."""
+    return FILTERED_SMOOTHING_WINDOW if filter_name != "none" else UNFILTERED_SMOOTHING_WINDOW
+
+
+class FramePipeline:
+    """The recognizer's per-frame step, from hand landmarks to sentence tokens.
+
+    Landmarks go through the HandFeatureBuilder (normalization and
+    mirroring), the keypoint filter, motion-gated inference, probability
+    smoothing and the SentenceAssembler. The AdaptiveQualityController
+    decides which frames get a landmark pass; skipped frames use keypoints
+    from the KeypointExtrapolator. Settings staged in the RuntimeConfig
+    (stdin "set" commands or the watched file) are applied between frames.
+
+    main.py drives it from the camera and soak.py from replayed landmarks,
+    so both run the same code with the same defaults.
+
+    Args:
+        model: Classifier or ModelManager (pruned models carry `classes`)
+        target_fps: Frame rate the quality controller should sustain
+        mode: Preprocessing mode (see normalize_hand)
+        mirror_secondary: Mirror the secondary hand into the canonical orientation
+        keypoint_filter: Name from KEYPOINT_FILTERS
+        config_path: Optional JSON file watched by the RuntimeConfig
+        on_sentence: Called with the token list of a finished sentence
+        on_event: Called with each non-None SentenceAssembler event
+        timings: Optional mapping of stage ("features", "inference",
+            "decision") to an object whose `observe(ms)` gets its latency
+    """
+
+    def __init__(self, model, target_fps=30, mode=PREPROCESSING_MODE, mirror_secondary=True,
+                 keypoint_filter="none", config_path=None, on_sentence=None, on_event=None, timings=None):
+        self.model = model
+        self.feature_width = int(np.prod(model.input_shape))
+        # Output column i of the (possibly pruned) model is class classes[i]
+        self.classes = np.asarray(getattr(model, "classes", np.arange(model.num_classes)))
+        self.class_positions = {int(c): i for i, c in enumerate(self.classes)}
+        self.on_event = on_event
+        self.timings = timings or {}
+
+        # Both hands are extracted into preallocated buffers; 63-input models get the
+        # primary hand (or the mirrored other hand), 126-input models get both hands
+        self.builder = HandFeatureBuilder(
+            mode,
+            mirrored=True,  # frames are flipped before landmark detection
+            mirror_secondary=mirror_secondary,
+        )
+        self.keypoint_filter = create_keypoint_filter(keypoint_filter)
+        self.quality = AdaptiveQualityController(target_fps=target_fps)
+        self.extrapolator = KeypointExtrapolator()
+        self.scheduler = MotionGatedScheduler(
+            motion_threshold=MOTION_THRESHOLD,
+            min_stride=PREDICTION_STRIDE,
+            max_stride=MAX_PREDICTION_STRIDE,
+        )
+        self.smoothing_window = default_smoothing_window(keypoint_filter)
+        self.confidence_threshold = CONFIDENCE_THRESHOLD
+        self.predictions = []        # last smoothing_window prob vectors (active classes only)
+        self.assembler = SentenceAssembler(
+            CLASS_LABELS,
+            reset_tokens=RESET_TOKENS,
+            eos_tokens=EOS_TOKENS,
+            hold_time=HOLD_TIME,
+            repeat_gap=REPEAT_WORD_GAP,
+            on_sentence=on_sentence,
+        )
+
+        # Live tuning: "set <name> <value>" commands or edits to config_path (JSON)
+        # are staged and applied together between frames (see runtime_config.py)
+        self.config = RuntimeConfig(
+            {
+                "prediction_stride": PREDICTION_STRIDE,
+                "max_prediction_stride": MAX_PREDICTION_STRIDE,
+                "motion_threshold": MOTION_THRESHOLD,
+                "smoothing_window": self.smoothing_window,
+                "confidence_threshold": CONFIDENCE_THRESHOLD,
+                "preprocessing_mode": mode,
+                "keypoint_filter": keypoint_filter,
+                "min_detection_confidence": MIN_DETECTION_CONFIDENCE,
+                "min_tracking_confidence": MIN_TRACKING_CONFIDENCE,
+                "hold_time": HOLD_TIME,
+                "repeat_gap": REPEAT_WORD_GAP,
+                "class_labels": dict(CLASS_LABELS),
+            },
+            path=config_path,
+        )
+
+        self.frame_index = 0             # frame counter
+        self.last_landmark_frame = 0     # frame index of the last real landmark pass
+        self.stable_label = None         # label we display (kept while no hand is seen)
+        self.raw_probs = None            # probabilities of the last frame (None without a hand)
+        self.landmarks_fresh = False     # the last frame had a real landmark pass
+
+    def landmarks_due(self):
+        """Return True if the next frame should get a landmark pass."""
+        return self.quality.should_run_landmarks(self.frame_index)
+
+    def process(self, timestamp, results=None):
+        """Run one frame from MediaPipe results (None on a skipped landmark pass).
+
+        Returns:
+            The stable label (or None)
+        """
+        if results is not None:
+            self.builder.update(results)
+        return self._step(timestamp, results is not None)
+
+    def process_raw(self, timestamp, hands=None):
+        """Run one frame from raw (MediaPipe right, MediaPipe left) hands (None on a skipped pass).
+
+        Returns:
+            The stable label (or None)
+        """
+        if hands is not None:
+            self.builder.update_raw(hands)
+        return self._step(timestamp, hands is not None)
+
+    def _observe(self, stage, elapsed_ms):
+        timer = self.timings.get(stage)
+        if timer is not None:
+            timer.observe(elapsed_ms)
+
+    def _step(self, timestamp, fresh):
+        start = time.perf_counter()
+        if fresh:
+            # Extract keypoints (63 features for one hand, 126 for two)
+            keypoints = self.builder.features(self.feature_width)
+            keypoints = self.keypoint_filter.filter(keypoints, timestamp)
+            self.extrapolator.update(keypoints, self.frame_index - self.last_landmark_frame)
+            self.last_landmark_frame = self.frame_index
+        else:
+            # Skipped landmark pass - extrapolate keypoints from the last real ones
+            keypoints = self.extrapolator.predict()
+            if keypoints is None:
+                keypoints = np.zeros(self.feature_width, dtype=np.float32)
+        self.landmarks_fresh = fresh
+        self.frame_index += 1
+
+        # Check if we have hand keypoints
+        hand_detected = np.any(keypoints != 0)
+        features_done = time.perf_counter()
+        self._observe("features", (features_done - start) * 1000)
+
+        self.raw_probs = None
+        if not hand_detected:
+            self.scheduler.reset()
+            return self.stable_label
+
+        # Run prediction (the scheduler skips still poses)
+        if self.scheduler.should_run(keypoints):
+            # Reshape to (1, 63, 1) / (1, 126, 1) for 1D CNN model
+            raw_probs = self.model.predict(keypoints.reshape(1, *self.model.input_shape))[0]
+            elapsed_ms = (time.perf_counter() - features_done) * 1000
+            inference_ms.observe(elapsed_ms)
+            self._observe("inference", elapsed_ms)
+            self.scheduler.record(keypoints, raw_probs)
+        else:
+            # Pose unchanged - reuse the cached probabilities
+            raw_probs = self.scheduler.cached_probs
+            inference_skipped.inc()
+        self.raw_probs = raw_probs
+
+        decision_start = time.perf_counter()
+        # Update buffer of recent probability vectors
+        self.predictions.append(raw_probs)
+        if len(self.predictions) > self.smoothing_window:
+            self.predictions.pop(0)
+
+        # Compute smoothed probabilities (argmax position -> class index)
+        smoothed_probs = np.mean(self.predictions, axis=0)
+        best_position = int(np.argmax(smoothed_probs))
+        best_conf = float(smoothed_probs[best_position])
+
+        # Either show a gesture or "no gesture" based on confidence
+        if best_conf >= self.confidence_threshold:
+            self.stable_label = int(self.classes[best_position])
+        else:
+            self.stable_label = None
+
+        # Sentence logic: the assembler does edge detection and debouncing
+        event = self.assembler.feed(timestamp, self.stable_label, best_conf)
+        if event is not None and self.on_event is not None:
+            self.on_event(event)
+        self._observe("decision", (time.perf_counter() - decision_start) * 1000)
+        return self.stable_label
+
+    def confidence(self, label):
+        """Smoothed probability of `label` (None if there is nothing to average)."""
+        if not self.predictions or label not in self.class_positions:
+            return None
+        return float(np.mean(self.predictions, axis=0)[self.class_positions[label]])
+
+    def update_quality(self, frame_time):
+        """Feed one frame's processing time (seconds) to the quality controller.
+
+        Returns:
+            True if the quality level changed
+        """
+        return self.quality.update(frame_time)
+
+    def apply_config(self):
+        """Apply staged runtime settings (call between frames).
+
+        MediaPipe's confidence thresholds are only stored in `config.values`;
+        the caller rebuilds its landmark graph when they change.
+
+        Returns:
+            Dict of settings that changed (empty if none)
+        """
+        changes = self.config.apply_pending()
+        if not changes:
+            return changes
+        values = self.config.values
+
+        if "smoothing_window" in changes:
+            self.smoothing_window = changes["smoothing_window"]
+            del self.predictions[:-self.smoothing_window]
+        if "confidence_threshold" in changes:
+            self.confidence_threshold = changes["confidence_threshold"]
+
+        if "prediction_stride" in changes or "max_prediction_stride" in changes:
+            self.scheduler.min_stride = values["prediction_stride"]
+            self.scheduler.max_stride = max(self.scheduler.min_stride, values["max_prediction_stride"])
+            self.scheduler.stride = self.scheduler.min_stride
+        if "motion_threshold" in changes:
+            self.scheduler.motion_threshold = changes["motion_threshold"]
+
+        if "preprocessing_mode" in changes or "keypoint_filter" in changes:
+            # Features change meaning: drop everything derived from the old ones
+            self.builder.mode = values["preprocessing_mode"]
+            self.keypoint_filter = create_keypoint_filter(values["keypoint_filter"])
+            self.scheduler.reset()
+            self.predictions.clear()
+            if "keypoint_filter" in changes and "smoothing_window" not in self.config.explicit:
+                # Same rule as at startup, unless the window was tuned by hand
+                self.smoothing_window = default_smoothing_window(values["keypoint_filter"])
+                values["smoothing_window"] = self.smoothing_window
+
+        if "hold_time" in changes:
+            self.assembler.hold_time = changes["hold_time"]
+        if "repeat_gap" in changes:
+            self.assembler.repeat_gap = changes["repeat_gap"]
+        if "class_labels" in changes:
+            # Mutate in place: the assembler and the overlay share this dict
+            CLASS_LABELS.clear()
+            CLASS_LABELS.update(changes["class_labels"])
+            missing = sorted(set(CLASS_LABELS) - set(self.class_positions))
+            if missing:
+                # The loaded model was pruned at startup; it has no output for these
+                print(f"Classes {missing} are outside the active label space; "
+                      f"restart (or use ASL_LABEL_SPACE=full) to recognize them")
+        return changes
+
+    def handle_command(self, command, argument):
+        """Handle a model or config control command (see main.py's stdin reader).
+
+        Returns:
+            True if the command was one of the pipeline's
+        """
+        if command == "model" and argument:
+            self.model.request_swap(argument)
+        elif command == "ensemble" and argument:
+            self.model.request_swap([p.strip() for p in argument.split(",") if p.strip()])
+        elif command == "preload_model" and argument:
+            self.model.preload(argument)
+        elif command == "model_stats":
+            print("model_stats:" + json.dumps(self.model.snapshot()))
+        elif command == "set" and argument:
+            # "set confidence_threshold 0.7" (class_labels takes a JSON object)
+            key, _, value = argument.partition(" ")
+            error = self.config.set(key, value.strip())
+            print(f"Config error: {error}" if error else f"Config staged: {key}")
+        elif command == "config":
+            print("config:" + json.dumps(self.config.values))
+        else:
+            return False
+        return True
@@ -0,0 +1,91 @@
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Header (int64): sequence number, latest slot, width, height, channels
+HEADER_FIELDS = 5
+HEADER_BYTES = HEADER_FIELDS * 8
+SLOTS = 3
+
+
+class FrameShareWriter:
+    """Publish BGR frames to another process through shared memory.
+
+    Three frame slots rotate: the writer fills the slot after the latest one
+    and then publishes it by updating the header, so a reader that is still
+    painting the previous frame is never written over by the next one.
+
+    Args:
+        width: Frame width
+        height: Frame height
+        name: Shared memory name (None = generated)
+    """
+
+    def __init__(self, width, height, name=None):
+        self.width = width
+        self.height = height
+        self.frame_bytes = width * height * 3
+        self.shm = shared_memory.SharedMemory(create=True, size=HEADER_BYTES + SLOTS * self.frame_bytes, name=name)
+        self.name = self.shm.name
+        self.header = np.ndarray((HEADER_FIELDS,), dtype=np.int64, buffer=self.shm.buf)
+        self.header[:] = (0, 0, width, height, 3)
+        self.slots = [
+            np.ndarray((height, width, 3), dtype=np.uint8, buffer=self.shm.buf,
+                       offset=HEADER_BYTES + i * self.frame_bytes)
+            for i in range(SLOTS)
+        ]
+        self.frames = 0
+
+    def publish(self, frame):
+        """Copy one frame into the next slot and make it the latest."""
+        slot = (int(self.header[1]) + 1) % SLOTS
+        if frame.shape[:2] != (self.height, self.width):
+            # Renderers produce a fixed size; anything else is cropped or zero-padded
+            target = self.slots[slot]
+            target[:] = 0
+            h, w = min(self.height, frame.shape[0]), min(self.width, frame.shape[1])
+            target[:h, :w] = frame[:h, :w]
+        else:
+            self.slots[slot][:] = frame
+        self.header[1] = slot
+        self.header[0] += 1
+        self.frames += 1
+
+    def close(self):
+        self.header = None
+        self.slots = []
+        self.shm.close()
+        self.shm.unlink()
+
+
+class FrameShareReader:
+    """Read the latest frame published by a FrameShareWriter without copying."""
+
+    def __init__(self, name):
+        try:
+            self.shm = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            # Python < 3.13: stop the resource tracker from unlinking the writer's segment
+            from multiprocessing import resource_tracker
+            self.shm = shared_memory.SharedMemory(name=name)
+            resource_tracker.unregister(self.shm._name, "shared_memory")
+        self.header = np.ndarray((HEADER_FIELDS,), dtype=np.int64, buffer=self.shm.buf)
+        _, _, self.width, self.height, self.channels = (int(v) for v in self.header)
+        self.frame_bytes = self.width * self.height * self.channels
+        self.bytes_per_line = self.width * self.channels
+
+    def sequence(self):
+        """Number of frames published so far (changes when a new frame is available)."""
+        return int(self.header[0])
+
+    def latest(self):
+        """Return (sequence, view of the latest frame); the view aliases shared memory."""
+        seq = int(self.header[0])
+        slot = int(self.header[1])
+        view = np.ndarray((self.height, self.width, self.channels), dtype=np.uint8, buffer=self.shm.buf,
+                          offset=HEADER_BYTES + slot * self.frame_bytes)
+        return seq, view
+
+    def close(self):
+        self.header = None
+        self.shm.close()
@@ -0,0 +1,108 @@
+import numpy as np
+
+
+class MotionGatedScheduler:
+    """Decide per frame whether the classifier needs to run.
+
+    The current normalized keypoint vector is compared to the one that was
+    last classified. While the hand is still, the cached probabilities are
+    reused and the interval between forced refreshes grows; as soon as the
+    pose moves beyond the threshold the classifier runs again and the
+    interval drops back to the minimum stride.
+
+    Args:
+        motion_threshold: Mean per-landmark displacement (in normalized
+            keypoint units) below which the pose counts as unchanged
+        min_stride: Smallest number of frames between classifier runs
+        max_stride: Largest number of frames a cached result may be reused
+        fast_motion_factor: Motion above threshold * factor counts as rapid
+            motion and forces inference on every frame
+    """
+
+    def __init__(self, motion_threshold=0.02, min_stride=1, max_stride=8, fast_motion_factor=4.0):
+        self.motion_threshold = motion_threshold
+        self.min_stride = max(1, int(min_stride))
+        self.max_stride = max(self.min_stride, int(max_stride))
+        self.fast_motion_factor = fast_motion_factor
+
+        self.stride = self.min_stride
+        self.cached_probs = None
+        self.last_motion = 0.0
+        self._last_keypoints = None
+        self._frames_since_run = 0
+
+        # Metrics
+        self.frames = 0
+        self.runs = 0
+        self.skips = 0
+
+    def reset(self):
+        """Forget the cached pose (call when the hand is lost)."""
+        self.cached_probs = None
+        self._last_keypoints = None
+        self._frames_since_run = 0
+        self.stride = self.min_stride
+
+    def _motion(self, keypoints):
+        # Mean Euclidean displacement of the 21 landmarks
+        delta = keypoints.reshape(-1, 3) - self._last_keypoints.reshape(-1, 3)
+        return float(np.sqrt(np.einsum("ij,ij->i", delta, delta)).mean())
+
+    def should_run(self, keypoints):
+        """Return True if the classifier must run for this frame.
+
+        Args:
+            keypoints: Normalized keypoint vector for the current frame
+
+        Returns:
+            True to run the model, False to reuse `cached_probs`
+        """
+        self.frames += 1
+        self._frames_since_run += 1
+
+        if self.cached_probs is None or self._last_keypoints is None:
+            return True
+
+        self.last_motion = self._motion(keypoints)
+
+        if self.last_motion >= self.motion_threshold * self.fast_motion_factor:
+            # Rapid motion: classify every frame
+            self.stride = self.min_stride
+            return True
+        if self.last_motion >= self.motion_threshold:
+            # Moving: fall back to the base stride
+            self.stride = self.min_stride
+            run = self._frames_since_run >= self.stride
+        elif self._frames_since_run >= self.stride:
+            # Still: back off, but refresh at least every max_stride frames
+            self.stride = min(self.stride * 2, self.max_stride)
+            run = True
+        else:
+            run = False
+
+        if not run:
+            self.skips += 1
+        return run
+
+    def record(self, keypoints, probs):
+        """Store the result of a classifier run for later reuse."""
+        self.runs += 1
+        self._frames_since_run = 0
+        self._last_keypoints = keypoints.copy()
+        self.cached_probs = probs
+
+    @property
+    def skip_ratio(self):
+        """Fraction of hand frames that reused cached probabilities."""
+        return self.skips / self.frames if self.frames else 0.0
+
+    def stats(self):
+        """Return a snapshot of the scheduler metrics."""
+        return {
+            "frames": self.frames,
+            "runs": self.runs,
+            "skips": self.skips,
+            "skip_ratio": round(self.skip_ratio, 3),
+            "stride": self.stride,
+            "motion": round(self.last_motion, 4),
+        }
@@ -0,0 +1,167 @@
+import math
+
+import numpy as np
+
+KEYPOINT_FILTERS = ("none", "one_euro", "kalman")
+
+
+class OneEuroFilter:
+    """One Euro filter applied element-wise to a whole keypoint array.
+
+    Smooths strongly while a coordinate is still and follows quickly when it
+    moves: the low-pass cutoff grows with the filtered speed. Elements that
+    are exactly zero (hand missing) reset their state and stay zero, so a hand
+    that reappears starts from its new position instead of sliding in.
+
+    Args:
+        min_cutoff: Cutoff frequency (Hz) at rest; lower = smoother
+        beta: Speed coefficient; higher = less lag during fast movement
+        d_cutoff: Cutoff frequency (Hz) for the speed estimate
+    """
+
+    def __init__(self, min_cutoff=1.0, beta=10.0, d_cutoff=1.0):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.reset()
+
+    def reset(self):
+        self._value = None
+        self._speed = None
+        self._active = None
+        self._out = None
+        self._last_time = None
+
+    @staticmethod
+    def _alpha(cutoff, dt):
+        tau = 1.0 / (2 * math.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    def filter(self, keypoints, timestamp):
+        """Return the filtered keypoints (a reused buffer with the input's shape).
+
+        Args:
+            keypoints: Keypoint array of any shape (e.g. (63,), (126,) or (21, 3))
+            timestamp: Capture time in seconds
+        """
+        x = np.asarray(keypoints, dtype=np.float32)
+        if self._value is None or self._value.shape != x.shape:
+            self._value = x.copy()
+            self._speed = np.zeros_like(x)
+            self._active = x != 0
+            self._out = x.copy()
+            self._last_time = timestamp
+            return self._out
+
+        dt = max(timestamp - self._last_time, 1e-3)
+        self._last_time = timestamp
+
+        active = x != 0
+        # Coordinates that (re)appeared start from the measurement
+        restart = active & ~self._active
+        self._active = active
+
+        speed = (x - self._value) / dt
+        a_d = self._alpha(self.d_cutoff, dt)
+        self._speed += a_d * (speed - self._speed)
+
+        cutoff = self.min_cutoff + self.beta * np.abs(self._speed)
+        alpha = self._alpha(cutoff, dt)
+        self._value += alpha * (x - self._value)
+
+        self._value[restart] = x[restart]
+        self._speed[~active | restart] = 0
+        np.multiply(self._value, active, out=self._out)
+        return self._out
+
+
+class KalmanFilter:
+    """Constant-velocity Kalman filter, one independent 2-state filter per element.
+
+    State is (position, velocity) per coordinate; the covariance terms are
+    kept as three arrays so a whole keypoint array is updated with a handful
+    of vectorized operations. Zero elements reset like OneEuroFilter.
+
+    Args:
+        process_noise: Acceleration noise; higher = follows motion faster
+        measurement_noise: Landmark jitter variance; higher = smoother
+    """
+
+    def __init__(self, process_noise=0.5, measurement_noise=1e-4):
+        self.process_noise = process_noise
+        self.measurement_noise = measurement_noise
+        self.reset()
+
+    def reset(self):
+        self._position = None
+        self._last_time = None
+
+    def _restart(self, x, mask):
+        self._position[mask] = x[mask]
+        self._velocity[mask] = 0
+        self._p00[mask] = self.measurement_noise
+        self._p01[mask] = 0
+        self._p11[mask] = 1.0
+
+    def filter(self, keypoints, timestamp):
+        """Return the filtered keypoints (a reused buffer with the input's shape)."""
+        x = np.asarray(keypoints, dtype=np.float32)
+        if self._position is None or self._position.shape != x.shape:
+            self._position = x.copy()
+            self._velocity = np.zeros_like(x)
+            self._p00 = np.zeros_like(x)
+            self._p01 = np.zeros_like(x)
+            self._p11 = np.zeros_like(x)
+            self._active = np.zeros(x.shape, dtype=bool)
+            self._out = np.zeros_like(x)
+            self._last_time = timestamp
+
+        dt = max(timestamp - self._last_time, 1e-3)
+        self._last_time = timestamp
+
+        active = x != 0
+        restart = active & ~self._active
+        self._active = active
+
+        # Predict
+        q = self.process_noise
+        self._position += self._velocity * dt
+        self._p00 += dt * (2 * self._p01 + dt * self._p11) + q * dt ** 3 / 3
+        self._p01 += dt * self._p11 + q * dt ** 2 / 2
+        self._p11 += q * dt
+
+        # Update with the measurement
+        innovation = x - self._position
+        s = self._p00 + self.measurement_noise
+        k0 = self._p00 / s
+        k1 = self._p01 / s
+        self._position += k0 * innovation
+        self._velocity += k1 * innovation
+        self._p11 -= k1 * self._p01
+        self._p01 *= 1 - k0
+        self._p00 *= 1 - k0
+
+        self._restart(x, restart | ~active)
+        np.multiply(self._position, active, out=self._out)
+        return self._out
+
+
+class PassThroughFilter:
+    """No filtering (keeps the call site uniform)."""
+
+    def reset(self):
+        pass
+
+    def filter(self, keypoints, timestamp):
+        return keypoints
+
+
+def create_keypoint_filter(name="none", **kwargs):
+    """Return a keypoint filter by name (one of KEYPOINT_FILTERS)."""
+    if name == "one_euro":
+        return OneEuroFilter(**kwargs)
+    if name == "kalman":
+        return KalmanFilter(**kwargs)
+    if name in (None, "", "none"):
+        return PassThroughFilter()
+    raise ValueError(f"Unknown keypoint filter {name!r} (expected one of {KEYPOINT_FILTERS})")
@@ -0,0 +1,256 @@
+import numpy as np
+
+# Handedness codes
+NO_HAND = 0
+RIGHT_HAND = 1
+LEFT_HAND = 2
+
+PREPROCESSING_MODES = ("raw", "centered", "centered_scaled")
+
+
+def mirror_mask(handedness, mirrored=True, mirror_secondary=True):
+    """Return which hands get mirrored into the canonical orientation, by handedness code.
+
+    Only the hand MediaPipe reports as left is mirrored. In a flipped frame
+    (`mirrored=True`, as in main.py) its handedness code is RIGHT_HAND, since
+    the recorded codes describe the signer's actual hands (see HandFeatureBuilder).
+
+    Args:
+        handedness: Handedness code, or an array of codes (e.g. a recorded column)
+        mirrored: The processed image was flipped horizontally
+        mirror_secondary: Mirror the secondary hand at all
+
+    Returns:
+        Bool (or bool array shaped like `handedness`)
+    """
+    handedness = np.asarray(handedness)
+    if not mirror_secondary:
+        return np.zeros(handedness.shape, dtype=bool)
+    return handedness == (RIGHT_HAND if mirrored else LEFT_HAND)
+
+
+def hand_slot(handedness, mirrored=True):
+    """Return the HandFeatureBuilder slot (0 = MediaPipe right, 1 = left) of a recorded hand."""
+    return 1 if handedness == (RIGHT_HAND if mirrored else LEFT_HAND) else 0
+
+
+def normalize_hand(raw_keypoints, mode="centered_scaled", mirror=False, out=None):
+    """Normalize raw (..., 21, 3) landmarks, optionally mirroring them.
+
+    The single implementation behind the live, offline and multi-camera
+    feature paths, so a hand is normalized the same way everywhere.
+
+    Args:
+        raw_keypoints: Raw MediaPipe landmarks, one hand (21, 3) or a batch (N, 21, 3)
+        mode: "raw" = MediaPipe coordinates as-is (normalized 0-1),
+              "centered" = relative to the wrist,
+              "centered_scaled" = relative to the wrist and divided by hand size
+        mirror: Mirror the hand (x negated, or 1 - x in "raw" mode); a bool
+                array of shape (N,) mirrors single rows of a batch
+        out: Optional float32 array shaped like `raw_keypoints` to write into
+
+    Returns:
+        Float32 array shaped like `raw_keypoints` (all-zero hands stay zeros
+        in the centered modes)
+    """
+    raw_keypoints = np.asarray(raw_keypoints, dtype=np.float32)
+    if out is None:
+        out = np.empty_like(raw_keypoints)
+    mirror = np.asarray(mirror, dtype=bool)
+    if mirror.ndim:
+        mirror = mirror[..., None]  # one flag per hand, broadcast over its landmarks
+    x = out[..., 0]
+
+    if mode in ("centered", "centered_scaled"):
+        # Center coordinates relative to wrist (landmark 0)
+        np.subtract(raw_keypoints, raw_keypoints[..., :1, :], out=out)
+        if mode == "centered_scaled":
+            # Normalize by maximum distance from wrist (hand size)
+            max_dist = np.sqrt(np.einsum("...ij,...ij->...i", out, out).max(axis=-1))[..., None, None]
+            np.divide(out, max_dist, out=out, where=max_dist > 0)
+        if mirror.any():
+            np.negative(x, out=x, where=mirror)
+    else:
+        # "raw" and unknown modes use MediaPipe coordinates as-is
+        out[...] = raw_keypoints
+        if mirror.any():
+            np.subtract(1.0, raw_keypoints[..., 0], out=x, where=mirror)
+    return out
+
+
+def normalize_keypoints(raw_keypoints, mode="centered_scaled", mirror=False):
+    """Turn raw (21, 3) landmarks into the 63 model features.
+
+    Args:
+        raw_keypoints: Raw MediaPipe landmarks, or None when no hand was found
+        mode: Preprocessing mode (see normalize_hand)
+        mirror: Mirror the hand into the canonical orientation (see mirror_mask)
+
+    Returns:
+        Float32 vector of 63 features (all zeros without a hand)
+    """
+    if raw_keypoints is None:
+        return np.zeros(21 * 3, dtype=np.float32)  # 63 features
+    return normalize_hand(raw_keypoints, mode, mirror).reshape(63)
+
+
+def normalize_keypoints_batch(raw_keypoints, mode="centered_scaled", handedness=None, mirrored=True,
+                              mirror_secondary=True):
+    """Normalize a whole (N, 21, 3) array the way the live path does.
+
+    Rows are mirrored by their recorded handedness (see mirror_mask), so
+    features match what HandFeatureBuilder produced for the same frames.
+    Rows that are all zeros (no hand) stay all zeros.
+
+    Args:
+        raw_keypoints: Raw landmarks (N, 21, 3)
+        mode: Preprocessing mode (see normalize_hand)
+        handedness: Handedness codes (N,); None leaves every row unmirrored
+        mirrored: The recorded frames were flipped horizontally
+        mirror_secondary: Mirror the secondary hand into the canonical orientation
+
+    Returns:
+        Float32 array of shape (N, 63)
+    """
+    raw_keypoints = np.asarray(raw_keypoints, dtype=np.float32)
+    mirror = False if handedness is None else mirror_mask(handedness, mirrored, mirror_secondary)
+    return normalize_hand(raw_keypoints, mode, mirror).reshape(len(raw_keypoints), 63)
+
+
+def normalize_hands_batch(raw_hands, mode="centered_scaled", mirror_secondary=True):
+    """Normalize recorded HandFeatureBuilder slots into two-hand features.
+
+    Slot 1 (MediaPipe's left hand) is the one the builder mirrors, so the
+    result matches HandFeatureBuilder.two_hand for the same frames.
+
+    Args:
+        raw_hands: Raw landmarks (N, 2, 21, 3) (e.g. a recorded "hands" column),
+            all zeros for a missing hand
+        mode: Preprocessing mode (see normalize_hand)
+        mirror_secondary: Mirror the secondary hand into the canonical orientation
+
+    Returns:
+        Float32 array of shape (N, 126) (missing hands are zeros)
+    """
+    raw_hands = np.asarray(raw_hands, dtype=np.float32)
+    mirror = np.broadcast_to(np.array([False, mirror_secondary]), raw_hands.shape[:2])
+    features = normalize_hand(raw_hands, mode, mirror)
+    features[~np.any(raw_hands, axis=(2, 3))] = 0
+    return features.reshape(len(raw_hands), 126)
+
+
+# Both hands present (handedness codes are bit flags)
+BOTH_HANDS = RIGHT_HAND | LEFT_HAND
+
+
+class HandFeatureBuilder:
+    """Build one- or two-hand feature vectors into preallocated buffers.
+
+    The two-hand layout is 126 floats: the hand MediaPipe reports as right
+    (the hand the single-hand models were trained on) followed by the other
+    hand. The other hand is mirrored (x negated, or 1 - x in "raw" mode) so
+    both halves share one canonical orientation, and a single-hand model can
+    classify a left hand as if it were a right one. Missing hands are zeros.
+
+    MediaPipe labels hands for an unmirrored image; with `mirrored=True` (the
+    frame is flipped before processing, as in main.py) the reported handedness
+    is swapped back so `handedness` describes the signer's actual hands.
+
+    Args:
+        mode: Preprocessing mode (see normalize_hand)
+        mirrored: The processed image was flipped horizontally
+        mirror_secondary: Mirror the secondary hand into the canonical orientation
+    """
+
+    def __init__(self, mode="centered_scaled", mirrored=True, mirror_secondary=True):
+        self.mode = mode
+        self.mirrored = mirrored
+        self.mirror_secondary = mirror_secondary
+
+        self.raw = np.zeros((2, 21, 3), dtype=np.float32)       # slot 0 = primary, 1 = secondary (0 = missing)
+        self._raw_flat = self.raw.reshape(2, 63)
+        self.present = np.zeros(2, dtype=bool)
+        self._features = np.zeros((2, 21, 3), dtype=np.float32)
+        self._single = np.zeros((21, 3), dtype=np.float32)
+        self.two_hand = self._features.reshape(126)              # views, never reallocated
+        self.one_hand = self._single.reshape(63)
+        self.handedness = NO_HAND
+
+    def _slot_handedness(self, slot):
+        # Slot 0 is MediaPipe's "right" hand; a mirrored image swaps the labels
+        if slot == 0:
+            return LEFT_HAND if self.mirrored else RIGHT_HAND
+        return RIGHT_HAND if self.mirrored else LEFT_HAND
+
+    def update(self, results):
+        """Read both hands from MediaPipe results and refresh all feature buffers.
+
+        Returns:
+            Handedness flags of the hands found (NO_HAND, RIGHT_HAND, LEFT_HAND or BOTH_HANDS)
+        """
+        for slot, hand in enumerate((results.right_hand_landmarks, results.left_hand_landmarks)):
+            self.present[slot] = hand is not None
+            if hand is None:
+                continue
+            # Copy the coordinates straight into the slot's buffer
+            flat = self._raw_flat[slot]
+            i = 0
+            for landmark in hand.landmark:
+                flat[i] = landmark.x
+                flat[i + 1] = landmark.y
+                flat[i + 2] = landmark.z
+                i += 3
+        return self._refresh()
+
+    def update_raw(self, hands):
+        """Refresh all feature buffers from raw landmarks (e.g. replayed recordings).
+
+        Args:
+            hands: (MediaPipe right hand, MediaPipe left hand), each (21, 3)
+                landmarks or None (see hand_slot for recorded hands)
+
+        Returns:
+            Handedness flags of the hands found
+        """
+        for slot, hand in enumerate(hands):
+            self.present[slot] = hand is not None
+            if hand is not None:
+                self.raw[slot] = hand
+        return self._refresh()
+
+    def _refresh(self):
+        # Normalize the present slots of self.raw; missing hands become zeros
+        self.handedness = NO_HAND
+        for slot in (0, 1):
+            if not self.present[slot]:
+                self.raw[slot] = 0
+                self._features[slot] = 0
+                continue
+            handedness = self._slot_handedness(slot)
+            mirror = mirror_mask(handedness, self.mirrored, self.mirror_secondary)
+            normalize_hand(self.raw[slot], self.mode, mirror, out=self._features[slot])
+            self.handedness |= handedness
+
+        # Single-hand view: primary hand, else the (mirrored) secondary hand
+        if self.present[0]:
+            self._single[:] = self._features[0]
+        elif self.present[1]:
+            self._single[:] = self._features[1]
+        else:
+            self._single[:] = 0
+        return self.handedness
+
+    def primary(self):
+        """Return (raw (21, 3) landmarks or None, handedness) of the hand in the single-hand view."""
+        for slot in (0, 1):
+            if self.present[slot]:
+                return self.raw[slot], self._slot_handedness(slot)
+        return None, NO_HAND
+
+    def features(self, width):
+        """Return the preallocated feature view for a model taking `width` inputs (63 or 126)."""
+        if width == 126:
+            return self.two_hand
+        if width == 63:
+            return self.one_hand
+        raise ValueError(f"Unsupported feature width {width} (expected 63 or 126)")
@@ -0,0 +1,34 @@
+# Map class indices to labels (custom mappings)
+# Shared by main.py and multicam.py
+CLASS_LABELS = {
+    # Custom word mappings
+    0: "Reset",      # A
+    1: "Hello",      # B
+    4: "You",        # E
+    6: "Class",      # G
+    7: "In",         # H
+    8: "Good",       # I
+    9: "How",        # J
+    11: "No",        # L
+    14: "Yes",       # O
+    17: "Love",      # R
+    18: "EOS",       # S
+    20: "Thank You", # U
+    23: "Me",        # X
+    24: "Goodbye",   # Y
+    # Unmapped classes will show as "Class_X"
+}
+
+# Label spaces for the classifier (ASL_LABEL_SPACE):
+#   "mapped" = prune the model to the classes in CLASS_LABELS
+#   "full"   = keep every model output (unmapped classes show as "Class_X")
+LABEL_SPACES = ("mapped", "full")
+
+
+def active_classes(label_space, class_labels=CLASS_LABELS):
+    """Return the sorted class indices a label space keeps (None = all of them)."""
+    if label_space not in LABEL_SPACES:
+        raise ValueError(f"Unknown label space '{label_space}' (expected one of {', '.join(LABEL_SPACES)})")
+    if label_space == "full":
+        return None
+    return sorted(class_labels)
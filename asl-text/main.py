@@ -1,27 +1,50 @@
 import cv2
 import mediapipe as mp
 import numpy as np
-import tensorflow as tf
-import pyvirtualcam
 import sys
 import os
 import threading
+import time
+from functools import partial
+
+from capture import CaptureConfig, open_capture
+from frame_share import FrameShareWriter
+from frame_pipeline import MIN_DETECTION_CONFIDENCE, MIN_TRACKING_CONFIDENCE, FramePipeline
+import metrics
+from labels import CLASS_LABELS, active_classes
+from model_backends import load_classifier
+from model_manager import ModelManager
+from profiler import SamplingProfiler
+from sentence_assembler import DUPLICATE, EMPTY, RESET, SENTENCE, TOKEN, UNKNOWN
+from recorder import LandmarkRecorder
+from render import PreviewRenderer
+from virtual_camera import VirtualCameraOutput
 
 # 1. Initialize MediaPipe Holistic and OpenCV VideoCapture
 mp_holistic = mp.solutions.holistic
-mp_draw = mp.solutions.drawing_utils
 
-holistic = mp_holistic.Holistic(
-    min_detection_confidence=0.6,
-    min_tracking_confidence=0.6,
-)
 
-cap = cv2.VideoCapture(0)
+def create_holistic(model_complexity=1):
+    return mp_holistic.Holistic(
+        model_complexity=model_complexity,
+        min_detection_confidence=MIN_DETECTION_CONFIDENCE,
+        min_tracking_confidence=MIN_TRACKING_CONFIDENCE,
+    )
+
+
+holistic = create_holistic()
+
+# Capture settings come from ASL_CAPTURE_* (SOURCE, WIDTH, HEIGHT, FPS, FOURCC,
+# BACKEND, BUFFER); SOURCE may also be a video file or "synthetic" for testing
+cap = open_capture(CaptureConfig.from_env())
 
 # Get video properties for virtual camera
-width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-fps = int(cap.get(cv2.CAP_PROP_FPS) or 30)
+width = cap.width
+height = cap.height
+fps = cap.fps
+
+# Adaptive quality: downscale / simplify / skip landmark passes to hold this frame rate
+TARGET_FPS = int(os.getenv("ASL_TARGET_FPS", "0")) or fps
 
 # Check command-line argument for showing camera (default state)
 SHOW_CAMERA = "--show-camera" in sys.argv or os.getenv("SHOW_CAMERA", "0") == "1"
@@ -30,50 +53,58 @@ camera_lock = threading.Lock()
 # Track previous state to detect transitions
 prev_show_camera = SHOW_CAMERA
 
+# Preview rendering: only when the window is shown, downscaled and rate-capped
+PREVIEW_SCALE = float(os.getenv("ASL_PREVIEW_SCALE", "0.5"))
+PREVIEW_MAX_FPS = int(os.getenv("ASL_PREVIEW_FPS", "15"))
+preview_renderer = PreviewRenderer(scale=PREVIEW_SCALE, max_fps=PREVIEW_MAX_FPS)
+# Hand the preview to the UI through shared memory instead of a cv2 window
+# (the segment name is announced on stdout as "preview_shm:<name> <width>x<height>")
+PREVIEW_SHM = "--preview-shm" in sys.argv or os.getenv("ASL_PREVIEW_SHM", "0") == "1"
+preview_share = None
+
+# Virtual camera output runs on its own thread; "null" disables the device (headless)
+VCAM_BACKEND = os.getenv("ASL_VCAM_BACKEND", "pyvirtualcam")
+# Publish the annotated frame (landmarks + overlays) instead of the raw camera frame
+VCAM_ANNOTATED = "--vcam-annotated" in sys.argv or os.getenv("ASL_VCAM_ANNOTATED", "0") == "1"
+vcam_renderer = PreviewRenderer(scale=1.0, max_fps=fps)
+
 # 2. Load your trained 1D CNN model
-model = tf.keras.models.load_model("best_cnn_asl_model.keras")
-
-# Map class indices to labels (custom mappings)
-CLASS_LABELS = {
-    # Custom word mappings
-    0: "Reset",      # A
-    1: "Hello",      # B
-    4: "You",        # E
-    6: "Class",      # G
-    7: "In",         # H
-    8: "Good",       # I
-    9: "How",        # J
-    11: "No",        # L
-    14: "Yes",       # O
-    17: "Love",      # R
-    18: "EOS",       # S
-    20: "Thank You", # U
-    23: "Me",        # X
-    24: "Goodbye",   # Y
-    # Unmapped classes will show as "Class_X"
-}
+# ASL_MODEL may point to a .keras model, an exported .tflite/.onnx artifact or an
+# export manifest.json (see export_model.py); only .keras pulls in TensorFlow.
+# By default the NumPy engine runs the extracted weights (see numpy_cnn.py).
+MODEL_PATH = os.getenv("ASL_MODEL") or (
+    "best_cnn_asl_model.npz" if os.path.exists("best_cnn_asl_model.npz") else "best_cnn_asl_model.keras"
+)
+# Label space (ASL_LABEL_SPACE): "mapped" prunes the final layer to the classes
+# in CLASS_LABELS, so smoothing and argmax never see a class without a token;
+# "full" keeps every model output.
+LABEL_SPACE = os.getenv("ASL_LABEL_SPACE", "mapped")
+# The manager hot-swaps models (or an ensemble) requested over stdin without
+# stopping the loop, e.g. "model good_cnn.npz" or "ensemble a.keras,b.keras".
+# Every model it loads is pruned to the same label space. Swaps need the same
+# input and classes: the good*.keras LSTMs ((86|87, 258) input, 2 classes)
+# cannot replace or be ensembled with the 63-feature CNN.
+model = ModelManager(MODEL_PATH, loader=partial(load_classifier, classes=active_classes(LABEL_SPACE)))
+print(f"Loaded {model.active.backend} model {model.active.path} in {model.active.load_ms:.0f} ms")
+
+# Class index -> label mapping (CLASS_LABELS) lives in labels.py.
+# Output column i of the (possibly pruned) model is class ACTIVE_CLASSES[i].
+FULL_NUM_CLASSES = getattr(model.active, "full_num_classes", model.num_classes)
+ACTIVE_CLASSES = model.classes
+if LABEL_SPACE != "full":
+    print(f"Label space: {model.num_classes} of {FULL_NUM_CLASSES} classes")
 
 # 3. No sequence buffer needed - this is a single-frame 1D CNN model
 
-# Preprocessing options - try different combinations if model doesn't work well
-# ASL Alphabet models often use raw MediaPipe coordinates (normalized 0-1) without centering
-PREPROCESSING_MODE = "centered_scaled"  # Options: "raw", "centered", "centered_scaled"
-# "raw" = Use MediaPipe coordinates as-is (normalized 0-1)
-# "centered" = Center relative to wrist (current)
-# "centered_scaled" = Center and normalize by hand size
-
-# 4. Inference and smoothing parameters
-PREDICTION_STRIDE = 1        # run model every frame for faster response (~30 Hz at 30 fps)
-SMOOTHING_WINDOW = 5         # smaller window for quicker updates (reduced from 10)
-CONFIDENCE_THRESHOLD = 0.6   # minimum probability to show a gesture
-
-predictions_buffer = []      # last SMOOTHING_WINDOW prob vectors
-stable_label = None          # label we display
-frame_index = 0              # frame counter
+# 4. Per-frame recognition: features, keypoint filter, motion-gated inference,
+# smoothing, sentence assembly and live config all live in frame_pipeline.py
+# (shared with soak.py). 63-input models get the primary hand (or the mirrored
+# other hand), 126-input models get both hands.
+MIRROR_SECONDARY_HAND = os.getenv("ASL_MIRROR_SECONDARY", "1") == "1"
 
-# 5. Sentence buffer and state for edge detection
-sentence_buffer = []         # list of tokens (you decide what the token means)
-last_stable_label = None     # previous stable label
+# Keypoint filtering (ASL_KEYPOINT_FILTER=one_euro|kalman) removes landmark jitter
+# before classification, so fewer probability vectors need to be averaged
+KEYPOINT_FILTER = os.getenv("ASL_KEYPOINT_FILTER", "none")
 
 
 def handle_sentence(tokens):
@@ -84,6 +115,48 @@ def handle_sentence(tokens):
     print("sentence:" + " ".join(tokens))
 
 
+def report_sentence_event(event):
+    """Log what the sentence assembler did with a label."""
+    if event is None:
+        return
+    kind, payload = event
+    if kind == UNKNOWN:
+        print(f"Skipped unknown class: {payload}")
+    elif kind == RESET:
+        print(f"Buffer cleared (reset detected): {payload}")
+        print("partial:", flush=True)
+    elif kind == SENTENCE:
+        sentences_total.inc()
+        print("Buffer sent to stdout and cleared (EOS detected)")
+    elif kind == EMPTY:
+        print(f"{payload} detected (buffer already empty)")
+    elif kind == TOKEN:
+        tokens_total.inc()
+        print(f"Buffer updated: {pipeline.assembler.tokens}")
+        # Live caption lines for the UI (see ui/caption_server.py)
+        print(f"token:{payload}")
+        print("partial:" + " ".join(str(t) for t in pipeline.assembler.tokens), flush=True)
+    elif kind == DUPLICATE:
+        print(f"Skipped duplicate: {payload} (already in buffer)")
+
+
+pipeline = FramePipeline(
+    model,
+    target_fps=TARGET_FPS,
+    mirror_secondary=MIRROR_SECONDARY_HAND,
+    keypoint_filter=KEYPOINT_FILTER,
+    config_path=os.getenv("ASL_CONFIG_FILE"),
+    on_sentence=handle_sentence,
+    on_event=report_sentence_event,
+)
+quality_controller = pipeline.quality
+last_results = None          # MediaPipe results reused on skipped landmark passes
+
+
+# On-demand sampling profiler, started over stdin (no cost while idle)
+profiler = SamplingProfiler(directory=os.getenv("ASL_PROFILE_DIR", "profiles"))
+
+
 def read_stdin_commands():
     """Read commands from stdin in a separate thread."""
     global SHOW_CAMERA
@@ -96,13 +169,26 @@ def read_stdin_commands():
                 # EOF reached
                 break
             
-            line = line.strip().lower()
+            command, _, argument = line.strip().partition(" ")
+            line = command.lower()
+            argument = argument.strip()
             if line == "show_camera":
                 with camera_lock:
                     SHOW_CAMERA = True
             elif line == "hide_camera":
                 with camera_lock:
                     SHOW_CAMERA = False
+            elif pipeline.handle_command(line, argument):
+                # model / ensemble / preload_model / model_stats / set / config
+                pass
+            elif line == "profile":
+                # "profile 10" samples all threads for 10 s; "profile stop" ends early
+                if argument == "stop":
+                    profiler.stop()
+                elif profiler.start(float(argument or 10), lambda path: print(f"profile:{path}", flush=True)):
+                    print(f"Profiling for {float(argument or 10):.0f} s")
+                else:
+                    print("Profile already running")
         except (EOFError, KeyboardInterrupt):
             break
         except Exception as e:
@@ -110,52 +196,55 @@ def read_stdin_commands():
             pass
 
 
-
-# 6. Preprocessing function - must match training
-# Model expects 63 features (21 hand landmarks * 3 coordinates)
-def extract_keypoints(results):
-    # Extract hand keypoints (prefer right hand, fallback to left hand)
-    hand_keypoints = np.zeros(21 * 3, dtype=np.float32)  # 63 features
-    hand_landmarks = None
-    
-    # Try right hand first
-    if results.right_hand_landmarks:
-        hand_landmarks = results.right_hand_landmarks
-    # Fallback to left hand if right hand not detected
-    elif results.left_hand_landmarks:
-        hand_landmarks = results.left_hand_landmarks
-    
-    if hand_landmarks:
-        # Extract raw coordinates from MediaPipe (already normalized 0-1)
-        raw_keypoints = np.array(
-            [[lm.x, lm.y, lm.z]
-             for lm in hand_landmarks.landmark],
-            dtype=np.float32,
-        )
-        
-        if PREPROCESSING_MODE == "raw":
-            # Use raw MediaPipe coordinates (normalized 0-1) - most common for ASL models
-            hand_keypoints = raw_keypoints.flatten()
-        elif PREPROCESSING_MODE == "centered":
-            # Center coordinates relative to wrist (landmark 0)
-            wrist = raw_keypoints[0]  # Wrist is landmark 0
-            centered = raw_keypoints - wrist
-            hand_keypoints = centered.flatten()
-        elif PREPROCESSING_MODE == "centered_scaled":
-            # Center and normalize by hand size
-            wrist = raw_keypoints[0]  # Wrist is landmark 0
-            centered = raw_keypoints - wrist
-            # Normalize by maximum distance from wrist (hand size)
-            distances = np.linalg.norm(centered, axis=1)
-            max_dist = np.max(distances)
-            if max_dist > 0:
-                centered = centered / max_dist
-            hand_keypoints = centered.flatten()
-        else:
-            # Default to raw
-            hand_keypoints = raw_keypoints.flatten()
-    
-    return hand_keypoints  # Returns 63 features (format depends on PREPROCESSING_MODE)
+def build_overlay_text(stable_label):
+    """Return (label_text, label_color, stats_text, buffer_text) for the overlays."""
+    # Display the current stable label or "no gesture"
+    if stable_label is None:
+        label_str = "No hand / Low confidence"
+        color = (0, 0, 255)  # Red
+        conf_str = ""
+    else:
+        label_str = CLASS_LABELS.get(stable_label, f"Class_{stable_label}")
+        color = (0, 255, 0)  # Green
+        confidence = pipeline.confidence(stable_label)
+        conf_str = f" ({confidence:.2f})" if confidence is not None else ""
+
+    label_text = f"Prediction: {label_str}{conf_str}"
+    stats_text = (
+        f"{quality_controller.describe()}"
+        f"  Infer skip: {pipeline.scheduler.skip_ratio:.0%}"
+        f"  stride: {pipeline.scheduler.stride}"
+        f"  vcam drop: {cam.dropped}"
+    )
+    buffer_text = "Buffer: " + " ".join(str(t) for t in pipeline.assembler.tokens)
+    return label_text, color, stats_text, buffer_text
+
+
+# Pipeline metrics (ASL_METRICS_PORT serves Prometheus text, ASL_METRICS_FILE writes JSON snapshots)
+metrics.serve_from_env("ASL_")
+frames_total = metrics.counter("asl_frames_total", "Frames read from the camera")
+frame_ms = metrics.histogram("asl_frame_ms", "Processing time per frame")
+landmark_ms = metrics.histogram("asl_landmark_ms", "MediaPipe Holistic time per landmark pass")
+fps_gauge = metrics.gauge("asl_fps", "Smoothed processing frame rate")
+stale_dropped_gauge = metrics.gauge("asl_capture_stale_dropped", "Stale camera frames discarded")
+vcam_dropped_gauge = metrics.gauge("asl_vcam_dropped", "Frames the virtual camera thread skipped")
+tokens_total = metrics.counter("asl_tokens_total", "Tokens added to the sentence")
+sentences_total = metrics.counter("asl_sentences_total", "Sentences sent")
+
+# Optional session recording for retraining / replay (ASL_RECORD_DIR=<directory>)
+RECORD_DIR = os.getenv("ASL_RECORD_DIR")
+RECORD_COMPRESS = os.getenv("ASL_RECORD_COMPRESS", "0") == "1"
+RECORD_MAX_CHUNKS = int(os.getenv("ASL_RECORD_MAX_CHUNKS", "0")) or None
+recorder = None
+if RECORD_DIR:
+    recorder = LandmarkRecorder(
+        RECORD_DIR,
+        FULL_NUM_CLASSES,
+        class_labels=CLASS_LABELS,
+        compress=RECORD_COMPRESS,
+        max_chunks=RECORD_MAX_CHUNKS,
+    ).start()
+    print(f"Recording landmarks to {recorder.directory}")
 
 
 # 7. Start stdin reader thread
@@ -164,163 +253,94 @@ stdin_thread.start()
 
 # 8. Live loop
 try:
-    with pyvirtualcam.Camera(width=width, height=height, fps=fps) as cam:
+    with VirtualCameraOutput(width, height, fps, backend=VCAM_BACKEND) as cam:
         print("Virtual camera:", cam.device)
         print("Press Ctrl+C to exit")
+        # Tells the UI the model and camera are up (its readiness indicator)
+        print("status:ready", flush=True)
         
         # Use local variable to track previous state in loop
         local_prev_show_camera = prev_show_camera
         
         while cap.isOpened():
-            ret, frame = cap.read()
+            ret, frame, capture_time = cap.read()
             if not ret:
                 break
-            # Convert BGR to RGB for virtual camera and send it
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            cam.send(frame_rgb)
-            cam.sleep_until_next_frame()
+            frame_start = time.perf_counter()
+
+            # Runtime configuration changes take effect here, between frames
+            config_changes = pipeline.apply_config()
+            if config_changes:
+                print(f"Config changed: {config_changes}")
+                if "min_detection_confidence" in config_changes or "min_tracking_confidence" in config_changes:
+                    MIN_DETECTION_CONFIDENCE = pipeline.config.values["min_detection_confidence"]
+                    MIN_TRACKING_CONFIDENCE = pipeline.config.values["min_tracking_confidence"]
+                    holistic.close()
+                    holistic = create_holistic(quality_controller.model_complexity)
+            # Hand the raw BGR frame to the virtual camera thread (returns immediately)
+            if not VCAM_ANNOTATED:
+                cam.publish(frame)
 
             frame = cv2.flip(frame, 1)
 
-            image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            image.flags.writeable = False
-            results = holistic.process(image)
-            image.flags.writeable = True
-            frame = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
-
-            # Draw landmarks (optional)
-            if results.pose_landmarks:
-                mp_draw.draw_landmarks(
-                    frame,
-                    results.pose_landmarks,
-                    mp_holistic.POSE_CONNECTIONS,
-                )
-            if results.left_hand_landmarks:
-                mp_draw.draw_landmarks(
-                    frame,
-                    results.left_hand_landmarks,
-                    mp_holistic.HAND_CONNECTIONS,
-                )
-            if results.right_hand_landmarks:
-                mp_draw.draw_landmarks(
-                    frame,
-                    results.right_hand_landmarks,
-                    mp_holistic.HAND_CONNECTIONS,
-                )
-
-            # Extract keypoints (63 features for one hand)
-            keypoints = extract_keypoints(results)
-            
-            # Check if we have hand keypoints
-            hand_detected = np.any(keypoints != 0)
-
-            frame_index += 1
-
-            # Initialize stable_label for this frame (use last value if no new prediction)
-            stable_label = last_stable_label
-            
-            # Run prediction based on stride and if hand is detected
-            if hand_detected and frame_index % PREDICTION_STRIDE == 0:
-                # Reshape to (1, 63, 1) for 1D CNN model
-                model_input = keypoints.reshape(1, 63, 1).astype(np.float32)
-
-                raw_probs = model.predict(model_input, verbose=0)[0]  # (num_classes,)
-
-                # Update buffer of recent probability vectors
-                predictions_buffer.append(raw_probs)
-                if len(predictions_buffer) > SMOOTHING_WINDOW:
-                    predictions_buffer.pop(0)
-
-                # Compute smoothed probabilities
-                smoothed_probs = np.mean(predictions_buffer, axis=0)
-                best_class = int(np.argmax(smoothed_probs))
-                best_conf = float(smoothed_probs[best_class])
-
-                # Either show a gesture or "no gesture" based on confidence
-                if best_conf >= CONFIDENCE_THRESHOLD:
-                    stable_label = best_class
-                else:
-                    stable_label = None
-
-                # 8. Sentence logic: edge detection on stable_label
-                if stable_label != last_stable_label:
-                    # Rising edge: add a letter/token to buffer (only if not already in buffer)
-                    if stable_label is not None:
-                        # Check if class is in CLASS_LABELS - skip if unknown
-                        if stable_label not in CLASS_LABELS:
-                            print(f"Skipped unknown class: {stable_label}")
-                        else:
-                            letter = CLASS_LABELS[stable_label]
-                            
-                            # Special handling for "Reset" - clear the buffer
-                            if letter == "Reset":
-                                if sentence_buffer:
-                                    print(f"Buffer cleared (reset detected): {sentence_buffer}")
-                                    sentence_buffer.clear()
-                                else:
-                                    print("Reset detected (buffer already empty)")
-                            # Special handling for "EOS" - send buffer to stdout and clear
-                            elif letter == "EOS":
-                                if sentence_buffer:
-                                    handle_sentence(sentence_buffer)
-                                    sentence_buffer.clear()
-                                    print("Buffer sent to stdout and cleared (EOS detected)")
-                                else:
-                                    print("EOS detected (buffer already empty)")
-                            else:
-                                # Only append if word doesn't already exist in buffer
-                                if letter not in sentence_buffer:
-                                    sentence_buffer.append(letter)
-                                    print(f"Buffer updated: {sentence_buffer}")
-                                else:
-                                    print(f"Skipped duplicate: {letter} (already in buffer)")
-                    
-                    # Update last_stable_label after handling edges
-                    last_stable_label = stable_label
-
-            # Display the current stable label or "no gesture"
-            if stable_label is None:
-                label_str = "No hand / Low confidence"
-                color = (0, 0, 255)  # Red
-                conf_str = ""
+            if pipeline.landmarks_due():
+                image = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+                # Landmarks are normalized, so a downscaled input needs no remapping
+                if quality_controller.scale < 1.0:
+                    image = cv2.resize(
+                        image,
+                        None,
+                        fx=quality_controller.scale,
+                        fy=quality_controller.scale,
+                        interpolation=cv2.INTER_AREA,
+                    )
+                image.flags.writeable = False
+                with landmark_ms.time():
+                    results = holistic.process(image)
+
+                # Features, inference, smoothing and sentence logic (see frame_pipeline.py)
+                stable_label = pipeline.process(capture_time, results)
+                last_results = results
             else:
-                label_str = CLASS_LABELS.get(stable_label, f"Class_{stable_label}")
-                color = (0, 255, 0)  # Green
-                if len(predictions_buffer) > 0:
-                    smoothed_probs = np.mean(predictions_buffer, axis=0)
-                    conf_str = f" ({smoothed_probs[stable_label]:.2f})"
-                else:
-                    conf_str = ""
-
-            label_text = f"Prediction: {label_str}{conf_str}"
-            cv2.putText(
-                frame,
-                label_text,
-                (10, 30),
-                cv2.FONT_HERSHEY_SIMPLEX,
-                1,
-                color,
-                2,
-            )
-
-            # Show the buffer contents
-            buffer_text = "Buffer: " + " ".join(str(t) for t in sentence_buffer)
-            cv2.putText(
-                frame,
-                buffer_text,
-                (10, 110),
-                cv2.FONT_HERSHEY_SIMPLEX,
-                0.7,
-                (0, 255, 255),
-                2,
-            )
+                # Skipped landmark pass - reuse the last results; the pipeline extrapolates keypoints
+                results = last_results
+                stable_label = pipeline.process(capture_time)
+            raw_probs = pipeline.raw_probs
+
+            # Record frames that had a real landmark pass (written by a background thread)
+            if recorder is not None and pipeline.landmarks_fresh:
+                raw_landmarks, handedness = pipeline.builder.primary()
+                if raw_landmarks is not None:
+                    raw_landmarks = raw_landmarks.copy()  # the builder reuses its buffers
+                if raw_probs is not None and model.num_classes != FULL_NUM_CLASSES:
+                    # Recordings keep the full class layout (pruned classes are 0)
+                    full_probs = np.zeros(FULL_NUM_CLASSES, dtype=np.float32)
+                    full_probs[ACTIVE_CLASSES] = raw_probs
+                    raw_probs = full_probs
+                # Both hand slots too, so two-hand models can be evaluated on the session
+                hands = pipeline.builder.raw.copy()
+                recorder.record(capture_time, raw_landmarks, handedness, raw_probs, stable_label, hands)
+
+            # Feed the processing time back into the quality controller
+            frame_time = time.perf_counter() - frame_start
+            frames_total.inc()
+            frame_ms.observe(frame_time * 1000)
+            previous_complexity = quality_controller.model_complexity
+            if pipeline.update_quality(frame_time):
+                print(f"Quality changed: {quality_controller.describe()}")
+                if quality_controller.model_complexity != previous_complexity:
+                    holistic.close()
+                    holistic = create_holistic(quality_controller.model_complexity)
+            fps_gauge.set(quality_controller.fps)
+            stale_dropped_gauge.set(cap.stale_dropped)
+            vcam_dropped_gauge.set(cam.dropped)
 
             # Display the frame in a window (if enabled) - check with lock
             with camera_lock:
                 show_camera = SHOW_CAMERA
             
             # Check if state changed (camera was just turned off)
-            if local_prev_show_camera and not show_camera:
+            if local_prev_show_camera and not show_camera and not PREVIEW_SHM:
                 # Camera was just turned off - close the window once
                 try:
                     cv2.destroyWindow("ASL Gesture Recognition")
@@ -328,14 +348,34 @@ try:
                     pass
             local_prev_show_camera = show_camera
             
-            if show_camera:
-                cv2.imshow("ASL Gesture Recognition", frame)
-                # Check for 'q' key to exit (only if camera window is shown)
-                if cv2.waitKey(1) & 0xFF == ord("q"):
-                    break
+            # Nothing below runs while the window is hidden and the virtual camera
+            # gets raw frames (the default under the UI)
+            render_preview = show_camera and preview_renderer.due()
+            render_vcam = VCAM_ANNOTATED and vcam_renderer.due()
+            if render_preview or render_vcam:
+                overlay = build_overlay_text(stable_label)
+                if render_vcam:
+                    cam.publish(vcam_renderer.render(frame, results, *overlay))
+                if render_preview:
+                    preview = preview_renderer.render(frame, results, *overlay)
+                    if PREVIEW_SHM:
+                        if preview_share is None:
+                            preview_share = FrameShareWriter(preview.shape[1], preview.shape[0])
+                            print(f"preview_shm:{preview_share.name} {preview_share.width}x{preview_share.height}",
+                                  flush=True)
+                        preview_share.publish(preview)
+                    else:
+                        cv2.imshow("ASL Gesture Recognition", preview)
+                        # Check for 'q' key to exit (only if camera window is shown)
+                        if cv2.waitKey(1) & 0xFF == ord("q"):
+                            break
 
 except KeyboardInterrupt:
     print("\nExiting...")
 finally:
     cap.release()
+    if recorder is not None:
+        recorder.close()
+    if preview_share is not None:
+        preview_share.close()
     cv2.destroyAllWindows()
@@ -0,0 +1,325 @@
+import bisect
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Default histogram buckets for latencies in milliseconds
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000)
+
+
+class _Shards:
+    """Per-thread accumulators, so hot-path updates never take a lock.
+
+    Each thread writes only its own shard; readers sum over all of them. The
+    lock is taken once per thread (to register its shard) and by readers.
+    Shards of finished threads are kept, since their counts still belong to
+    the totals.
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._local = threading.local()
+        self._shards = []
+        self._lock = threading.Lock()
+
+    def mine(self):
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._factory()
+            with self._lock:
+                self._shards.append(shard)
+            self._local.shard = shard
+            return shard
+
+    def all(self):
+        with self._lock:
+            return list(self._shards)
+
+
+class Counter:
+    """Monotonically increasing value.
+
+    Several threads increment the same counter (e.g. llm_errors_total from
+    the rewrite workers and stream threads); each adds to its own shard and
+    `value` sums them.
+    """
+
+    kind = "counter"
+
+    def __init__(self, name, help_text=""):
+        self.name = name
+        self.help = help_text
+        self._shards = _Shards(lambda: [0])
+
+    def inc(self, amount=1):
+        self._shards.mine()[0] += amount
+
+    @property
+    def value(self):
+        return sum(shard[0] for shard in self._shards.all())
+
+    def snapshot(self):
+        return self.value
+
+
+class Gauge:
+    """Value that can go up and down (queue depth, fps, ...).
+
+    `set` is a plain store; the rarely used inc/dec take a lock so concurrent
+    adjustments are not lost.
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name, help_text=""):
+        self.name = name
+        self.help = help_text
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def set(self, value):
+        self.value = value
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount=1):
+        with self._lock:
+            self.value -= amount
+
+    def snapshot(self):
+        return self.value
+
+
+class _HistogramShard:
+    __slots__ = ("counts", "sum")
+
+    def __init__(self, size):
+        self.counts = [0] * size
+        self.sum = 0.0
+
+
+class Histogram:
+    """Fixed-bucket histogram; observe() is a bisect and two increments on the thread's shard.
+
+    The LLM histograms are fed by two rewrite workers, so each thread keeps
+    its own bucket counts and sum (see _Shards); `state()` merges them.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name, help_text="", buckets=LATENCY_BUCKETS_MS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(sorted(buckets))
+        size = len(self.buckets) + 1   # last bucket is +Inf
+        self._shards = _Shards(lambda: _HistogramShard(size))
+
+    def observe(self, value):
+        shard = self._shards.mine()
+        shard.counts[bisect.bisect_left(self.buckets, value)] += 1
+        shard.sum += value
+
+    def state(self):
+        """Return (bucket counts, sum, count) merged over all threads.
+
+        The count is the sum of the buckets, so it always matches them; the
+        sum may trail by an observation that is still being recorded.
+        """
+        counts = [0] * (len(self.buckets) + 1)
+        total_sum = 0.0
+        for shard in self._shards.all():
+            for i, count in enumerate(shard.counts):
+                counts[i] += count
+            total_sum += shard.sum
+        return counts, total_sum, sum(counts)
+
+    def time(self):
+        """Context manager observing the elapsed milliseconds of a block."""
+        return _Timer(self)
+
+    def quantile(self, q, state=None):
+        """Estimate a quantile from the buckets (upper bound of the bucket it falls in)."""
+        counts, _, total = state or self.state()
+        if total == 0:
+            return None
+        rank = q * total
+        seen = 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+    def snapshot(self):
+        state = counts, total_sum, total = self.state()
+        return {
+            "count": total,
+            "sum": round(total_sum, 3),
+            "mean": round(total_sum / total, 3) if total else None,
+            "p50": self.quantile(0.5, state),
+            "p95": self.quantile(0.95, state),
+            "p99": self.quantile(0.99, state),
+        }
+
+
+class _Timer:
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe((time.perf_counter() - self.start) * 1000)
+        return False
+
+
+class MetricsRegistry:
+    """Named metrics of one process, rendered as Prometheus text or JSON."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()   # taken when a metric is created and to list them
+
+    def _get(self, cls, name, help_text, **kwargs):
+        metric = self._metrics.get(name)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.get(name)
+                if metric is None:
+                    metric = cls(name, help_text, **kwargs)
+                    self._metrics[name] = metric
+        if not isinstance(metric, cls):
+            raise ValueError(f"Metric {name} already registered as a {metric.kind}")
+        return metric
+
+    def counter(self, name, help_text=""):
+        return self._get(Counter, name, help_text)
+
+    def gauge(self, name, help_text=""):
+        return self._get(Gauge, name, help_text)
+
+    def histogram(self, name, help_text="", buckets=LATENCY_BUCKETS_MS):
+        return self._get(Histogram, name, help_text, buckets=buckets)
+
+    def _items(self):
+        # Copy under the lock: a metric created meanwhile would break the iteration
+        with self._lock:
+            return sorted(self._metrics.items())
+
+    def snapshot(self):
+        """Return {name: value} with histograms summarized."""
+        return {name: metric.snapshot() for name, metric in self._items()}
+
+    def render_prometheus(self):
+        """Render all metrics in the Prometheus text exposition format."""
+        lines = []
+        for name, metric in self._items():
+            if metric.help:
+                lines.append(f"# HELP {name} {metric.help}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            if metric.kind == "histogram":
+                counts, total_sum, total = metric.state()
+                cumulative = 0
+                for bound, count in zip(metric.buckets, counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{le="{bound}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{le="+Inf"}} {total}')
+                lines.append(f"{name}_sum {total_sum}")
+                lines.append(f"{name}_count {total}")
+            else:
+                lines.append(f"{name} {metric.value}")
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide registry used by every module
+registry = MetricsRegistry()
+
+
+def counter(name, help_text=""):
+    return registry.counter(name, help_text)
+
+
+def gauge(name, help_text=""):
+    return registry.gauge(name, help_text)
+
+
+def histogram(name, help_text="", buckets=LATENCY_BUCKETS_MS):
+    return registry.histogram(name, help_text, buckets)
+
+
+def start_http_server(port, host="127.0.0.1", metrics_registry=None):
+    """Serve /metrics (Prometheus text) and /metrics.json on a background thread."""
+    metrics_registry = metrics_registry or registry
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.startswith("/metrics.json"):
+                body = json.dumps(metrics_registry.snapshot()).encode("utf-8")
+                content_type = "application/json"
+            elif self.path.startswith("/metrics"):
+                body = metrics_registry.render_prometheus().encode("utf-8")
+                content_type = "text/plain; version=0.0.4"
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # keep scrapes out of stdout (the UI parses it)
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+def start_snapshot_writer(path, interval=5.0, metrics_registry=None):
+    """Write a JSON snapshot to `path` every `interval` seconds (atomic replace)."""
+    metrics_registry = metrics_registry or registry
+
+    def run():
+        while True:
+            time.sleep(interval)
+            temp_path = path + ".tmp"
+            try:
+                with open(temp_path, "w", encoding="utf-8") as f:
+                    json.dump({"time": time.time(), "metrics": metrics_registry.snapshot()}, f)
+                os.replace(temp_path, path)
+            except Exception as e:
+                # Keep writing: a full disk or locked file must not end the snapshots for good
+                print(f"Metrics snapshot to {path} failed: {e}")
+
+    thread = threading.Thread(target=run, name="metrics-snapshot", daemon=True)
+    thread.start()
+    return thread
+
+
+def rss_mb():
+    """Resident set size of the calling process in MB (None if unknown)."""
+    try:
+        with open("/proc/self/statm", "r", encoding="ascii") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def serve_from_env(prefix):
+    """Start the endpoint and/or snapshot writer from <prefix>METRICS_PORT / <prefix>METRICS_FILE."""
+    port = os.getenv(prefix + "METRICS_PORT")
+    if port:
+        start_http_server(int(port))
+        print(f"Metrics on http://127.0.0.1:{port}/metrics")
+    path = os.getenv(prefix + "METRICS_FILE")
+    if path:
+        start_snapshot_writer(path, float(os.getenv(prefix + "METRICS_INTERVAL", "5")))
@@ -0,0 +1,293 @@
+import copy
+import json
+import os
+import time
+import zipfile
+
+import numpy as np
+
+from numpy_cnn import NumpyCNN
+
+
+class KerasClassifier:
+    """Classifier backed by a full TensorFlow/Keras model (.keras / .h5)."""
+
+    backend = "keras"
+
+    def __init__(self, path):
+        import tensorflow as tf
+
+        self.path = path
+        self.model = tf.keras.models.load_model(path)
+        self.input_shape = tuple(self.model.input_shape[1:])
+        self.num_classes = int(self.model.output_shape[-1])
+
+    def predict(self, batch):
+        # Calling the model directly avoids the per-call overhead of model.predict
+        return np.asarray(self.model(batch, training=False))
+
+
+def _create_tflite_interpreter(path):
+    # Prefer the standalone runtimes so TensorFlow itself is never imported
+    try:
+        from tflite_runtime.interpreter import Interpreter
+    except ImportError:
+        try:
+            from ai_edge_litert.interpreter import Interpreter
+        except ImportError:
+            import tensorflow as tf
+            Interpreter = tf.lite.Interpreter
+    return Interpreter(model_path=path)
+
+
+class TFLiteClassifier:
+    """Classifier backed by a TFLite flatbuffer (float32, float16 or int8)."""
+
+    backend = "tflite"
+
+    def __init__(self, path):
+        self.path = path
+        self.interpreter = _create_tflite_interpreter(path)
+        self.interpreter.allocate_tensors()
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+        self.input_shape = tuple(int(d) for d in self._input["shape"][1:])
+        self.num_classes = int(self._output["shape"][-1])
+        self._batch_size = int(self._input["shape"][0])
+
+    def _resize(self, batch_size):
+        self.interpreter.resize_tensor_input(self._input["index"], [batch_size, *self.input_shape])
+        self.interpreter.allocate_tensors()
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+        self._batch_size = batch_size
+
+    def predict(self, batch):
+        batch = np.asarray(batch, dtype=np.float32)
+        if batch.shape[0] != self._batch_size:
+            self._resize(batch.shape[0])
+
+        # Fully quantized models take and return integers
+        if self._input["dtype"] != np.float32:
+            scale, zero_point = self._input["quantization"]
+            info = np.iinfo(self._input["dtype"])
+            batch = np.clip(np.round(batch / scale + zero_point), info.min, info.max)
+            batch = batch.astype(self._input["dtype"])
+
+        self.interpreter.set_tensor(self._input["index"], batch)
+        self.interpreter.invoke()
+        output = self.interpreter.get_tensor(self._output["index"])
+
+        if self._output["dtype"] != np.float32:
+            scale, zero_point = self._output["quantization"]
+            output = (output.astype(np.float32) - zero_point) * scale
+        return output
+
+
+class ONNXClassifier:
+    """Classifier backed by ONNX Runtime on the CPU."""
+
+    backend = "onnx"
+
+    def __init__(self, path):
+        import onnxruntime as ort
+
+        self.path = path
+        self.session = ort.InferenceSession(path, providers=["CPUExecutionProvider"])
+        model_input = self.session.get_inputs()[0]
+        self._input_name = model_input.name
+        self.input_shape = tuple(int(d) for d in model_input.shape[1:])
+        self.num_classes = int(self.session.get_outputs()[0].shape[-1])
+
+    def predict(self, batch):
+        batch = np.asarray(batch, dtype=np.float32)
+        return self.session.run(None, {self._input_name: batch})[0]
+
+
+class ColumnSelectClassifier:
+    """Fallback label-space pruning: run the full model, keep the active columns.
+
+    Used for backends whose graph cannot be edited here (TFLite, ONNX,
+    ensembles). The kept probabilities are renormalized to sum to 1, which is
+    what a softmax over the active classes alone would return.
+    """
+
+    def __init__(self, base, classes):
+        self.base = base
+        self.classes = np.asarray(classes, dtype=np.int64)
+        self.backend = base.backend
+        self.path = base.path
+        self.input_shape = base.input_shape
+        self.num_classes = len(self.classes)
+        self.full_num_classes = base.num_classes
+
+    def predict(self, batch):
+        probs = np.asarray(self.base.predict(batch))[:, self.classes]
+        probs /= np.maximum(probs.sum(axis=-1, keepdims=True), 1e-12)
+        return probs
+
+
+def _prune_keras(classifier, classes):
+    import tensorflow as tf
+
+    dense = classifier.model.layers[-1]
+    if not isinstance(dense, tf.keras.layers.Dense):
+        return None
+    kernel, *bias = dense.get_weights()
+    head = tf.keras.layers.Dense(len(classes), activation=dense.activation, use_bias=bool(bias),
+                                 name=dense.name + "_pruned")
+    outputs = head(dense.input)
+    head.set_weights([kernel[:, classes]] + [b[classes] for b in bias])
+
+    pruned = copy.copy(classifier)
+    pruned.model = tf.keras.Model(classifier.model.inputs, outputs)
+    return pruned
+
+
+def _prune_numpy(classifier, classes):
+    last_dense = max(i for i, spec in enumerate(classifier.layers) if spec["type"] == "Dense")
+    params = dict(classifier.params)
+    params[f"kernel_{last_dense}"] = np.ascontiguousarray(params[f"kernel_{last_dense}"][:, classes])
+    if f"bias_{last_dense}" in params:
+        params[f"bias_{last_dense}"] = params[f"bias_{last_dense}"][classes]
+
+    pruned = copy.copy(classifier)
+    pruned.params = params
+    return pruned
+
+
+def prune_classifier(classifier, classes):
+    """Restrict a classifier to a subset of its output classes.
+
+    The Keras and NumPy backends get a smaller final Dense layer holding only
+    the columns of the active classes, so the inactive ones are never
+    computed; with a softmax head this equals renormalizing the full output
+    over the active classes. Other backends fall back to
+    ColumnSelectClassifier.
+
+    Args:
+        classifier: Classifier returned by load_classifier
+        classes: Original class indices to keep, in output order
+
+    Returns:
+        Classifier whose output column i is class `classes[i]`, with the extra
+        attributes `classes` (np.ndarray) and `full_num_classes`
+
+    Raises:
+        ValueError: If a class index is outside the model's output
+    """
+    classes = np.asarray(sorted(set(int(c) for c in classes)), dtype=np.int64)
+    if len(classes) == 0 or classes[0] < 0 or classes[-1] >= classifier.num_classes:
+        raise ValueError(f"Active classes {classes.tolist()} do not fit a model with {classifier.num_classes} classes")
+
+    pruned = None
+    try:
+        if isinstance(classifier, KerasClassifier):
+            pruned = _prune_keras(classifier, classes)
+        elif isinstance(classifier, NumpyCNN):
+            pruned = _prune_numpy(classifier, classes)
+    except Exception as e:
+        print(f"Could not prune {classifier.path} ({e}), selecting output columns instead")
+    if pruned is None:
+        return ColumnSelectClassifier(classifier, classes)
+
+    pruned.classes = classes
+    pruned.full_num_classes = classifier.num_classes
+    pruned.num_classes = len(classes)
+    return pruned
+
+
+BACKENDS = {
+    ".keras": KerasClassifier,
+    ".h5": KerasClassifier,
+    ".tflite": TFLiteClassifier,
+    ".onnx": ONNXClassifier,
+    ".npz": NumpyCNN,
+}
+
+
+def select_from_manifest(manifest_path, backend=None):
+    """Pick the fastest artifact from an export manifest that passed its accuracy check.
+
+    Args:
+        manifest_path: Path to a manifest.json written by export_model.py
+        backend: Restrict the choice to one backend name (e.g. "tflite")
+
+    Returns:
+        Path to the selected artifact
+
+    Raises:
+        ValueError: If no artifact in the manifest qualifies
+    """
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    candidates = [
+        a for a in manifest.get("artifacts", [])
+        if a.get("accuracy_ok") and (backend is None or a.get("backend") == backend)
+    ]
+    if not candidates:
+        raise ValueError(f"No usable artifact in manifest {manifest_path}")
+
+    best = min(candidates, key=lambda a: a.get("latency_ms_p50", float("inf")))
+    return os.path.join(base_dir, best["path"])
+
+
+def load_classifier(path, backend=None, classes=None):
+    """Load a classifier, choosing the backend from the file extension.
+
+    Args:
+        path: Model file (.keras, .h5, .tflite, .onnx, .npz) or an export manifest (.json)
+        backend: For manifests, restrict the choice to this backend
+        classes: Optional class indices to keep (see prune_classifier)
+
+    Returns:
+        Classifier with `predict(batch)`, `input_shape`, `num_classes`,
+        `backend`, `path` and `load_ms` attributes
+
+    Raises:
+        ValueError: If the file type is not supported
+    """
+    if path.endswith(".json"):
+        path = select_from_manifest(path, backend)
+
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in BACKENDS:
+        raise ValueError(f"Unsupported model file '{path}' (expected one of {sorted(BACKENDS)})")
+
+    start = time.perf_counter()
+    classifier = BACKENDS[ext](path)
+    if classes is not None:
+        classifier = prune_classifier(classifier, classes)
+    classifier.load_ms = round((time.perf_counter() - start) * 1000, 2)
+    return classifier
+
+
+def model_signature(path):
+    """Read (input_shape, num_classes) of a model without loading a framework.
+
+    Works for export manifests, NumPy (.npz) and .keras models (whose config
+    is read straight from the archive). Used to tell which models can be
+    hot-swapped in for each other (see ModelManager).
+
+    Returns:
+        Tuple of (input shape tuple, class count), or None if the file cannot be inspected
+    """
+    try:
+        if path.endswith(".json"):
+            with open(path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            return tuple(manifest["input_shape"]), int(manifest["num_classes"])
+        if path.endswith(".npz"):
+            model = NumpyCNN(path)
+            return model.input_shape, model.num_classes
+        if path.endswith(".keras"):
+            with zipfile.ZipFile(path) as archive:
+                layers = json.loads(archive.read("config.json"))["config"]["layers"]
+            input_shape = tuple(layers[0]["config"]["batch_shape"][1:])
+            units = [layer["config"]["units"] for layer in layers if layer["class_name"] == "Dense"]
+            return input_shape, int(units[-1])
+    except (OSError, ValueError, KeyError, IndexError, zipfile.BadZipFile):
+        return None
+    return None
@@ -0,0 +1,245 @@
+import threading
+import time
+
+import numpy as np
+
+from model_backends import KerasClassifier, load_classifier
+from numpy_cnn import NumpyCNN, StackedNumpyCNN
+
+
+def _classes(model):
+    """Original class index of each output column (see prune_classifier)."""
+    return np.asarray(getattr(model, "classes", np.arange(model.num_classes)))
+
+
+class ModelStats:
+    """Latency and ensemble-agreement counters for one model."""
+
+    def __init__(self):
+        self.calls = 0
+        self.total_ms = 0.0
+        self.last_ms = 0.0
+        self.ensemble_calls = 0
+        self.agreements = 0
+
+    def add_latency(self, elapsed_ms):
+        self.calls += 1
+        self.total_ms += elapsed_ms
+        self.last_ms = elapsed_ms
+
+    def as_dict(self):
+        return {
+            "calls": self.calls,
+            "avg_ms": round(self.total_ms / self.calls, 3) if self.calls else None,
+            "last_ms": round(self.last_ms, 3),
+            "agreement": round(self.agreements / self.ensemble_calls, 3) if self.ensemble_calls else None,
+        }
+
+
+class EnsembleClassifier:
+    """Average the probabilities of several compatible classifiers.
+
+    When every member is a Keras model, they are fused into one Keras graph so
+    the shared input goes through all members in a single call; NumPy members
+    of one architecture are stacked into a StackedNumpyCNN for the same
+    effect. Other backends are called one after another on the same batch.
+    """
+
+    backend = "ensemble"
+
+    def __init__(self, members):
+        self.members = list(members)
+        self.path = ",".join(m.path for m in self.members)
+        self.input_shape = self.members[0].input_shape
+        self.num_classes = self.members[0].num_classes
+        if hasattr(self.members[0], "classes"):
+            # Pruned members (checked to share one class set by ModelManager)
+            self.classes = self.members[0].classes
+            self.full_num_classes = self.members[0].full_num_classes
+        self._fused = None
+        self._stacked = None
+
+        if all(isinstance(m, NumpyCNN) for m in self.members):
+            try:
+                self._stacked = StackedNumpyCNN(self.members)
+            except ValueError:
+                pass  # different architectures: run the members one by one
+        elif all(isinstance(m, KerasClassifier) for m in self.members):
+            import tensorflow as tf
+
+            inputs = tf.keras.Input(shape=self.input_shape)
+            outputs = []
+            for member in self.members:
+                output = member.model(inputs, training=False)
+                # Functional models saved with a single-element output list return a list
+                outputs.append(output[0] if isinstance(output, (list, tuple)) else output)
+            self._fused = tf.keras.Model(inputs, tf.keras.layers.Concatenate(axis=0)(outputs))
+
+    def predict_members(self, batch, stats=None):
+        """Return per-member probabilities shaped (members, batch, classes).
+
+        With `stats`, each member's latency is recorded; a fused or stacked
+        call cannot be split, so each member is charged an equal share of it.
+        """
+        if self._fused is not None or self._stacked is not None:
+            start = time.perf_counter()
+            if self._fused is not None:
+                stacked = np.asarray(self._fused(batch, training=False))
+                stacked = stacked.reshape(len(self.members), -1, self.num_classes)
+            else:
+                stacked = self._stacked.predict_members(batch)
+            if stats is not None:
+                share_ms = (time.perf_counter() - start) * 1000 / len(self.members)
+                for member in self.members:
+                    stats[member.path].add_latency(share_ms)
+            return stacked
+
+        outputs = []
+        for member in self.members:
+            start = time.perf_counter()
+            outputs.append(member.predict(batch))
+            if stats is not None:
+                stats[member.path].add_latency((time.perf_counter() - start) * 1000)
+        return np.stack(outputs)
+
+    def predict(self, batch):
+        return self.predict_members(batch).mean(axis=0)
+
+
+class ModelManager:
+    """Own the active classifier and swap it without stalling the frame loop.
+
+    Candidate models load on background threads. Once every model of a swap
+    request is ready and compatible with the current one (same input shape,
+    class count and pruned class set), the active reference is replaced in a
+    single assignment, so the next `predict` call uses it without dropping
+    frames.
+
+    Only models with the startup model's input and outputs can be swapped in
+    or ensembled. The shipped good*.keras models are two-class LSTMs over
+    (86|87, 258) sequences, so they can never join the 63-feature
+    best_cnn_asl_model: a four-model ensemble is not possible with these
+    artifacts, and the manager rejects such a swap.
+
+    Args:
+        initial_path: Model loaded synchronously at startup
+        loader: Function turning a path into a classifier
+    """
+
+    def __init__(self, initial_path, loader=load_classifier):
+        self._loader = loader
+        self._lock = threading.Lock()
+        self._models = {}
+        self._loading = {}
+        self._request_id = 0
+        self.stats = {}
+        self.last_error = None
+
+        model = self._load(initial_path)
+        self.active = model
+        self.input_shape = model.input_shape
+        self.num_classes = model.num_classes
+        self.classes = _classes(model)
+
+    def _load(self, path):
+        with self._lock:
+            model = self._models.get(path)
+        if model is None:
+            model = self._loader(path)
+            with self._lock:
+                self._models[path] = model
+                self.stats.setdefault(model.path, ModelStats())
+        return model
+
+    def preload(self, path):
+        """Start loading a model in the background so a later swap is instant."""
+        with self._lock:
+            if path in self._models or path in self._loading:
+                return
+            thread = threading.Thread(target=self._preload_worker, args=(path,), daemon=True)
+            self._loading[path] = thread
+        thread.start()
+
+    def _preload_worker(self, path):
+        try:
+            self._load(path)
+        except Exception as e:
+            self.last_error = f"Failed to load {path}: {e}"
+            print(self.last_error)
+        finally:
+            with self._lock:
+                self._loading.pop(path, None)
+
+    def request_swap(self, paths):
+        """Activate one model, or an ensemble of several, once they are loaded.
+
+        Returns immediately; loading and validation happen on a background
+        thread. A newer request supersedes an older one that is still loading.
+
+        Args:
+            paths: A model path or a list of paths (more than one builds an ensemble)
+        """
+        if isinstance(paths, str):
+            paths = [paths]
+        with self._lock:
+            self._request_id += 1
+            request_id = self._request_id
+        threading.Thread(target=self._swap_worker, args=(list(paths), request_id), daemon=True).start()
+
+    def _swap_worker(self, paths, request_id):
+        try:
+            models = [self._load(path) for path in paths]
+            for model in models:
+                if model.input_shape != self.input_shape or model.num_classes != self.num_classes:
+                    raise ValueError(
+                        f"{model.path} expects input {model.input_shape} with {model.num_classes} classes, "
+                        f"active pipeline uses {self.input_shape} with {self.num_classes} classes"
+                    )
+                # Same width is not enough: output column i must mean the same class
+                if not np.array_equal(_classes(model), self.classes):
+                    raise ValueError(
+                        f"{model.path} outputs classes {_classes(model).tolist()}, "
+                        f"active pipeline uses {self.classes.tolist()}"
+                    )
+            new_active = models[0] if len(models) == 1 else EnsembleClassifier(models)
+        except Exception as e:
+            self.last_error = f"Model swap failed: {e}"
+            print(self.last_error)
+            return
+
+        with self._lock:
+            if request_id != self._request_id:
+                return  # superseded by a newer request
+            self.active = new_active
+            self.stats.setdefault(new_active.path, ModelStats())
+        print(f"Active model: {new_active.path}")
+
+    def predict(self, batch):
+        """Run the active model (or ensemble) and return probabilities (batch, classes)."""
+        active = self.active
+        start = time.perf_counter()
+
+        if isinstance(active, EnsembleClassifier):
+            member_probs = active.predict_members(batch, self.stats)
+            probs = member_probs.mean(axis=0)
+            ensemble_labels = np.argmax(probs, axis=-1)
+            for member, member_out in zip(active.members, member_probs):
+                member_stats = self.stats[member.path]
+                member_stats.ensemble_calls += 1
+                member_stats.agreements += int(np.all(np.argmax(member_out, axis=-1) == ensemble_labels))
+        else:
+            probs = active.predict(batch)
+
+        self.stats[active.path].add_latency((time.perf_counter() - start) * 1000)
+        return probs
+
+    def snapshot(self):
+        """Return the active model name, load state and per-model stats."""
+        with self._lock:
+            return {
+                "active": self.active.path,
+                "loaded": sorted(self._models),
+                "loading": sorted(self._loading),
+                "last_error": self.last_error,
+                "models": {path: s.as_dict() for path, s in self.stats.items()},
+            }
@@ -0,0 +1,414 @@
+import argparse
+import json
+import multiprocessing
+import os
+import queue
+import time
+from collections import deque
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from frame_pipeline import CONFIDENCE_THRESHOLD, REPEAT_WORD_GAP, UNFILTERED_SMOOTHING_WINDOW
+from keypoints import NO_HAND
+from labels import CLASS_LABELS, LABEL_SPACES, active_classes
+from metrics import rss_mb
+from model_backends import load_classifier, model_signature
+from sentence_assembler import SENTENCE, TOKEN, SentenceAssembler
+
+# Per-camera slot: [seq, timestamp, handedness, features] as float64, where the
+# feature width is the model's input (63 for one hand, 126 for two)
+SLOT_HEADER = 3
+
+
+def _pin(cpu):
+    """Pin the calling process to one core where the OS supports it."""
+    if cpu is not None and hasattr(os, "sched_setaffinity"):
+        try:
+            os.sched_setaffinity(0, {cpu})
+        except OSError:
+            pass
+
+
+class KeypointSlots:
+    """One fixed-size keypoint slot per camera in a shared memory block.
+
+    Each slot is guarded by a sequence counter (seqlock): the writer makes
+    it odd while writing and even when done, so the reader can copy without
+    locks and retry the rare torn read.
+
+    Args:
+        num_cameras: Number of slots
+        name: Existing block to attach to (None creates one)
+        features: Keypoint features per slot (the model's input width)
+    """
+
+    def __init__(self, num_cameras, name=None, features=63):
+        self.features = features
+        width = SLOT_HEADER + features
+        size = num_cameras * width * 8
+        if name is None:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.name = self.shm.name
+        self.array = np.ndarray((num_cameras, width), dtype=np.float64, buffer=self.shm.buf)
+        if name is None:
+            self.array[:] = 0
+
+    def write(self, camera, timestamp, handedness, keypoints):
+        slot = self.array[camera]
+        slot[0] += 1
+        slot[1] = timestamp
+        slot[2] = handedness
+        slot[3:] = keypoints
+        slot[0] += 1
+
+    def recover(self, camera):
+        """Finish a write left open by a writer that died between the two increments.
+
+        Otherwise the sequence stays odd and readers skip the camera forever.
+        Only safe while no process writes the slot (the supervisor calls it
+        before starting the camera's worker); the torn frame becomes an empty
+        one (no hand).
+        """
+        slot = self.array[camera]
+        if slot[0] % 2:
+            slot[1:] = 0
+            slot[0] += 1
+            return True
+        return False
+
+    def read(self, camera):
+        """Return (seq, timestamp, handedness, keypoints) or None while the slot is being written."""
+        slot = self.array[camera]
+        seq = slot[0]
+        if seq % 2:
+            return None
+        data = slot[1:].copy()
+        if slot[0] != seq:
+            return None
+        return int(seq), float(data[0]), int(data[1]), data[2:].astype(np.float32)
+
+    def close(self):
+        self.array = None
+        self.shm.close()
+
+    def unlink(self):
+        self.shm.unlink()
+
+
+def landmark_worker(camera, source, slots_name, num_cameras, features, cpu, preprocessing_mode, mirror_secondary,
+                    stats_queue, stop_event):
+    """Capture frames from one camera and publish normalized keypoints to its slot."""
+    _pin(cpu)
+    # MediaPipe and OpenCV would otherwise spread threads over every core
+    os.environ.setdefault("OMP_NUM_THREADS", "1")
+    import cv2
+    cv2.setNumThreads(1)
+    import mediapipe as mp
+    from capture import CaptureConfig, open_capture
+    from keypoints import HandFeatureBuilder
+
+    slots = KeypointSlots(num_cameras, name=slots_name, features=features)
+    # Same feature path as main.py: the frame is flipped, the secondary hand mirrored
+    builder = HandFeatureBuilder(preprocessing_mode, mirrored=True, mirror_secondary=mirror_secondary)
+    cap = open_capture(CaptureConfig(source=source))
+    holistic = mp.solutions.holistic.Holistic(
+        model_complexity=1,
+        min_detection_confidence=0.6,
+        min_tracking_confidence=0.6,
+    )
+
+    frames = 0
+    last_report = time.perf_counter()
+    try:
+        while not stop_event.is_set():
+            ret, frame, timestamp = cap.read()
+            if not ret:
+                break
+            frame = cv2.flip(frame, 1)
+            results = holistic.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+            handedness = builder.update(results)
+            slots.write(camera, timestamp, handedness, builder.features(features))
+            frames += 1
+
+            now = time.perf_counter()
+            if now - last_report >= 2.0:
+                stats_queue.put({
+                    "role": "camera", "camera": camera, "pid": os.getpid(), "cpu": cpu,
+                    "fps": round(frames / (now - last_report), 1), "rss_mb": rss_mb(),
+                })
+                frames = 0
+                last_report = now
+    finally:
+        cap.release()
+        holistic.close()
+        slots.close()
+
+
+def classifier_worker(slots_name, num_cameras, features, cpu, model_path, label_space, smoothing_window,
+                      confidence_threshold, stats_queue, event_queue, stop_event):
+    """Batch the newest keypoints of every camera through a single shared model."""
+    _pin(cpu)
+    classifier = load_classifier(model_path, classes=active_classes(label_space))
+    classes = getattr(classifier, "classes", np.arange(classifier.num_classes))
+    slots = KeypointSlots(num_cameras, name=slots_name, features=features)
+
+    last_seq = [0] * num_cameras
+    buffers = [deque(maxlen=smoothing_window) for _ in range(num_cameras)]
+    assemblers = [
+        SentenceAssembler(CLASS_LABELS, repeat_gap=REPEAT_WORD_GAP) for _ in range(num_cameras)
+    ]
+    batch = np.zeros((num_cameras, features), dtype=np.float32)
+
+    predictions = 0
+    batches = 0
+    last_report = time.perf_counter()
+    try:
+        while not stop_event.is_set():
+            # Gather every camera that published since the last pass
+            fresh = []
+            for camera in range(num_cameras):
+                entry = slots.read(camera)
+                if entry is None or entry[0] == last_seq[camera]:
+                    continue
+                seq, timestamp, handedness, keypoints = entry
+                last_seq[camera] = seq
+                if handedness == NO_HAND:
+                    buffers[camera].clear()
+                    assemblers[camera].feed(timestamp, None)
+                    continue
+                batch[len(fresh)] = keypoints
+                fresh.append((camera, timestamp))
+
+            if not fresh:
+                time.sleep(0.002)
+                continue
+
+            probs = classifier.predict(batch[:len(fresh)].reshape(len(fresh), *classifier.input_shape))
+            batches += 1
+            predictions += len(fresh)
+
+            for (camera, timestamp), camera_probs in zip(fresh, probs):
+                buffers[camera].append(camera_probs)
+                smoothed = np.mean(buffers[camera], axis=0)
+                position = int(np.argmax(smoothed))
+                best = int(classes[position])
+                best_conf = float(smoothed[position])
+                label = best if best_conf >= confidence_threshold else None
+                event = assemblers[camera].feed(timestamp, label, best_conf)
+                if event is not None and event[0] in (TOKEN, SENTENCE):
+                    event_queue.put((camera, *event))
+
+            now = time.perf_counter()
+            if now - last_report >= 2.0:
+                stats_queue.put({
+                    "role": "classifier", "pid": os.getpid(), "cpu": cpu, "backend": classifier.backend,
+                    "predictions_per_sec": round(predictions / (now - last_report), 1),
+                    "mean_batch": round(predictions / batches, 2) if batches else 0.0,
+                    "rss_mb": rss_mb(),
+                })
+                predictions = batches = 0
+                last_report = now
+    finally:
+        slots.close()
+
+
+class MultiCamSupervisor:
+    """Run one landmark process per camera and one shared classifier process.
+
+    Camera workers only hold MediaPipe and the capture device; the model is
+    loaded once in the classifier process, which reads keypoints from shared
+    memory and classifies all cameras in one batch. Crashed processes are
+    restarted with exponential backoff; a camera worker that exits cleanly
+    (its video ended) is finished and stays down.
+
+    Args:
+        sources: Camera indices, video paths or "synthetic" sources
+        model_path: Model file or export manifest (see model_backends.py)
+        pin: Pin each process to its own core (Linux only)
+        label_space: "mapped" prunes the model to CLASS_LABELS, "full" keeps every class
+        preprocessing_mode: Keypoint normalization (must match training)
+        mirror_secondary: Mirror the secondary hand into the canonical orientation
+        smoothing_window: Probability vectors averaged per camera
+        confidence_threshold: Minimum smoothed probability to accept a label
+    """
+
+    def __init__(self, sources, model_path, pin=True, label_space="mapped", preprocessing_mode="centered_scaled",
+                 mirror_secondary=True, smoothing_window=UNFILTERED_SMOOTHING_WINDOW,
+                 confidence_threshold=CONFIDENCE_THRESHOLD):
+        self.sources = list(sources)
+        self.model_path = model_path
+        self.label_space = label_space
+        self.preprocessing_mode = preprocessing_mode
+        self.mirror_secondary = mirror_secondary
+        self.smoothing_window = smoothing_window
+        self.confidence_threshold = confidence_threshold
+
+        self._context = multiprocessing.get_context("spawn")
+        self.stop_event = self._context.Event()
+        self.stats_queue = self._context.Queue()
+        self.event_queue = self._context.Queue()
+        # Slots carry the model's input width, as main.py's FEATURE_WIDTH
+        self.features = self._feature_width(model_path)
+        self.slots = KeypointSlots(len(self.sources), features=self.features)
+
+        # Classifier gets the first core, cameras the following ones
+        cpus = sorted(os.sched_getaffinity(0)) if pin and hasattr(os, "sched_getaffinity") else []
+        self._cpus = {
+            name: cpus[i % len(cpus)] if cpus else None
+            for i, name in enumerate(["classifier"] + [f"camera{c}" for c in range(len(self.sources))])
+        }
+
+        self.processes = {}
+        self.finished = set()   # camera workers whose source ended
+        self.restarts = {}
+        self._restart_at = {}
+        self._started_at = {}
+        self.stats = {}
+
+    @staticmethod
+    def _feature_width(model_path):
+        signature = model_signature(model_path)
+        if signature is not None:
+            input_shape = signature[0]
+        else:
+            # Bare .tflite / .onnx files carry no readable signature: load once to ask
+            input_shape = load_classifier(model_path).input_shape
+        features = int(np.prod(input_shape))
+        if features not in (63, 126):
+            raise ValueError(f"{model_path} expects input {input_shape}; "
+                             f"multi-camera recognition needs a 63- or 126-feature model")
+        return features
+
+    def _spawn(self, name):
+        if name == "classifier":
+            target = classifier_worker
+            args = (self.slots.name, len(self.sources), self.features, self._cpus[name], self.model_path,
+                    self.label_space, self.smoothing_window, self.confidence_threshold,
+                    self.stats_queue, self.event_queue, self.stop_event)
+        else:
+            camera = int(name[len("camera"):])
+            if self.slots.recover(camera):
+                print(f"{name} died mid-write, slot sequence reset")
+            target = landmark_worker
+            args = (camera, self.sources[camera], self.slots.name, len(self.sources), self.features,
+                    self._cpus[name], self.preprocessing_mode, self.mirror_secondary, self.stats_queue,
+                    self.stop_event)
+        process = self._context.Process(target=target, args=args, name=name, daemon=True)
+        process.start()
+        self.processes[name] = process
+        self._started_at[name] = time.monotonic()
+
+    def start(self):
+        for name in self._cpus:
+            self.restarts[name] = 0
+            self._spawn(name)
+        return self
+
+    def check_workers(self):
+        """Restart processes that died, backing off on repeated crashes.
+
+        Returns:
+            Number of camera workers still running (or due for a restart)
+        """
+        now = time.monotonic()
+        for name, process in self.processes.items():
+            if process.is_alive() or self.stop_event.is_set() or name in self.finished:
+                continue
+            if name != "classifier" and process.exitcode == 0:
+                # The worker left its loop because the source ended, not because it crashed
+                self.finished.add(name)
+                print(f"{name} finished (end of stream)")
+                continue
+            restart_at = self._restart_at.get(name)
+            if restart_at is None:
+                # A process that ran for a while starts over with a short delay
+                if now - self._started_at[name] > 60:
+                    self.restarts[name] = 0
+                delay = min(2 ** self.restarts[name], 30)
+                self._restart_at[name] = now + delay
+                print(f"{name} exited with code {process.exitcode}, restarting in {delay}s")
+            elif now >= restart_at:
+                del self._restart_at[name]
+                self.restarts[name] += 1
+                self._spawn(name)
+        return len(self.sources) - len(self.finished)
+
+    def poll(self):
+        """Drain stats and sentence events; returns the events."""
+        while True:
+            try:
+                entry = self.stats_queue.get_nowait()
+            except queue.Empty:
+                break
+            key = "classifier" if entry["role"] == "classifier" else f"camera{entry['camera']}"
+            self.stats[key] = entry
+
+        events = []
+        while True:
+            try:
+                events.append(self.event_queue.get_nowait())
+            except queue.Empty:
+                break
+        return events
+
+    def snapshot(self):
+        """Aggregate per-process stats, restart counts and total memory."""
+        rss = [s["rss_mb"] for s in self.stats.values() if s.get("rss_mb") is not None]
+        return {
+            "processes": self.stats,
+            "restarts": {name: count for name, count in self.restarts.items() if count},
+            "total_rss_mb": round(sum(rss), 1) if rss else None,
+        }
+
+    def stop(self, timeout=5.0):
+        self.stop_event.set()
+        for process in self.processes.values():
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+        self.slots.close()
+        self.slots.unlink()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recognize signs from several cameras with one shared model.")
+    parser.add_argument("sources", nargs="+", help="Camera indices, video files or 'synthetic'")
+    parser.add_argument("--model", default=os.getenv("ASL_MODEL") or "best_cnn_asl_model.npz")
+    parser.add_argument("--no-pin", action="store_true", help="Do not pin processes to cores")
+    parser.add_argument("--label-space", choices=LABEL_SPACES, default=os.getenv("ASL_LABEL_SPACE", "mapped"),
+                        help="Prune the model to the mapped classes or keep all of them (default: mapped)")
+    parser.add_argument("--stats-interval", type=float, default=10.0, help="Seconds between stats lines")
+    args = parser.parse_args()
+
+    sources = [int(s) if s.isdigit() else s for s in args.sources]
+    supervisor = MultiCamSupervisor(sources, args.model, pin=not args.no_pin, label_space=args.label_space,
+                                    mirror_secondary=os.getenv("ASL_MIRROR_SECONDARY", "1") == "1").start()
+    print(f"Started {len(sources)} camera workers and 1 classifier")
+
+    last_stats = time.monotonic()
+    try:
+        while True:
+            time.sleep(0.05)
+            cameras_running = supervisor.check_workers()
+            for camera, kind, payload in supervisor.poll():
+                if kind == SENTENCE:
+                    print(f"sentence[{camera}]:" + " ".join(payload))
+                else:
+                    print(f"token[{camera}]:{payload}")
+            if not cameras_running:
+                print("All camera sources ended")
+                break
+            if time.monotonic() - last_stats >= args.stats_interval:
+                print("stats:" + json.dumps(supervisor.snapshot()))
+                last_stats = time.monotonic()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        supervisor.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+import argparse
+import io
+import json
+import re
+import zipfile
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# Layers the NumPy engine can evaluate (the bundled 1D CNN only needs these)
+SUPPORTED_LAYERS = {"InputLayer", "Conv1D", "MaxPooling1D", "Flatten", "Dense", "Dropout"}
+
+
+def _snake_case(name):
+    # Same rule Keras uses to name layer groups inside model.weights.h5
+    name = re.sub(r"\W+", "", name)
+    name = re.sub("(.)([A-Z][a-z]+)", r"\1_\2", name)
+    return re.sub("([a-z])([A-Z])", r"\1_\2", name).lower()
+
+
+def extract_weights(keras_path, npz_path):
+    """Dump the layers of a .keras model into an .npz the NumPy engine can load.
+
+    Reads config.json and model.weights.h5 straight out of the .keras archive,
+    so TensorFlow is not needed (h5py is).
+
+    Args:
+        keras_path: Source .keras model
+        npz_path: Destination .npz file
+
+    Raises:
+        ValueError: If the model uses a layer the engine does not support
+    """
+    import h5py
+
+    with zipfile.ZipFile(keras_path) as archive:
+        config = json.loads(archive.read("config.json"))
+        weights = h5py.File(io.BytesIO(archive.read("model.weights.h5")), "r")
+
+    specs = []
+    arrays = {}
+    seen = {}
+    for layer in config["config"]["layers"]:
+        class_name = layer["class_name"]
+        if class_name not in SUPPORTED_LAYERS:
+            raise ValueError(f"Layer type {class_name} is not supported by the NumPy engine")
+        cfg = layer["config"]
+
+        # Weight groups are named after the layer class, with _1, _2... for repeats
+        key = _snake_case(class_name)
+        count = seen.get(key, 0)
+        seen[key] = count + 1
+        group = f"layers/{key}" if count == 0 else f"layers/{key}_{count}"
+
+        spec = {"type": class_name}
+        if class_name == "InputLayer":
+            spec["shape"] = cfg["batch_shape"][1:]
+        elif class_name == "Conv1D":
+            spec.update(
+                strides=cfg["strides"][0],
+                padding=cfg["padding"],
+                activation=cfg["activation"],
+            )
+            if cfg.get("dilation_rate", [1])[0] != 1 or cfg.get("groups", 1) != 1:
+                raise ValueError("Dilated or grouped Conv1D is not supported by the NumPy engine")
+        elif class_name == "MaxPooling1D":
+            spec.update(pool_size=cfg["pool_size"][0], strides=cfg["strides"][0], padding=cfg["padding"])
+        elif class_name == "Dense":
+            spec["activation"] = cfg["activation"]
+
+        if class_name in ("Conv1D", "Dense"):
+            index = len(specs)
+            arrays[f"kernel_{index}"] = np.asarray(weights[f"{group}/vars/0"], dtype=np.float32)
+            if cfg.get("use_bias", True):
+                arrays[f"bias_{index}"] = np.asarray(weights[f"{group}/vars/1"], dtype=np.float32)
+        specs.append(spec)
+
+    weights.close()
+    np.savez(npz_path, layers=np.array(json.dumps(specs)), **arrays)
+
+
+def _activation(x, name):
+    if name == "relu":
+        return np.maximum(x, 0, out=x)
+    if name == "softmax":
+        x -= x.max(axis=-1, keepdims=True)
+        np.exp(x, out=x)
+        x /= x.sum(axis=-1, keepdims=True)
+        return x
+    if name == "sigmoid":
+        return 1.0 / (1.0 + np.exp(-x))
+    if name == "tanh":
+        return np.tanh(x)
+    if name in (None, "linear"):
+        return x
+    raise ValueError(f"Unsupported activation '{name}'")
+
+
+def _same_padding(x, window, stride, value=0.0):
+    # TensorFlow "same" padding: output length ceil(L / stride), extra pad on the right
+    length = x.shape[1]
+    out_length = -(-length // stride)
+    total = max((out_length - 1) * stride + window - length, 0)
+    left = total // 2
+    return np.pad(x, ((0, 0), (left, total - left), (0, 0)), constant_values=value)
+
+
+def conv1d(x, kernel, bias, stride=1, padding="valid"):
+    """Channels-last 1D convolution as a single im2col matrix multiply.
+
+    Args:
+        x: Input of shape (batch, length, in_channels)
+        kernel: Keras kernel of shape (width, in_channels, out_channels)
+        bias: Bias of shape (out_channels,) or None
+    """
+    width, in_channels, out_channels = kernel.shape
+    columns, out_length = _im2col(x, width, stride, padding)
+    out = columns @ kernel.reshape(width * in_channels, out_channels)
+    if bias is not None:
+        out += bias
+    return out.reshape(x.shape[0], out_length, out_channels)
+
+
+def _im2col(x, width, stride, padding):
+    # (batch, out_length, in_channels, width) view without copying, flattened into matmul rows
+    if padding == "same":
+        x = _same_padding(x, width, stride)
+    windows = sliding_window_view(x, width, axis=1)[:, ::stride]
+    batch, out_length, in_channels = windows.shape[:3]
+    return windows.transpose(0, 1, 3, 2).reshape(batch * out_length, width * in_channels), out_length
+
+
+def max_pool1d(x, pool_size, stride, padding="valid"):
+    """Channels-last 1D max pooling."""
+    if padding == "same":
+        x = _same_padding(x, pool_size, stride, value=-np.inf)
+    if pool_size == stride:
+        # Non-overlapping windows: a reshape is enough
+        batch, length, channels = x.shape
+        out_length = length // pool_size
+        return x[:, :out_length * pool_size].reshape(batch, out_length, pool_size, channels).max(axis=2)
+    return sliding_window_view(x, pool_size, axis=1)[:, ::stride].max(axis=-1)
+
+
+class NumpyCNN:
+    """Pure NumPy evaluator for the small Keras 1D CNN.
+
+    Args:
+        path: .npz written by extract_weights
+    """
+
+    backend = "numpy"
+
+    def __init__(self, path):
+        self.path = path
+        with np.load(path, allow_pickle=False) as data:
+            self.layers = json.loads(str(data["layers"]))
+            self.params = {name: data[name] for name in data.files if name != "layers"}
+
+        input_spec = self.layers[0]
+        self.input_shape = tuple(input_spec["shape"])
+        last_dense = max(i for i, spec in enumerate(self.layers) if spec["type"] == "Dense")
+        self.num_classes = int(self.params[f"kernel_{last_dense}"].shape[-1])
+
+    def predict(self, batch):
+        x = np.asarray(batch, dtype=np.float32).reshape(-1, *self.input_shape)
+        for index, spec in enumerate(self.layers):
+            layer_type = spec["type"]
+            if layer_type == "Conv1D":
+                x = conv1d(
+                    x,
+                    self.params[f"kernel_{index}"],
+                    self.params.get(f"bias_{index}"),
+                    spec["strides"],
+                    spec["padding"],
+                )
+                x = _activation(x, spec["activation"])
+            elif layer_type == "MaxPooling1D":
+                x = max_pool1d(x, spec["pool_size"], spec["strides"], spec["padding"])
+            elif layer_type == "Flatten":
+                x = x.reshape(x.shape[0], -1)
+            elif layer_type == "Dense":
+                x = x @ self.params[f"kernel_{index}"]
+                bias = self.params.get(f"bias_{index}")
+                if bias is not None:
+                    x += bias
+                x = _activation(x, spec["activation"])
+            # InputLayer and Dropout are no-ops at inference time
+        return x
+
+
+class StackedNumpyCNN:
+    """Evaluate several NumpyCNN models of one architecture in a single pass.
+
+    The members' weights are stacked along a leading axis, so each Conv1D and
+    Dense layer is one batched matmul for all members instead of one per
+    member. The input is shared until the first weighted layer.
+
+    Args:
+        members: NumpyCNN models with identical layer specs and weight shapes
+
+    Raises:
+        ValueError: If the members differ in architecture
+    """
+
+    def __init__(self, members):
+        self.layers = members[0].layers
+        if any(m.layers != self.layers or m.params.keys() != members[0].params.keys() for m in members):
+            raise ValueError("Stacked NumPy models must share one architecture")
+        self.count = len(members)
+        self.input_shape = members[0].input_shape
+        self.params = {name: np.stack([m.params[name] for m in members]) for name in members[0].params}
+
+    def predict_members(self, batch):
+        """Return per-member probabilities shaped (members, batch, classes)."""
+        x = np.asarray(batch, dtype=np.float32).reshape(-1, *self.input_shape)
+        size = x.shape[0]
+        x = x[None]  # (1, batch, ...) until a weighted layer fans it out to (members, batch, ...)
+        for index, spec in enumerate(self.layers):
+            layer_type = spec["type"]
+            if layer_type == "Conv1D":
+                kernel = self.params[f"kernel_{index}"]
+                width, in_channels, out_channels = kernel.shape[1:]
+                columns, out_length = _im2col(x.reshape(-1, *x.shape[2:]), width, spec["strides"], spec["padding"])
+                x = columns.reshape(len(x), -1, width * in_channels) @ kernel.reshape(
+                    self.count, width * in_channels, out_channels
+                )
+                bias = self.params.get(f"bias_{index}")
+                if bias is not None:
+                    x += bias[:, None, :]
+                x = _activation(x, spec["activation"]).reshape(self.count, size, out_length, out_channels)
+            elif layer_type == "MaxPooling1D":
+                pooled = max_pool1d(x.reshape(-1, *x.shape[2:]), spec["pool_size"], spec["strides"], spec["padding"])
+                x = pooled.reshape(len(x), size, *pooled.shape[1:])
+            elif layer_type == "Flatten":
+                x = x.reshape(len(x), size, -1)
+            elif layer_type == "Dense":
+                x = x @ self.params[f"kernel_{index}"]
+                bias = self.params.get(f"bias_{index}")
+                if bias is not None:
+                    x += bias[:, None, :]
+                x = _activation(x, spec["activation"])
+            # InputLayer and Dropout are no-ops at inference time
+        return np.broadcast_to(x, (self.count, *x.shape[1:]))
+
+
+def verify(keras_path, npz_path, samples=512, atol=1e-5):
+    """Compare NumPy engine outputs with Keras on random inputs (imports TensorFlow).
+
+    Returns:
+        Maximum absolute difference between the two outputs
+
+    Raises:
+        AssertionError: If the difference exceeds `atol`
+    """
+    import tensorflow as tf
+
+    keras_model = tf.keras.models.load_model(keras_path)
+    engine = NumpyCNN(npz_path)
+    inputs = np.random.default_rng(0).normal(size=(samples, *engine.input_shape)).astype(np.float32)
+
+    expected = np.asarray(keras_model(inputs, training=False))
+    actual = engine.predict(inputs)
+    max_diff = float(np.max(np.abs(expected - actual)))
+    assert max_diff <= atol, f"NumPy engine differs from Keras by {max_diff:.2e} (atol {atol:.0e})"
+    return max_diff
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract a .keras 1D CNN into an .npz for the NumPy engine.")
+    parser.add_argument("model", help="Source .keras model (e.g. best_cnn_asl_model.keras)")
+    parser.add_argument("--output", help="Destination .npz (default: model name with .npz)")
+    parser.add_argument("--verify", action="store_true", help="Check outputs against Keras (needs TensorFlow)")
+    parser.add_argument("--atol", type=float, default=1e-5, help="Tolerance for --verify (default: 1e-5)")
+    args = parser.parse_args()
+
+    output = args.output or args.model.rsplit(".", 1)[0] + ".npz"
+    extract_weights(args.model, output)
+    print(f"Weights written to {output}")
+
+    if args.verify:
+        max_diff = verify(args.model, output, atol=args.atol)
+        print(f"Matches Keras within {max_diff:.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+
+class SamplingProfiler:
+    """Sample the Python stacks of every thread for a fixed duration.
+
+    A background thread reads `sys._current_frames()` every `interval`
+    seconds, so nothing is hooked into the profiled code: when no profile is
+    running there is no thread and no overhead at all.
+
+    Results are written to `directory` as:
+      - profile_<time>.collapsed: one "thread;outer;...;inner count" line per
+        stack, the input format of flamegraph.pl and speedscope
+      - profile_<time>.txt: per-function self and total sample tables
+
+    Args:
+        directory: Output directory
+        interval: Seconds between samples
+    """
+
+    def __init__(self, directory="profiles", interval=0.005):
+        self.directory = directory
+        self.interval = interval
+        self._thread = None
+        self._stop = threading.Event()
+        self.last_report = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, duration, on_done=None):
+        """Profile for `duration` seconds in the background.
+
+        Args:
+            duration: Seconds to sample
+            on_done: Called with the report path prefix when the files are written
+
+        Returns:
+            False if a profile is already running
+        """
+        if self.running:
+            return False
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(duration, on_done), name="sampling-profiler", daemon=True
+        )
+        self._thread.start()
+        return True
+
+    def stop(self):
+        """End the running profile early (the report is still written)."""
+        self._stop.set()
+
+    def _run(self, duration, on_done):
+        own_id = threading.get_ident()
+        stacks = Counter()
+        samples = 0
+        started = time.perf_counter()
+        deadline = started + duration
+
+        while not self._stop.is_set() and time.perf_counter() < deadline:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, f"thread-{thread_id}"))
+                stacks[tuple(reversed(stack))] += 1
+            samples += 1
+            time.sleep(self.interval)
+
+        elapsed = time.perf_counter() - started
+        prefix = self._write(stacks, samples, elapsed)
+        self.last_report = prefix
+        if on_done is not None:
+            on_done(prefix)
+
+    def _write(self, stacks, samples, elapsed):
+        os.makedirs(self.directory, exist_ok=True)
+        now = time.time()
+        base = os.path.join(
+            self.directory,
+            time.strftime("profile_%Y%m%d_%H%M%S", time.localtime(now)) + f"_{int(now * 1000) % 1000:03d}_{os.getpid()}",
+        )
+        # Exclusive create: two profiles finishing in the same millisecond never overwrite each other
+        prefix, attempt = base, 0
+        while True:
+            try:
+                collapsed = open(prefix + ".collapsed", "x", encoding="utf-8")
+                break
+            except FileExistsError:
+                attempt += 1
+                prefix = f"{base}_{attempt}"
+
+        with collapsed as f:
+            for stack, count in stacks.most_common():
+                f.write(";".join(stack) + f" {count}\n")
+
+        # Self = samples where the function is on top; total = samples where it is on the stack
+        self_counts = Counter()
+        total_counts = Counter()
+        per_thread = Counter()
+        for stack, count in stacks.items():
+            per_thread[stack[0]] += count
+            if len(stack) > 1:
+                self_counts[stack[-1]] += count
+            for function in set(stack[1:]):
+                total_counts[function] += count
+
+        with open(prefix + ".txt", "w", encoding="utf-8") as f:
+            f.write(f"{samples} samples over {elapsed:.1f} s (interval {self.interval * 1000:.1f} ms)\n\n")
+            f.write("Samples per thread\n")
+            for thread, count in per_thread.most_common():
+                f.write(f"{count:>8}  {thread}\n")
+            for title, counts in (("Self time", self_counts), ("Total time", total_counts)):
+                f.write(f"\n{title} (% of sampling ticks)\n")
+                f.write(f"{'samples':>8}  {'%':>6}  function\n")
+                for function, count in counts.most_common(40):
+                    f.write(f"{count:>8}  {100 * count / max(1, samples):>5.1f}%  {function}\n")
+        return prefix
@@ -0,0 +1,150 @@
+import numpy as np
+
+
+# Quality ladder from best to cheapest:
+# (frame scale fed to MediaPipe, Holistic model_complexity, run landmarks every N frames)
+DEFAULT_LEVELS = [
+    (1.0, 1, 1),
+    (0.75, 1, 1),
+    (0.5, 1, 1),
+    (0.5, 0, 1),
+    (0.5, 0, 2),
+    (0.5, 0, 3),
+]
+
+
+class AdaptiveQualityController:
+    """Trade landmark quality for speed to hold a target frame rate.
+
+    Per-frame processing time is tracked as an exponential moving average and
+    compared to the frame budget (1 / target_fps). When the loop stays over
+    budget the controller steps down the quality ladder; when it has plenty of
+    headroom for a while it steps back up.
+
+    Args:
+        target_fps: Frame rate the loop should sustain
+        levels: Quality ladder, list of (scale, model_complexity, landmark_interval)
+        degrade_after: Consecutive over-budget frames before stepping down
+        upgrade_after: Consecutive frames under `headroom` * budget before stepping up
+        headroom: Fraction of the budget that must be free before stepping up
+        smoothing: EMA factor applied to new frame times
+    """
+
+    def __init__(self, target_fps=30, levels=None, degrade_after=15, upgrade_after=90,
+                 headroom=0.7, smoothing=0.1):
+        self.levels = list(levels or DEFAULT_LEVELS)
+        self.budget = 1.0 / max(1, target_fps)
+        self.degrade_after = degrade_after
+        self.upgrade_after = upgrade_after
+        self.headroom = headroom
+        self.smoothing = smoothing
+
+        self.level = 0
+        self.avg_frame_time = None
+        self._over_budget = 0
+        self._under_budget = 0
+
+    @property
+    def scale(self):
+        return self.levels[self.level][0]
+
+    @property
+    def model_complexity(self):
+        return self.levels[self.level][1]
+
+    @property
+    def landmark_interval(self):
+        return self.levels[self.level][2]
+
+    def should_run_landmarks(self, frame_index):
+        """Return True if MediaPipe should process this frame."""
+        return frame_index % self.landmark_interval == 0
+
+    def update(self, frame_time):
+        """Record the processing time of one frame.
+
+        Args:
+            frame_time: Seconds spent processing the frame
+
+        Returns:
+            True if the quality level changed
+        """
+        if self.avg_frame_time is None:
+            self.avg_frame_time = frame_time
+        else:
+            self.avg_frame_time += self.smoothing * (frame_time - self.avg_frame_time)
+
+        if self.avg_frame_time > self.budget:
+            self._over_budget += 1
+            self._under_budget = 0
+        elif self.avg_frame_time < self.budget * self.headroom:
+            self._under_budget += 1
+            self._over_budget = 0
+        else:
+            self._over_budget = 0
+            self._under_budget = 0
+
+        if self._over_budget >= self.degrade_after and self.level < len(self.levels) - 1:
+            self.level += 1
+        elif self._under_budget >= self.upgrade_after and self.level > 0:
+            self.level -= 1
+        else:
+            return False
+
+        self._over_budget = 0
+        self._under_budget = 0
+        # Start the new level from the budget so the next decision needs fresh evidence
+        self.avg_frame_time = self.budget * self.headroom
+        return True
+
+    @property
+    def fps(self):
+        """Processing rate implied by the average frame time."""
+        if not self.avg_frame_time:
+            return 0.0
+        return 1.0 / self.avg_frame_time
+
+    def describe(self):
+        """Short summary of the current decision for the stats overlay."""
+        return (
+            f"Quality: {self.scale:.2f}x c{self.model_complexity}"
+            f" lm/{self.landmark_interval}  {self.fps:.0f} fps"
+        )
+
+
+class KeypointExtrapolator:
+    """Estimate keypoints on frames where landmark detection was skipped.
+
+    Keeps the last two detected keypoint vectors and extrapolates with a
+    constant per-frame velocity.
+    """
+
+    def __init__(self):
+        self._last = None
+        self._velocity = None
+        self._frames_since_update = 0
+
+    def update(self, keypoints, frames_elapsed=1):
+        """Store keypoints from a real landmark pass.
+
+        Args:
+            keypoints: Keypoint vector (all zeros when no hand was found)
+            frames_elapsed: Frames since the previous real landmark pass
+        """
+        if not np.any(keypoints):
+            self._last = None
+            self._velocity = None
+        elif self._last is None:
+            self._last = keypoints.copy()
+            self._velocity = np.zeros_like(keypoints)
+        else:
+            self._velocity = (keypoints - self._last) / max(1, frames_elapsed)
+            self._last = keypoints.copy()
+        self._frames_since_update = 0
+
+    def predict(self):
+        """Return extrapolated keypoints for a skipped frame, or None if no hand."""
+        if self._last is None:
+            return None
+        self._frames_since_update += 1
+        return self._last + self._velocity * self._frames_since_update
@@ -0,0 +1,201 @@
+import json
+import os
+import queue
+import shutil
+import threading
+import time
+
+import numpy as np
+
+# Label code stored in "stable_label" when no gesture is shown
+NO_LABEL = -1
+
+
+def _columns(num_classes):
+    # name -> (per-frame shape, dtype)
+    return {
+        "timestamp": ((), np.float64),
+        "landmarks": ((21, 3), np.float32),
+        "handedness": ((), np.int8),
+        "hands": ((2, 21, 3), np.float32),
+        "probs": ((num_classes,), np.float32),
+        "stable_label": ((), np.int16),
+    }
+
+
+class LandmarkRecorder:
+    """Record per-frame landmarks and predictions to chunked columnar files.
+
+    The frame loop only enqueues a tuple; a writer thread copies rows into
+    preallocated column buffers and writes each full chunk as one `.npy` file
+    per column (memory-mappable) or, with `compress=True`, as a single
+    compressed `.npz`. With `max_chunks` set, the oldest chunks are deleted so
+    a long session keeps a bounded footprint.
+
+    Args:
+        directory: Parent directory; each session gets its own subdirectory
+        num_classes: Length of the probability vector
+        class_labels: Optional class -> token mapping saved in the metadata
+        chunk_frames: Rows per chunk file
+        compress: Write compressed .npz chunks instead of raw .npy columns
+        max_chunks: Keep at most this many chunks on disk (None = keep all)
+    """
+
+    def __init__(self, directory, num_classes, class_labels=None, chunk_frames=4096,
+                 compress=False, max_chunks=None):
+        self.directory = os.path.join(directory, time.strftime("session_%Y%m%d_%H%M%S"))
+        self.num_classes = num_classes
+        self.chunk_frames = chunk_frames
+        self.compress = compress
+        self.max_chunks = max_chunks
+        self.columns = _columns(num_classes)
+
+        self._queue = queue.SimpleQueue()
+        self._buffers = {
+            name: np.zeros((chunk_frames, *shape), dtype=dtype)
+            for name, (shape, dtype) in self.columns.items()
+        }
+        self._rows = 0
+        self._chunk_index = 0
+        self._chunks = []
+        self._thread = None
+
+        # Metrics
+        self.frames_recorded = 0
+        self.chunks_written = 0
+
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({
+                "num_classes": num_classes,
+                "class_labels": {str(k): v for k, v in (class_labels or {}).items()},
+                "chunk_frames": chunk_frames,
+                "compressed": compress,
+                "columns": {name: [list(shape), np.dtype(dtype).str] for name, (shape, dtype) in self.columns.items()},
+            }, f, indent=2)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def record(self, timestamp, landmarks, handedness, probs, stable_label, hands=None):
+        """Queue one frame for writing (cheap; safe to call from the frame loop).
+
+        Args:
+            timestamp: Capture time in seconds
+            landmarks: Raw (21, 3) landmarks of the classified hand, or None when no hand was found
+            handedness: NO_HAND, RIGHT_HAND or LEFT_HAND (see keypoints.py)
+            probs: Classifier probabilities for the frame, or None
+            stable_label: Displayed class index, or None
+            hands: Raw (2, 21, 3) landmarks of both HandFeatureBuilder slots
+                (MediaPipe right, MediaPipe left; zeros for a missing hand), or None
+        """
+        self._queue.put((timestamp, landmarks, handedness, probs, stable_label, hands))
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            self._append(*item)
+        if self._rows:
+            self._flush()
+
+    def _append(self, timestamp, landmarks, handedness, probs, stable_label, hands):
+        row = self._rows
+        buffers = self._buffers
+        buffers["timestamp"][row] = timestamp
+        if landmarks is None:
+            buffers["landmarks"][row] = 0
+        else:
+            buffers["landmarks"][row] = landmarks
+        buffers["handedness"][row] = handedness
+        if hands is None:
+            buffers["hands"][row] = 0
+        else:
+            buffers["hands"][row] = hands
+        if probs is None:
+            buffers["probs"][row] = 0
+        else:
+            buffers["probs"][row] = probs
+        buffers["stable_label"][row] = NO_LABEL if stable_label is None else stable_label
+
+        self._rows += 1
+        self.frames_recorded += 1
+        if self._rows == self.chunk_frames:
+            self._flush()
+
+    def _flush(self):
+        rows = self._rows
+        name = f"chunk_{self._chunk_index:06d}"
+        final_path = os.path.join(self.directory, name + (".npz" if self.compress else ""))
+        temp_path = os.path.join(self.directory, "." + name + (".npz" if self.compress else ""))
+
+        # Write under a hidden name and rename, so readers never see partial chunks
+        if self.compress:
+            with open(temp_path, "wb") as f:
+                np.savez_compressed(f, **{k: v[:rows] for k, v in self._buffers.items()})
+        else:
+            os.makedirs(temp_path, exist_ok=True)
+            for column, buffer in self._buffers.items():
+                np.save(os.path.join(temp_path, column + ".npy"), buffer[:rows])
+        os.replace(temp_path, final_path)
+
+        self._chunks.append(final_path)
+        self._chunk_index += 1
+        self.chunks_written += 1
+        self._rows = 0
+
+        if self.max_chunks is not None:
+            while len(self._chunks) > self.max_chunks:
+                oldest = self._chunks.pop(0)
+                if os.path.isdir(oldest):
+                    shutil.rmtree(oldest, ignore_errors=True)
+                else:
+                    os.remove(oldest)
+
+    def close(self):
+        """Write the remaining rows and stop the writer thread."""
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+
+
+def list_chunks(directory):
+    """Return the chunk paths of a recording session in order."""
+    names = sorted(n for n in os.listdir(directory) if n.startswith("chunk_"))
+    return [os.path.join(directory, n) for n in names]
+
+
+def load_chunk(path):
+    """Load one chunk as a dict of column arrays.
+
+    Uncompressed chunks are memory-mapped (zero-copy, read-only); compressed
+    chunks are decompressed into memory.
+    """
+    if os.path.isdir(path):
+        return {
+            name[:-4]: np.load(os.path.join(path, name), mmap_mode="r")
+            for name in os.listdir(path)
+            if name.endswith(".npy")
+        }
+    with np.load(path) as data:
+        return {name: data[name] for name in data.files}
+
+
+def iter_recording(directory):
+    """Yield the chunks of a recording session one at a time."""
+    for path in list_chunks(directory):
+        yield load_chunk(path)
+
+
+def load_recording(directory, columns=None):
+    """Concatenate a whole session into one dict of arrays (copies the data)."""
+    chunks = list(iter_recording(directory))
+    if not chunks:
+        return {}
+    names = columns or chunks[0].keys()
+    return {name: np.concatenate([chunk[name] for chunk in chunks]) for name in names}
@@ -0,0 +1,78 @@
+import time
+
+import cv2
+import mediapipe as mp
+
+mp_holistic = mp.solutions.holistic
+mp_draw = mp.solutions.drawing_utils
+
+
+class PreviewRenderer:
+    """Draw landmarks and text overlays on a reduced-resolution preview.
+
+    Rendering is skipped entirely unless someone is looking (the caller only
+    asks when a display is attached), and is capped at `max_fps` so the
+    preview never costs more than it is worth.
+
+    Args:
+        scale: Preview size relative to the camera frame (1.0 = full size)
+        max_fps: Maximum preview refresh rate
+    """
+
+    def __init__(self, scale=0.5, max_fps=15):
+        self.scale = scale
+        self.min_interval = 1.0 / max_fps if max_fps else 0.0
+        self._last_render = 0.0
+        self.rendered = 0
+
+    def due(self, now=None):
+        """Return True if enough time has passed to render another preview."""
+        now = time.perf_counter() if now is None else now
+        if now - self._last_render < self.min_interval:
+            return False
+        self._last_render = now
+        return True
+
+    def _put_text(self, image, text, origin, font_scale, color, thickness):
+        # Overlay positions and sizes are given for a full-size frame
+        cv2.putText(
+            image,
+            text,
+            (int(origin[0] * self.scale), int(origin[1] * self.scale)),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            font_scale * self.scale,
+            color,
+            max(1, int(round(thickness * self.scale))),
+        )
+
+    def render(self, frame, results, label_text, label_color, stats_text, buffer_text):
+        """Return an annotated preview of `frame` (the input frame is not modified).
+
+        Args:
+            frame: BGR camera frame
+            results: MediaPipe Holistic results (or None)
+            label_text: Prediction line
+            label_color: BGR color of the prediction line
+            stats_text: Inference / quality stats line
+            buffer_text: Sentence buffer line
+        """
+        if self.scale != 1.0:
+            preview = cv2.resize(frame, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
+        else:
+            preview = frame.copy()
+
+        # Landmarks are normalized, so they draw directly onto the smaller preview
+        if results is not None:
+            if results.pose_landmarks:
+                mp_draw.draw_landmarks(preview, results.pose_landmarks, mp_holistic.POSE_CONNECTIONS)
+            if results.left_hand_landmarks:
+                mp_draw.draw_landmarks(preview, results.left_hand_landmarks, mp_holistic.HAND_CONNECTIONS)
+            if results.right_hand_landmarks:
+                mp_draw.draw_landmarks(preview, results.right_hand_landmarks, mp_holistic.HAND_CONNECTIONS)
+
+        self._put_text(preview, label_text, (10, 30), 1, label_color, 2)
+        self._put_text(preview, stats_text, (10, 70), 0.5, (255, 255, 255), 1)
+        self._put_text(preview, buffer_text, (10, 110), 0.7, (0, 255, 255), 2)
+
+        self.rendered += 1
+        return preview
@@ -0,0 +1,151 @@
+import json
+import os
+import threading
+import time
+
+from keypoint_filter import KEYPOINT_FILTERS
+from keypoints import PREPROCESSING_MODES
+
+
+def _probability(value):
+    value = float(value)
+    if not 0.0 <= value <= 1.0:
+        raise ValueError("must be between 0 and 1")
+    return value
+
+
+def _positive_int(value):
+    value = int(value)
+    if value < 1:
+        raise ValueError("must be at least 1")
+    return value
+
+
+def _non_negative(value):
+    value = float(value)
+    if value < 0:
+        raise ValueError("must not be negative")
+    return value
+
+
+def _choice(options):
+    def parse(value):
+        if value not in options:
+            raise ValueError(f"must be one of {', '.join(options)}")
+        return value
+    return parse
+
+
+def _class_labels(value):
+    if isinstance(value, str):
+        value = json.loads(value)
+    return {int(k): str(v) for k, v in value.items()}
+
+
+# Setting name -> parser (raises ValueError on bad input)
+SETTINGS = {
+    "prediction_stride": _positive_int,
+    "max_prediction_stride": _positive_int,
+    "motion_threshold": _non_negative,
+    "smoothing_window": _positive_int,
+    "confidence_threshold": _probability,
+    "preprocessing_mode": _choice(PREPROCESSING_MODES),
+    "keypoint_filter": _choice(KEYPOINT_FILTERS),
+    "min_detection_confidence": _probability,
+    "min_tracking_confidence": _probability,
+    "hold_time": _non_negative,
+    "repeat_gap": _non_negative,
+    "class_labels": _class_labels,
+}
+
+
+class RuntimeConfig:
+    """Recognition settings that can change while the recognizer runs.
+
+    Changes arrive from the control channel (`set`) or from a watched JSON
+    file and are only staged; the frame loop calls `apply_pending()` between
+    frames and receives all staged changes at once, so a frame never sees a
+    half-applied configuration.
+
+    Args:
+        values: Initial settings (keys of SETTINGS)
+        path: Optional JSON file to watch for changes
+        poll_interval: Seconds between file modification checks
+    """
+
+    def __init__(self, values, path=None, poll_interval=1.0):
+        self.values = dict(values)
+        self.path = path
+        self.poll_interval = poll_interval
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._failed_mtime = None
+        self.explicit = set()   # keys set at runtime so far, whether or not they changed a value
+        if path:
+            threading.Thread(target=self._watch, name="config-watch", daemon=True).start()
+
+    def set(self, key, value):
+        """Validate and stage one setting.
+
+        Returns:
+            None on success, otherwise an error message
+        """
+        parser = SETTINGS.get(key)
+        if parser is None:
+            return f"unknown setting {key!r} (known: {', '.join(SETTINGS)})"
+        try:
+            parsed = parser(value)
+        except (ValueError, TypeError, AttributeError) as e:
+            return f"invalid value for {key}: {e}"
+        with self._lock:
+            self._pending[key] = parsed
+        return None
+
+    def update(self, values):
+        """Stage several settings; returns a list of error messages."""
+        errors = []
+        for key, value in values.items():
+            error = self.set(key, value)
+            if error:
+                errors.append(error)
+        return errors
+
+    def apply_pending(self):
+        """Commit staged settings (call between frames).
+
+        Returns:
+            Dict of settings whose value actually changed (empty if none)
+        """
+        if not self._pending:
+            return {}
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        self.explicit.update(pending)
+        changes = {k: v for k, v in pending.items() if self.values.get(k) != v}
+        self.values.update(changes)
+        return changes
+
+    def _watch(self):
+        while True:
+            mtime = None
+            try:
+                mtime = os.stat(self.path).st_mtime
+                if mtime != self._mtime:
+                    with open(self.path, "r", encoding="utf-8") as f:
+                        values = json.load(f)
+                    if not isinstance(values, dict):
+                        raise ValueError(f"expected a JSON object of settings, got {type(values).__name__}")
+                    # Only a file that parsed counts as seen; a failed read is retried next poll
+                    self._mtime = mtime
+                    self._failed_mtime = None
+                    for error in self.update(values):
+                        print(f"Config file {self.path}: {error}")
+            except FileNotFoundError:
+                pass
+            except (OSError, ValueError) as e:
+                # Half-written file or bad JSON: report once per version, keep retrying
+                if mtime != self._failed_mtime:
+                    self._failed_mtime = mtime
+                    print(f"Config file {self.path}: {e}")
+            time.sleep(self.poll_interval)
@@ -0,0 +1,161 @@
+import numpy as np
+
+# Event kinds returned by SentenceAssembler.feed / replay
+TOKEN = "token"            # token appended to the sentence
+DUPLICATE = "duplicate"    # token seen again within repeat_gap, ignored
+UNKNOWN = "unknown"        # label without a token mapping, ignored
+RESET = "reset"            # reset gesture, payload is the discarded tokens
+SENTENCE = "sentence"      # end-of-sentence gesture, payload is the finished tokens
+EMPTY = "empty"            # control gesture on an empty sentence, payload is the token
+
+# Label code used by replay() for frames without a confident label
+NO_LABEL = -1
+
+
+class SentenceAssembler:
+    """Turn a stream of (timestamp, label, confidence) events into sentences.
+
+    A label takes effect on its rising edge, once it has been held for
+    `hold_time` seconds at or above `min_confidence`. Control gestures reset
+    the sentence or finish it; any other token is appended unless the same
+    token was already added less than `repeat_gap` seconds ago.
+
+    Args:
+        class_labels: Mapping from label to token (None uses labels as tokens)
+        reset_tokens: Tokens that clear the sentence
+        eos_tokens: Tokens that finish the sentence
+        min_confidence: Events below this confidence count as "no label"
+        hold_time: Seconds a label must persist before it is accepted (debounce)
+        repeat_gap: Seconds after which a token may repeat (None = never repeat)
+        on_sentence: Called with the token list when a sentence is finished
+    """
+
+    def __init__(self, class_labels=None, reset_tokens=("Reset",), eos_tokens=("EOS",),
+                 min_confidence=0.0, hold_time=0.0, repeat_gap=None, on_sentence=None):
+        self.class_labels = class_labels
+        self.reset_tokens = frozenset(reset_tokens)
+        self.eos_tokens = frozenset(eos_tokens)
+        self.min_confidence = min_confidence
+        self.hold_time = hold_time
+        self.repeat_gap = repeat_gap
+        self.on_sentence = on_sentence
+
+        self.tokens = []          # current sentence (mutated in place)
+        self._added_at = {}       # token -> timestamp it was last appended
+        self._candidate = None    # label currently being held
+        self._candidate_since = 0.0
+        self.committed = None     # last label that took effect
+
+    def clear(self):
+        """Drop the current sentence."""
+        self.tokens.clear()
+        self._added_at.clear()
+
+    def feed(self, timestamp, label, confidence=1.0):
+        """Consume one event.
+
+        Args:
+            timestamp: Event time in seconds
+            label: Class label (or None for "no label")
+            confidence: Confidence of the label
+
+        Returns:
+            (kind, payload) tuple when the event had an effect, otherwise None
+        """
+        if confidence < self.min_confidence:
+            label = None
+        if label != self._candidate:
+            self._candidate = label
+            self._candidate_since = timestamp
+            if self.hold_time > 0:
+                return None
+        elif label == self.committed or timestamp - self._candidate_since < self.hold_time:
+            return None
+        return self._commit(timestamp, label)
+
+    def _commit(self, timestamp, label):
+        if label == self.committed:
+            return None
+        self.committed = label
+        if label is None:
+            return None
+
+        if self.class_labels is None:
+            token = label
+        else:
+            token = self.class_labels.get(label)
+            if token is None:
+                return (UNKNOWN, label)
+
+        if token in self.reset_tokens:
+            if not self.tokens:
+                return (EMPTY, token)
+            discarded = list(self.tokens)
+            self.clear()
+            return (RESET, discarded)
+
+        if token in self.eos_tokens:
+            if not self.tokens:
+                return (EMPTY, token)
+            sentence = list(self.tokens)
+            self.clear()
+            if self.on_sentence is not None:
+                self.on_sentence(sentence)
+            return (SENTENCE, sentence)
+
+        # Dictionary lookup instead of scanning the sentence for duplicates
+        added_at = self._added_at.get(token)
+        if added_at is not None and (self.repeat_gap is None or timestamp - added_at < self.repeat_gap):
+            return (DUPLICATE, token)
+        self.tokens.append(token)
+        self._added_at[token] = timestamp
+        return (TOKEN, token)
+
+    def replay(self, timestamps, labels, confidences=None):
+        """Consume a recorded label stream in bulk.
+
+        Equivalent to calling `feed` for every event, but only the boundaries
+        between runs of identical labels are visited in Python, so long
+        recordings replay at millions of events per second.
+
+        Args:
+            timestamps: Array of event times (seconds, non-decreasing)
+            labels: Integer label array, NO_LABEL for frames without a label
+            confidences: Optional confidence array
+
+        Returns:
+            List of (timestamp, kind, payload) for every event that had an effect
+        """
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        labels = np.asarray(labels)
+        if confidences is not None:
+            labels = np.where(np.asarray(confidences) >= self.min_confidence, labels, NO_LABEL)
+        if len(labels) == 0:
+            return []
+
+        boundaries = np.flatnonzero(labels[1:] != labels[:-1]) + 1
+        starts = np.concatenate(([0], boundaries))
+        ends = np.concatenate((boundaries, [len(labels)]))
+        run_labels = labels[starts].tolist()
+
+        events = []
+        for start, end, label in zip(starts.tolist(), ends.tolist(), run_labels):
+            label = None if label == NO_LABEL else label
+            if label == self._candidate and start == 0:
+                run_start = self._candidate_since  # continues the last live event
+            else:
+                run_start = float(timestamps[start])
+            self._candidate = label
+            self._candidate_since = run_start
+
+            if label == self.committed:
+                continue
+            # First event in the run that satisfies the hold time
+            held = timestamps[start:end] - run_start
+            index = start + int(np.searchsorted(held, self.hold_time))
+            if index >= end:
+                continue
+            event = self._commit(float(timestamps[index]), label)
+            if event is not None:
+                events.append((float(timestamps[index]), *event))
+        return events
@@ -0,0 +1,501 @@
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+import tracemalloc
+from functools import partial
+
+import numpy as np
+
+from frame_pipeline import FramePipeline
+from keypoint_filter import KEYPOINT_FILTERS
+from keypoints import PREPROCESSING_MODES, hand_slot
+from labels import CLASS_LABELS, LABEL_SPACES, active_classes
+from metrics import rss_mb
+from model_backends import load_classifier
+from model_manager import ModelManager
+from recorder import iter_recording
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'text-speech'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'ui'))
+from audio_output import AudioOutput, NullSink
+from job_scheduler import JobScheduler
+
+# Pipeline stages whose latency is tracked per sampling window
+STAGES = ("features", "inference", "decision", "frame", "rewrite", "speak")
+# Stages checked for latency drift (the mock LLM latency is random by design)
+DRIFT_STAGES = ("features", "inference", "decision", "frame", "speak")
+# Minimum samples in both windows before a stage's p95 is compared
+MIN_WINDOW_SAMPLES = 20
+
+
+def parse_duration(text):
+    """Parse "90", "90s", "45m" or "4h" into seconds."""
+    units = {"s": 1, "m": 60, "h": 3600}
+    text = text.strip().lower()
+    if text and text[-1] in units:
+        return float(text[:-1]) * units[text[-1]]
+    return float(text)
+
+
+class LatencyWindow:
+    """Latency samples (ms) of one stage since the last `take()`.
+
+    Values go into a preallocated array, so recording allocates nothing and
+    the harness does not add memory growth of its own. Once the window is
+    full the oldest values are overwritten.
+    """
+
+    def __init__(self, capacity=50000):
+        self.values = np.zeros(capacity, dtype=np.float64)
+        self.count = 0
+
+    def observe(self, value_ms):
+        self.values[self.count % len(self.values)] = value_ms
+        self.count += 1
+
+    def take(self):
+        """Return percentiles of the window and start a new one (None if empty)."""
+        count, self.count = self.count, 0
+        if count == 0:
+            return None
+        values = self.values[:min(count, len(self.values))]
+        p50, p95, p99 = np.percentile(values, (50, 95, 99))
+        return {"count": count, "p50": round(p50, 3), "p95": round(p95, 3), "p99": round(p99, 3),
+                "max": round(float(values.max()), 3)}
+
+
+# --- Frame sources: yield (MediaPipe right hand, MediaPipe left hand), each raw (21, 3) or None ---
+
+def recording_frames(directory):
+    """Replay a LandmarkRecorder session, looping forever.
+
+    Sessions with a "hands" column replay both builder slots. Older sessions
+    hold only the classified hand; it goes back into the slot it was recorded
+    from, so the pipeline mirrors it as main.py did.
+    """
+    while True:
+        rows = 0
+        for chunk in iter_recording(directory):
+            if "hands" in chunk:
+                for frame in chunk["hands"]:
+                    frame = np.asarray(frame, dtype=np.float32)
+                    rows += 1
+                    yield [hand if np.any(hand) else None for hand in frame]
+                continue
+            landmarks = chunk["landmarks"]
+            handedness = chunk["handedness"]
+            for i in range(len(landmarks)):
+                raw = np.asarray(landmarks[i], dtype=np.float32)
+                hands = [None, None]
+                if np.any(raw):
+                    hands[hand_slot(int(handedness[i]))] = raw
+                rows += 1
+                yield hands
+        if rows == 0:
+            raise ValueError(f"Recording {directory} has no frames")
+
+
+def synthetic_frames(fps, seed=0):
+    """Jittered hand poses held for 0.3-1 s, separated by short gaps without a hand."""
+    rng = np.random.default_rng(seed)
+    poses = rng.uniform(0.2, 0.8, size=(len(CLASS_LABELS) + 4, 21, 3)).astype(np.float32)
+    while True:
+        pose = poses[rng.integers(len(poses))]
+        for _ in range(int(rng.uniform(0.3, 1.0) * fps)):
+            yield pose + rng.normal(0, 0.003, size=pose.shape).astype(np.float32), None
+        for _ in range(int(0.2 * fps)):
+            yield None, None
+
+
+def video_frames(path):
+    """Run MediaPipe Holistic over a (flipped, as in main.py) video file, looping forever."""
+    import cv2
+    import mediapipe as mp
+
+    with mp.solutions.holistic.Holistic(model_complexity=1) as holistic:
+        while True:
+            cap = cv2.VideoCapture(path)
+            if not cap.isOpened():
+                raise ValueError(f"Cannot open video {path}")
+            while True:
+                ok, frame = cap.read()
+                if not ok:
+                    break
+                image = cv2.cvtColor(cv2.flip(frame, 1), cv2.COLOR_BGR2RGB)
+                results = holistic.process(image)
+                yield tuple(
+                    None if hand is None else np.array([(lm.x, lm.y, lm.z) for lm in hand.landmark], np.float32)
+                    for hand in (results.right_hand_landmarks, results.left_hand_landmarks)
+                )
+            cap.release()
+
+
+class SoakPipeline:
+    """The recognizer's per-frame path plus the speech path, with mocked I/O.
+
+    Frames run through main.py's FramePipeline (features, keypoint filter,
+    extrapolation on frames the quality controller skips, motion gating,
+    smoothing, sentence assembly and runtime config) with its defaults. Finished
+    sentences go through the same JobScheduler the UI uses, with a mock LLM
+    (a sleep) and a mock TTS playing a tone (or pyttsx3 output) into a NullSink,
+    or the real tts.speak_text.
+
+    Args:
+        model_path: Model file or export manifest
+        label_space: See labels.LABEL_SPACES
+        mode: Preprocessing mode
+        mirror_secondary: Mirror the secondary hand (main.py's ASL_MIRROR_SECONDARY)
+        keypoint_filter: Name from KEYPOINT_FILTERS
+        fps: Stream frame rate (the quality controller's target)
+        config_path: JSON file of runtime settings to watch (as ASL_CONFIG_FILE)
+        llm_ms: Mean mock LLM latency
+        tts: "tone" (generated audio), "pyttsx3" (real rendering, discarded) or
+            "speak_text" (tts.speak_text, played on its configured route)
+        realtime_audio: Playback takes the real clip duration
+        sentence_interval: Force a sentence after this many seconds with tokens (0 = never)
+    """
+
+    def __init__(self, model_path, label_space="mapped", mode="centered_scaled", mirror_secondary=True,
+                 keypoint_filter="none", fps=30.0, config_path=None, llm_ms=400.0, tts="tone",
+                 realtime_audio=False, sentence_interval=5.0):
+        self.model = ModelManager(model_path, loader=partial(load_classifier, classes=active_classes(label_space)))
+        self.latency = {stage: LatencyWindow() for stage in STAGES}
+        self.frame = FramePipeline(
+            self.model,
+            target_fps=fps,
+            mode=mode,
+            mirror_secondary=mirror_secondary,
+            keypoint_filter=keypoint_filter,
+            config_path=config_path,
+            on_sentence=self.on_sentence,
+            timings=self.latency,
+        )
+        self.sentence_interval = sentence_interval
+        self._last_sentence = 0.0
+
+        self.llm_ms = llm_ms
+        self.tts = tts
+        self.audio = AudioOutput([NullSink(realtime=realtime_audio)])
+        self._speak_text = None
+        if tts == "speak_text":
+            # Without TTS_OUTPUTS this is the per-utterance pyttsx3 engine path
+            os.environ.setdefault("TTS_OUTPUTS", "pyttsx3")
+            from tts import speak_text
+            self._speak_text = speak_text
+        self.speech = JobScheduler(self.rewrite, self.speak)
+
+        self.frames = 0
+        self.sentences = 0
+
+    # Mock LLM / TTS (run on the scheduler's threads)
+    def rewrite(self, text):
+        start = time.perf_counter()
+        time.sleep(random.expovariate(1000.0 / self.llm_ms) if self.llm_ms > 0 else 0)
+        result = text.capitalize() + "."
+        self.latency["rewrite"].observe((time.perf_counter() - start) * 1000)
+        return result
+
+    def speak(self, text):
+        start = time.perf_counter()
+        if self._speak_text is not None:
+            self._speak_text(text)
+        else:
+            if self.tts == "pyttsx3":
+                playback = self.audio.speak(text)
+            else:
+                samplerate = 22050
+                t = np.arange(int(0.3 * samplerate * len(text.split()))) / samplerate
+                playback = self.audio.play((0.2 * np.sin(2 * np.pi * 440 * t)).astype(np.float32), samplerate)
+            playback.wait()
+        self.latency["speak"].observe((time.perf_counter() - start) * 1000)
+
+    def on_sentence(self, tokens):
+        self.sentences += 1
+        self.speech.submit(" ".join(tokens), rewrite={})
+
+    def command(self, line):
+        """Handle one control line ("set <name> <value>", "config", "model <path>", ...) as main.py does."""
+        command, _, argument = line.strip().partition(" ")
+        if not self.frame.handle_command(command.lower(), argument.strip()):
+            print(f"Unknown command: {line.strip()}")
+
+    def process(self, timestamp, hands):
+        """Run one frame of (MediaPipe right, MediaPipe left) raw hands; returns the stable label (or None)."""
+        start = time.perf_counter()
+        changes = self.frame.apply_config()
+        if changes:
+            print(f"Config changed: {changes}")
+        # Frames the quality controller skips get extrapolated keypoints, as in main.py
+        label = self.frame.process_raw(timestamp, hands if self.frame.landmarks_due() else None)
+
+        # Random poses rarely show EOS: flush the sentence periodically instead
+        assembler = self.frame.assembler
+        if not assembler.tokens:
+            self._last_sentence = timestamp
+        elif self.sentence_interval and timestamp - self._last_sentence >= self.sentence_interval:
+            self.on_sentence(list(assembler.tokens))
+            assembler.clear()
+            self._last_sentence = timestamp
+
+        self.frames += 1
+        frame_time = time.perf_counter() - start
+        if self.frame.update_quality(frame_time):
+            print(f"Quality changed: {self.frame.quality.describe()}")
+        self.latency["frame"].observe(frame_time * 1000)
+        return label
+
+    def close(self):
+        self.speech.shutdown()
+        self.audio.close()
+
+
+def read_commands(pipeline, stream):
+    """Feed control lines from `stream` (e.g. stdin) to the pipeline until EOF."""
+    for line in stream:
+        if line.strip():
+            pipeline.command(line)
+
+
+class DriftMonitor:
+    """Sample resource use over time and compare it with a post-warm-up baseline.
+
+    Args:
+        warmup: Seconds before the baseline is taken (caches, lazy imports and
+            allocator pools settle first)
+        top: Number of growing allocation sites to report
+        trace: Collect tracemalloc snapshots
+    """
+
+    def __init__(self, warmup=60.0, top=10, trace=True):
+        self.warmup = warmup
+        self.top = top
+        self.trace = trace
+        self.samples = []
+        self.baseline = None
+        self._baseline_snapshot = None
+
+    def _snapshot(self):
+        snapshot = tracemalloc.take_snapshot()
+        return snapshot.filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<unknown>"),
+        ))
+
+    def sample(self, elapsed, pipeline):
+        """Record one sample; returns it as a dict."""
+        sample = {
+            "t": round(elapsed, 1),
+            "frames": pipeline.frames,
+            "sentences": pipeline.sentences,
+            "rss_mb": round(rss_mb() or 0.0, 2),
+            "threads": threading.active_count(),
+            "latency": {stage: window.take() for stage, window in pipeline.latency.items()},
+            "speech": pipeline.speech.metrics(),
+        }
+        if self.trace:
+            current, peak = tracemalloc.get_traced_memory()
+            sample["heap_mb"] = round(current / 1e6, 3)
+            sample["heap_peak_mb"] = round(peak / 1e6, 3)
+
+        if self.baseline is None and elapsed >= self.warmup:
+            self.baseline = sample
+            if self.trace:
+                self._baseline_snapshot = self._snapshot()
+        elif self._baseline_snapshot is not None:
+            # Allocation sites that grew the most since the baseline
+            stats = self._snapshot().compare_to(self._baseline_snapshot, "lineno")
+            sample["top_growth"] = [
+                f"{stat.traceback[0].filename}:{stat.traceback[0].lineno} "
+                f"{stat.size_diff / 1024:+.1f} KiB ({stat.count_diff:+d} blocks)"
+                for stat in stats[:self.top]
+                if stat.size_diff > 0
+            ]
+        self.samples.append(sample)
+        return sample
+
+    def check(self, max_rss_growth_mb, max_heap_growth_mb, max_thread_growth, max_latency_growth):
+        """Compare the latest samples with the baseline.
+
+        Memory and thread counts use the median of the last three samples so
+        one garbage-collection spike does not fail a run; latency compares the
+        p95 of the last window with the baseline window (stages whose p95 grew
+        by less than 1 ms are ignored as noise).
+
+        Returns:
+            List of failure messages (empty = within thresholds)
+        """
+        if self.baseline is None or len(self.samples) < 2:
+            return []
+        base = self.baseline
+        recent = self.samples[-3:]
+        latest = self.samples[-1]
+        failures = []
+
+        def median(key):
+            return float(np.median([s[key] for s in recent]))
+
+        rss_growth = median("rss_mb") - base["rss_mb"]
+        if rss_growth > max_rss_growth_mb:
+            failures.append(f"RSS grew {rss_growth:.1f} MB (limit {max_rss_growth_mb} MB)")
+        if self.trace:
+            heap_growth = median("heap_mb") - base["heap_mb"]
+            if heap_growth > max_heap_growth_mb:
+                failures.append(f"Python heap grew {heap_growth:.1f} MB (limit {max_heap_growth_mb} MB)")
+        thread_growth = median("threads") - base["threads"]
+        if thread_growth > max_thread_growth:
+            failures.append(f"Thread count grew by {thread_growth:.0f} (limit {max_thread_growth})")
+
+        for stage in DRIFT_STAGES:
+            before, after = base["latency"].get(stage), latest["latency"].get(stage)
+            if not before or not after or min(before["count"], after["count"]) < MIN_WINDOW_SAMPLES:
+                continue
+            if after["p95"] > before["p95"] * max_latency_growth and after["p95"] - before["p95"] >= 1.0:
+                failures.append(f"{stage} p95 went from {before['p95']:.2f} ms to {after['p95']:.2f} ms "
+                                f"(limit x{max_latency_growth})")
+        return failures
+
+    def rss_slope(self):
+        """RSS growth rate in MB/hour fitted over the post-warm-up samples (None if too few)."""
+        points = [(s["t"], s["rss_mb"]) for s in self.samples if s["t"] >= self.warmup]
+        if len(points) < 3:
+            return None
+        t, rss = np.array(points).T
+        return float(np.polyfit(t / 3600.0, rss, 1)[0])
+
+
+def describe_sample(sample):
+    frame = sample["latency"].get("frame") or {}
+    speech = sample["speech"]
+    text = (f"[{sample['t']:>8.0f}s] frames {sample['frames']}  rss {sample['rss_mb']:.1f} MB"
+            f"  threads {sample['threads']}  frame p95 {frame.get('p95', 0):.2f} ms"
+            f"  speech done {speech['completed']} cancelled {speech['cancelled']}")
+    if "heap_mb" in sample:
+        text += f"  heap {sample['heap_mb']:.1f} MB"
+    return text
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Drive the recognition and speech pipeline for hours and fail on memory, thread or latency growth."
+    )
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--recording", help="LandmarkRecorder session directory to replay (looped)")
+    source.add_argument("--video", help="Video file to run MediaPipe on (looped; needs mediapipe)")
+    parser.add_argument("--model", default=os.getenv("ASL_MODEL") or "best_cnn_asl_model.npz")
+    parser.add_argument("--label-space", choices=LABEL_SPACES, default=os.getenv("ASL_LABEL_SPACE", "mapped"))
+    parser.add_argument("--mode", choices=PREPROCESSING_MODES, default="centered_scaled")
+    parser.add_argument("--keypoint-filter", choices=KEYPOINT_FILTERS, default="none")
+    parser.add_argument("--duration", default="1h", help="Run time, e.g. 600, 45m, 4h (default: 1h)")
+    parser.add_argument("--fps", type=float, default=30.0, help="Stream frame rate (default: 30)")
+    parser.add_argument("--fast", action="store_true", help="Do not pace frames (timestamps stay at --fps)")
+    parser.add_argument("--llm-ms", type=float, default=400.0, help="Mean mock LLM latency (default: 400)")
+    parser.add_argument("--tts", choices=("tone", "pyttsx3", "speak_text"), default="tone",
+                        help="Mock speech audio, render with pyttsx3 and discard it, or speak through "
+                             "tts.speak_text (per-utterance pyttsx3 engine unless TTS_OUTPUTS is set)")
+    parser.add_argument("--realtime-audio", action="store_true", help="Playback takes the clip's real duration")
+    parser.add_argument("--config", default=os.getenv("ASL_CONFIG_FILE"),
+                        help="JSON runtime settings file to watch (default: ASL_CONFIG_FILE)")
+    parser.add_argument("--stdin-commands", action="store_true",
+                        help="Read main.py's control commands (set, config, model, ...) from stdin")
+    parser.add_argument("--sentence-interval", type=float, default=5.0,
+                        help="Force a sentence after this many seconds with tokens (0 = only on EOS)")
+    parser.add_argument("--sample-interval", type=float, default=30.0, help="Seconds between samples")
+    parser.add_argument("--warmup", type=float, default=60.0, help="Seconds before the baseline sample")
+    parser.add_argument("--no-tracemalloc", action="store_true", help="Skip heap tracing (lower overhead)")
+    parser.add_argument("--top", type=int, default=10, help="Growing allocation sites to report")
+    parser.add_argument("--max-rss-growth-mb", type=float, default=50.0)
+    parser.add_argument("--max-heap-growth-mb", type=float, default=20.0)
+    parser.add_argument("--max-thread-growth", type=int, default=2)
+    parser.add_argument("--max-latency-growth", type=float, default=1.5, help="Allowed p95 ratio per stage")
+    parser.add_argument("--fail-fast", action="store_true", help="Stop at the first sample over a threshold")
+    parser.add_argument("--output", help="Write every sample as a JSON line to this file")
+    args = parser.parse_args()
+
+    duration = parse_duration(args.duration)
+    thresholds = (args.max_rss_growth_mb, args.max_heap_growth_mb, args.max_thread_growth, args.max_latency_growth)
+    if not args.no_tracemalloc:
+        tracemalloc.start()
+
+    pipeline = SoakPipeline(
+        args.model,
+        label_space=args.label_space,
+        mode=args.mode,
+        mirror_secondary=os.getenv("ASL_MIRROR_SECONDARY", "1") == "1",
+        keypoint_filter=args.keypoint_filter,
+        fps=args.fps,
+        config_path=args.config,
+        llm_ms=args.llm_ms,
+        tts=args.tts,
+        realtime_audio=args.realtime_audio,
+        sentence_interval=args.sentence_interval,
+    )
+    if args.stdin_commands:
+        threading.Thread(target=read_commands, args=(pipeline, sys.stdin), name="soak-commands", daemon=True).start()
+    if args.recording:
+        frames = recording_frames(args.recording)
+    elif args.video:
+        frames = video_frames(args.video)
+    else:
+        frames = synthetic_frames(args.fps)
+    monitor = DriftMonitor(args.warmup, args.top, trace=not args.no_tracemalloc)
+    output = open(args.output, "w", encoding="utf-8") if args.output else None
+
+    print(f"Soak test for {duration:.0f} s on {args.recording or args.video or 'synthetic landmarks'} "
+          f"({pipeline.model.active.backend}, {args.label_space} label space)")
+    start = time.perf_counter()
+    next_sample = start + args.sample_interval
+    failures = []
+    index = 0
+    try:
+        for hands in frames:
+            now = time.perf_counter()
+            if now - start >= duration:
+                break
+            if not args.fast:
+                delay = start + index / args.fps - now
+                if delay > 0:
+                    time.sleep(delay)
+            pipeline.process(index / args.fps, hands)
+            index += 1
+
+            if time.perf_counter() >= next_sample:
+                next_sample += args.sample_interval
+                sample = monitor.sample(time.perf_counter() - start, pipeline)
+                print(describe_sample(sample), flush=True)
+                if output is not None:
+                    output.write(json.dumps(sample) + "\n")
+                    output.flush()
+                failures = monitor.check(*thresholds)
+                if failures and args.fail_fast:
+                    break
+    except KeyboardInterrupt:
+        print("\nInterrupted")
+    finally:
+        pipeline.close()
+        if output is not None:
+            output.close()
+
+    failures = monitor.check(*thresholds)
+    slope = monitor.rss_slope()
+    if monitor.baseline is None:
+        print(f"Run ended before the {args.warmup:.0f} s warm-up; nothing to compare")
+    else:
+        if slope is not None:
+            print(f"RSS trend: {slope:+.1f} MB/hour")
+        latest = monitor.samples[-1]
+        for site in latest.get("top_growth", []):
+            print(f"  {site}")
+    if failures:
+        for failure in failures:
+            print(f"FAIL: {failure}")
+        sys.exit(1)
+    print("PASS")
+
+
+if __name__ == "__main__":
+    main()
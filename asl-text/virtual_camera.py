@@ -0,0 +1,137 @@
+import threading
+import time
+
+import cv2
+
+
+class NullCamera:
+    """Stand-in for pyvirtualcam.Camera that only counts frames (headless testing)."""
+
+    device = "null"
+
+    def __init__(self, width, height, fps):
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.frames_sent = 0
+        self._next_frame = time.perf_counter()
+
+    def send(self, frame):
+        self.frames_sent += 1
+
+    def sleep_until_next_frame(self):
+        self._next_frame += 1.0 / self.fps
+        delay = self._next_frame - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        else:
+            self._next_frame = time.perf_counter()
+
+    def close(self):
+        pass
+
+
+def open_camera(width, height, fps, backend="pyvirtualcam"):
+    """Open a virtual camera that accepts BGR frames.
+
+    Args:
+        backend: "pyvirtualcam" for a real virtual camera device, "null" for none
+    """
+    if backend == "null":
+        return NullCamera(width, height, fps)
+
+    import pyvirtualcam
+
+    # Let pyvirtualcam take BGR directly so the recognizer never converts colors for it
+    return pyvirtualcam.Camera(width=width, height=height, fps=fps, fmt=pyvirtualcam.PixelFormat.BGR)
+
+
+class VirtualCameraOutput:
+    """Feed a virtual camera from a dedicated thread.
+
+    The frame loop calls `publish`, which only drops the frame into a
+    single-slot buffer and returns; the output thread sends the most recent
+    frame and does its own pacing, so pyvirtualcam's sleep never eats into
+    the recognition budget. Frames published faster than the camera rate
+    replace each other and are counted as dropped.
+
+    Args:
+        width: Virtual camera width
+        height: Virtual camera height
+        fps: Virtual camera frame rate
+        backend: "pyvirtualcam" or "null"
+    """
+
+    def __init__(self, width, height, fps, backend="pyvirtualcam"):
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.backend = backend
+        self.camera = None
+        self.device = None
+
+        self._condition = threading.Condition()
+        self._latest = None
+        self._running = False
+        self._thread = None
+
+        # Metrics
+        self.published = 0
+        self.sent = 0
+        self.dropped = 0
+
+    def start(self):
+        self.camera = open_camera(self.width, self.height, self.fps, self.backend)
+        self.device = self.camera.device
+        self._running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def publish(self, frame):
+        """Offer a BGR frame to the virtual camera (never blocks on pacing)."""
+        with self._condition:
+            if self._latest is not None:
+                self.dropped += 1
+            self._latest = frame
+            self.published += 1
+            self._condition.notify()
+
+    def _run(self):
+        while self._running:
+            with self._condition:
+                while self._latest is None and self._running:
+                    self._condition.wait(timeout=0.5)
+                frame = self._latest
+                self._latest = None
+            if frame is None:
+                continue
+
+            if frame.shape[1] != self.width or frame.shape[0] != self.height:
+                frame = cv2.resize(frame, (self.width, self.height), interpolation=cv2.INTER_LINEAR)
+            try:
+                self.camera.send(frame)
+                self.sent += 1
+                self.camera.sleep_until_next_frame()
+            except Exception as e:
+                print(f"Virtual camera error: {e}")
+                time.sleep(1.0 / self.fps)
+
+    def stop(self):
+        self._running = False
+        with self._condition:
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+        if self.camera is not None:
+            self.camera.close()
+
+    def stats(self):
+        return {"published": self.published, "sent": self.sent, "dropped": self.dropped}
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+        return False
@@ -0,0 +1,9 @@
+import os
+import sys
+
+# The components are flat script directories; make their modules importable
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for name in ("text-speech", "ui", "asl-text"):
+    path = os.path.join(ROOT, name)
+    if path not in sys.path:
+        sys.path.insert(0, path)
@@ -0,0 +1,51 @@
+from caption_server import PARTIAL, REWRITE, SENTENCE, TOKEN, _Client
+
+
+def _event(kind, text):
+    return {"kind": kind, "text": text}
+
+
+def _queued(client):
+    return [(e["kind"], e["text"]) for e in client.queue]
+
+
+def test_partial_replaces_queued_partial():
+    client = _Client("sse", "peer", None, max_queue=8)
+    client.offer(_event(TOKEN, "hello"))
+    client.offer(_event(PARTIAL, "hello"))
+    client.offer(_event(TOKEN, "you"))
+
+    assert client.offer(_event(PARTIAL, "hello you"))
+    assert _queued(client) == [(TOKEN, "hello"), (PARTIAL, "hello you"), (TOKEN, "you")]
+    assert client.merged == 1
+    assert client.wakeup.is_set()
+
+
+def test_full_queue_drops_tokens_first():
+    client = _Client("ws", "peer", None, max_queue=4)
+    for event in (_event(SENTENCE, "one"), _event(TOKEN, "a"), _event(TOKEN, "b"), _event(REWRITE, "One.")):
+        assert client.offer(event)
+
+    assert client.offer(_event(SENTENCE, "two"))
+    assert _queued(client) == [(SENTENCE, "one"), (REWRITE, "One."), (SENTENCE, "two")]
+    assert client.merged == 2
+
+
+def test_full_queue_of_sentences_drops_client():
+    client = _Client("sse", "peer", None, max_queue=2)
+    assert client.offer(_event(SENTENCE, "one"))
+    assert client.offer(_event(SENTENCE, "two"))
+
+    assert not client.offer(_event(TOKEN, "three"))
+    assert not client.offer(_event(SENTENCE, "three"))
+    assert _queued(client) == [(SENTENCE, "one"), (SENTENCE, "two")]
+    assert client.merged == 0
+
+
+def test_partial_merges_even_when_full():
+    client = _Client("sse", "peer", None, max_queue=2)
+    client.offer(_event(SENTENCE, "one"))
+    client.offer(_event(PARTIAL, "tw"))
+
+    assert client.offer(_event(PARTIAL, "two"))
+    assert _queued(client) == [(SENTENCE, "one"), (PARTIAL, "two")]
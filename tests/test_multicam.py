@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from multicam import KeypointSlots
+
+
+@pytest.fixture
+def slots():
+    slots = KeypointSlots(2)
+    yield slots
+    slots.close()
+    slots.unlink()
+
+
+def test_write_then_read(slots):
+    keypoints = np.arange(63, dtype=np.float32)
+    slots.write(1, 12.5, 1, keypoints)
+
+    seq, timestamp, handedness, read = slots.read(1)
+    assert seq == 2
+    assert timestamp == 12.5
+    assert handedness == 1
+    np.testing.assert_array_equal(read, keypoints)
+    # The other camera was never written
+    seq, _, _, read = slots.read(0)
+    assert seq == 0
+    assert not read.any()
+
+
+def test_read_skips_open_write(slots):
+    slots.write(0, 1.0, 0, np.ones(63))
+    slots.array[0, 0] += 1   # writer died between the two increments
+
+    assert slots.read(0) is None
+
+
+def test_recover_closes_open_write(slots):
+    slots.write(0, 1.0, 1, np.ones(63))
+    slots.array[0, 0] += 1
+
+    assert slots.recover(0)
+    seq, timestamp, handedness, keypoints = slots.read(0)
+    assert seq == 4
+    assert (timestamp, handedness) == (0.0, 0)
+    assert not keypoints.any()
+    # Nothing left to recover
+    assert not slots.recover(0)
+    assert slots.read(0)[0] == 4
+
+
+def test_recover_keeps_finished_write(slots):
+    slots.write(1, 2.0, 1, np.ones(63))
+
+    assert not slots.recover(1)
+    assert slots.read(1)[1] == 2.0
+
+
+def test_attach_by_name_and_two_hand_width():
+    slots = KeypointSlots(1, features=126)
+    try:
+        attached = KeypointSlots(1, name=slots.name, features=126)
+        keypoints = np.linspace(-1, 1, 126)
+        attached.write(0, 3.0, 0, keypoints)
+        attached.close()
+
+        seq, timestamp, _, read = slots.read(0)
+        assert (seq, timestamp) == (2, 3.0)
+        np.testing.assert_allclose(read, keypoints.astype(np.float32))
+    finally:
+        slots.close()
+        slots.unlink()
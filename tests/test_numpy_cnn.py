@@ -0,0 +1,29 @@
+import os
+
+import numpy as np
+import pytest
+
+from numpy_cnn import NumpyCNN, extract_weights, verify
+
+MODEL_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "asl-text")
+KERAS_MODEL = os.path.join(MODEL_DIR, "best_cnn_asl_model.keras")
+
+
+def test_extracted_weights_match_keras(tmp_path):
+    pytest.importorskip("tensorflow")
+    npz_path = str(tmp_path / "model.npz")
+    extract_weights(KERAS_MODEL, npz_path)
+    assert verify(KERAS_MODEL, npz_path, samples=256) <= 1e-5
+
+
+def test_shipped_npz_matches_its_keras_model():
+    pytest.importorskip("tensorflow")
+    assert verify(KERAS_MODEL, os.path.join(MODEL_DIR, "best_cnn_asl_model.npz"), samples=256) <= 1e-5
+
+
+def test_predict_returns_probabilities():
+    engine = NumpyCNN(os.path.join(MODEL_DIR, "best_cnn_asl_model.npz"))
+    inputs = np.random.default_rng(1).normal(size=(8, *engine.input_shape)).astype(np.float32)
+    probs = engine.predict(inputs)
+    assert probs.shape == (8, engine.num_classes)
+    np.testing.assert_allclose(probs.sum(axis=1), 1.0, rtol=1e-5)
@@ -0,0 +1,71 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("openai")
+pytest.importorskip("pyttsx3")
+import openai_client
+from openai_client import RewriteStreamError, stream_rewrite
+
+
+class FakeClient:
+    """Stands in for the OpenAI client: each stream waits for `release`, then
+    yields `tokens` or raises `error`."""
+
+    def __init__(self, tokens=(), error=None):
+        self.tokens = tokens
+        self.error = error
+        self.release = threading.Event()
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        self.calls += 1
+        assert kwargs["stream"]
+        self.release.wait(5)
+        if self.error is not None:
+            raise self.error
+        return iter(SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=token))])
+                    for token in self.tokens)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    fake = FakeClient()
+    monkeypatch.setattr(openai_client, "get_client", lambda: fake)
+    return fake
+
+
+def test_identical_requests_share_one_stream(client):
+    client.tokens = ["Hello", None, ",", " there", "."]
+    coalesced = openai_client.llm_coalesced.value
+
+    first = stream_rewrite("hello there")
+    second = stream_rewrite("hello there")
+    other = stream_rewrite("hello there", temperature=0.2)
+    client.release.set()
+
+    assert list(first) == list(second) == list(other) == ["Hello", ",", " there", "."]
+    assert client.calls == 2
+    assert openai_client.llm_coalesced.value == coalesced + 1
+    # A finished stream is not a cache
+    assert list(stream_rewrite("hello there")) == ["Hello", ",", " there", "."]
+    assert client.calls == 3
+
+
+def test_failure_reaches_every_caller(client):
+    client.error = ConnectionError("connection reset")
+    callers = [stream_rewrite("fails") for _ in range(3)]
+    client.release.set()
+
+    errors = []
+    for caller in callers:
+        with pytest.raises(RewriteStreamError) as info:
+            list(caller)
+        errors.append(info.value)
+
+    assert client.calls == 1
+    assert len({id(e) for e in errors}) == 3
+    assert all(e.__cause__ is client.error for e in errors)
+    assert "connection reset" in str(errors[0])
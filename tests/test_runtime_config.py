@@ -0,0 +1,78 @@
+import json
+import time
+
+from runtime_config import RuntimeConfig
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_set_parses_and_stages():
+    config = RuntimeConfig({"prediction_stride": 1})
+
+    assert config.set("prediction_stride", "3") is None
+    assert config.set("confidence_threshold", 0.75) is None
+    assert config.set("class_labels", '{"0": "Reset", "1": "hello"}') is None
+    # Staged only
+    assert config.values == {"prediction_stride": 1}
+
+    assert config.apply_pending() == {
+        "prediction_stride": 3,
+        "confidence_threshold": 0.75,
+        "class_labels": {0: "Reset", 1: "hello"},
+    }
+    assert config.apply_pending() == {}
+
+
+def test_set_rejects_bad_values():
+    config = RuntimeConfig({})
+
+    assert "unknown setting 'nope'" in config.set("nope", 1)
+    assert "invalid value for confidence_threshold" in config.set("confidence_threshold", 1.5)
+    assert "invalid value for prediction_stride" in config.set("prediction_stride", 0)
+    assert "invalid value for smoothing_window" in config.set("smoothing_window", "many")
+    assert "invalid value for preprocessing_mode" in config.set("preprocessing_mode", "sideways")
+    assert "invalid value for class_labels" in config.set("class_labels", "[1, 2]")
+    assert config.apply_pending() == {}
+
+
+def test_update_collects_errors():
+    config = RuntimeConfig({})
+
+    errors = config.update({"hold_time": 0.5, "repeat_gap": -1, "bogus": True})
+
+    assert len(errors) == 2
+    assert config.apply_pending() == {"hold_time": 0.5}
+
+
+def test_apply_pending_returns_only_changes():
+    config = RuntimeConfig({"smoothing_window": 5, "hold_time": 0.0})
+    config.update({"smoothing_window": 5, "hold_time": 0.25})
+
+    assert config.apply_pending() == {"hold_time": 0.25}
+    # An unchanged value still counts as explicitly set
+    assert config.explicit == {"smoothing_window", "hold_time"}
+    assert config.values == {"smoothing_window": 5, "hold_time": 0.25}
+
+
+def test_file_watcher(tmp_path, capsys):
+    path = tmp_path / "config.json"
+    path.write_text("[]", encoding="utf-8")
+    config = RuntimeConfig({"prediction_stride": 1}, path=str(path), poll_interval=0.01)
+
+    assert _wait_for(lambda: "expected a JSON object" in capsys.readouterr().out)
+    assert config.apply_pending() == {}
+
+    path.write_text(json.dumps({"prediction_stride": 4, "hold_time": "x"}), encoding="utf-8")
+    assert _wait_for(lambda: config.apply_pending() == {"prediction_stride": 4})
+    assert _wait_for(lambda: "invalid value for hold_time" in capsys.readouterr().out)
+
+    path.write_text('{"prediction_stride": ', encoding="utf-8")
+    assert _wait_for(lambda: f"Config file {path}" in capsys.readouterr().out)
+    assert config.values["prediction_stride"] == 4
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from sentence_assembler import DUPLICATE, NO_LABEL, RESET, SENTENCE, TOKEN, SentenceAssembler
+
+LABELS = {0: "Reset", 1: "hello", 2: "you", 3: "good", 4: "EOS"}
+
+
+def _feed_all(assembler, timestamps, labels, confidences=None):
+    events = []
+    for i, (timestamp, label) in enumerate(zip(timestamps, labels)):
+        label = None if label == NO_LABEL else int(label)
+        confidence = 1.0 if confidences is None else float(confidences[i])
+        event = assembler.feed(float(timestamp), label, confidence)
+        if event is not None:
+            events.append((float(timestamp), *event))
+    return events
+
+
+def _label_stream(seed, frames=3000):
+    """Runs of random labels (including NO_LABEL) with random lengths at 30 fps."""
+    rng = np.random.default_rng(seed)
+    labels = []
+    while len(labels) < frames:
+        labels.extend([int(rng.integers(-1, 6))] * int(rng.integers(1, 40)))
+    labels = np.array(labels[:frames])
+    labels[labels == -1] = NO_LABEL
+    return np.arange(frames) / 30.0, labels, rng.uniform(0.3, 1.0, size=frames)
+
+
+@pytest.mark.parametrize("hold_time", [0.0, 0.2])
+@pytest.mark.parametrize("repeat_gap", [None, 0.0, 1.5])
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_replay_matches_feed(hold_time, repeat_gap, seed):
+    timestamps, labels, confidences = _label_stream(seed)
+    options = dict(class_labels=LABELS, min_confidence=0.5, hold_time=hold_time, repeat_gap=repeat_gap)
+    live, replayed = SentenceAssembler(**options), SentenceAssembler(**options)
+
+    assert replayed.replay(timestamps, labels, confidences) == _feed_all(live, timestamps, labels, confidences)
+    assert replayed.tokens == live.tokens
+
+
+def test_replay_continues_a_live_stream():
+    live, mixed = SentenceAssembler(LABELS, hold_time=0.2), SentenceAssembler(LABELS, hold_time=0.2)
+    timestamps, labels, _ = _label_stream(3, frames=600)
+
+    expected = _feed_all(live, timestamps, labels)
+    # The first half goes through feed, the rest is replayed in bulk
+    events = _feed_all(mixed, timestamps[:300], labels[:300])
+    events += mixed.replay(timestamps[300:], labels[300:])
+    assert events == expected
+
+
+def test_replay_events():
+    assembler = SentenceAssembler(LABELS, repeat_gap=1.0)
+    timestamps = np.arange(10, dtype=np.float64)
+    labels = np.array([1, 1, NO_LABEL, 1, 2, 0, 3, NO_LABEL, 3, 4])
+    events = assembler.replay(timestamps * 0.25, labels)
+    assert [(kind, payload) for _, kind, payload in events] == [
+        (TOKEN, "hello"),
+        (DUPLICATE, "hello"),       # 0.75 s after the first one, within repeat_gap
+        (TOKEN, "you"),
+        (RESET, ["hello", "you"]),
+        (TOKEN, "good"),
+        (DUPLICATE, "good"),
+        (SENTENCE, ["good"]),
+    ]
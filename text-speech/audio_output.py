@@ -0,0 +1,459 @@
+import os
+import sys
+import tempfile
+import threading
+import time
+import wave
+
+import numpy as np
+
+# Try to import sounddevice for non-blocking playback on real devices
+try:
+    import sounddevice
+    SOUNDDEVICE_AVAILABLE = True
+except (ImportError, OSError):
+    SOUNDDEVICE_AVAILABLE = False
+
+# Try to import comtypes for SAPI device selection
+try:
+    import comtypes.client
+    COMTYPES_AVAILABLE = True
+except ImportError:
+    COMTYPES_AVAILABLE = False
+
+SAPI_AUDIO_OUTPUT_CATEGORY = "HKEY_LOCAL_MACHINE\\SOFTWARE\\Microsoft\\Speech\\AudioOutput"
+
+
+class DeviceRegistry:
+    """Enumerate audio output devices once and re-enumerate only on demand.
+
+    Holds both the PortAudio output devices (for sounddevice playback) and the
+    SAPI AudioOutput token IDs and descriptions (for pyttsx3 routing on
+    Windows). Only plain strings are cached: a COM token belongs to the
+    apartment of the thread that created it, so `sapi_token()` re-resolves
+    it from its ID on the calling thread. `refresh()`
+    re-enumerates and reports whether anything changed; lookups that miss
+    refresh at most once every `rescan_interval` seconds, so a device that is
+    plugged in later is still found without enumerating on every call.
+
+    Args:
+        rescan_interval: Minimum seconds between refreshes triggered by a failed lookup
+    """
+
+    def __init__(self, rescan_interval=5.0):
+        self.rescan_interval = rescan_interval
+        self._lock = threading.Lock()
+        self._output_devices = None   # list of (index, name, channels, samplerate)
+        self._sapi_tokens = None      # list of (description, token ID)
+        self._signature = None
+        self._last_scan = 0.0
+        self.scans = 0
+
+    def _scan(self):
+        outputs = []
+        if SOUNDDEVICE_AVAILABLE:
+            try:
+                for index, device in enumerate(sounddevice.query_devices()):
+                    if device["max_output_channels"] > 0:
+                        outputs.append((index, device["name"], device["max_output_channels"],
+                                        int(device["default_samplerate"])))
+            except Exception as e:
+                print(f"[DEBUG] Could not query audio devices: {e}", file=sys.stderr, flush=True)
+
+        sapi_tokens = []
+        if COMTYPES_AVAILABLE:
+            try:
+                category = comtypes.client.CreateObject("SAPI.SpObjectTokenCategory")
+                category.SetId(SAPI_AUDIO_OUTPUT_CATEGORY, False)
+                tokens = category.EnumerateTokens()
+                for i in range(tokens.Count):
+                    token = tokens.Item(i)
+                    sapi_tokens.append((token.GetDescription(), token.Id))
+            except Exception as e:
+                print(f"[DEBUG] Could not enumerate SAPI devices: {e}", file=sys.stderr, flush=True)
+        return outputs, sapi_tokens
+
+    def refresh(self):
+        """Re-enumerate all devices.
+
+        Returns:
+            True if the device list changed since the previous scan
+        """
+        outputs, sapi_tokens = self._scan()
+        signature = (tuple(d[:2] for d in outputs), tuple(sapi_tokens))
+        with self._lock:
+            changed = self._signature is not None and signature != self._signature
+            self._output_devices = outputs
+            self._sapi_tokens = sapi_tokens
+            self._signature = signature
+            self._last_scan = time.monotonic()
+            self.scans += 1
+        if changed:
+            print("[DEBUG] Audio device list changed", file=sys.stderr, flush=True)
+        return changed
+
+    def _ensure(self, rescan=False):
+        if self._signature is None:
+            self.refresh()
+        elif rescan and time.monotonic() - self._last_scan >= self.rescan_interval:
+            self.refresh()
+
+    def output_devices(self):
+        """Return the cached list of (index, name, channels, samplerate) output devices."""
+        self._ensure()
+        return list(self._output_devices)
+
+    def sapi_devices(self):
+        """Return the cached list of SAPI AudioOutput descriptions."""
+        self._ensure()
+        return [description for description, _ in self._sapi_tokens]
+
+    def find_output(self, name):
+        """Return the first output device whose name contains `name`, or None."""
+        for rescan in (False, True):
+            self._ensure(rescan)
+            for device in self._output_devices:
+                if name.lower() in device[1].lower():
+                    return device
+        return None
+
+    def output_for_sapi(self, index):
+        """Return the output device (index, name, channels, samplerate) of the SAPI device at `index`, or None.
+
+        PortAudio names are often cut short (31 characters with MME), so a
+        device matches when the SAPI description starts with its name.
+        """
+        self._ensure()
+        if not 0 <= index < len(self._sapi_tokens):
+            return None
+        description = self._sapi_tokens[index][0].lower()
+        for device in self._output_devices:
+            name = device[1].lower()
+            if name and (description.startswith(name) or description in name):
+                return device
+        return None
+
+    def sapi_token_id(self, index):
+        """Return the ID of the SAPI AudioOutput token at `index`, or None if out of range."""
+        self._ensure()
+        if 0 <= index < len(self._sapi_tokens):
+            return self._sapi_tokens[index][1]
+        return None
+
+    def sapi_token(self, index):
+        """Create the SAPI AudioOutput token at `index` on the calling thread, or None if out of range."""
+        token_id = self.sapi_token_id(index)
+        if token_id is None or not COMTYPES_AVAILABLE:
+            return None
+        token = comtypes.client.CreateObject("SAPI.SpObjectToken")
+        token.SetId(token_id)
+        return token
+
+    def find_sapi(self, name):
+        """Return the index of the first SAPI device whose description contains `name`, or None."""
+        for rescan in (False, True):
+            self._ensure(rescan)
+            for i, (description, _) in enumerate(self._sapi_tokens):
+                if name in description:
+                    return i
+        return None
+
+
+# Shared registry (enumerated lazily on first use)
+registry = DeviceRegistry()
+
+
+def read_wav(path):
+    """Read a 16-bit PCM WAV file as (mono float32 samples in [-1, 1], samplerate)."""
+    with wave.open(path, "rb") as f:
+        samplerate = f.getframerate()
+        channels = f.getnchannels()
+        width = f.getsampwidth()
+        frames = f.readframes(f.getnframes())
+    if width != 2:
+        raise ValueError(f"Unsupported sample width {width * 8} bits in {path}")
+    samples = np.frombuffer(frames, dtype="<i2").astype(np.float32) / 32768.0
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    return samples, samplerate
+
+
+def write_wav(path, samples, samplerate):
+    """Write mono float32 samples as a 16-bit PCM WAV file."""
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2")
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(samplerate)
+        f.writeframes(pcm.tobytes())
+
+
+def resample(samples, source_rate, target_rate):
+    """Linear-interpolation resampling (good enough for speech)."""
+    if source_rate == target_rate or len(samples) == 0:
+        return samples
+    count = int(round(len(samples) * target_rate / source_rate))
+    positions = np.linspace(0, len(samples) - 1, count)
+    return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+
+
+_render_lock = threading.Lock()
+# Synthesis engine shared by every render. pyttsx3.init() hands out one cached
+# engine per driver anyway; holding it here just keeps it from being rebuilt.
+_render_engine = None
+
+
+def render_speech(text, rate=120, volume=0.9, voice_id=None):
+    """Synthesize `text` once into a PCM buffer.
+
+    The pyttsx3 engine is created on the first call and reused for later
+    utterances (renders are serialized); only its properties are updated per
+    call. Call it from one thread (the speech thread) so a SAPI engine stays on
+    the COM apartment it was created in.
+
+    Returns:
+        Tuple of (mono float32 samples, samplerate)
+    """
+    global _render_engine
+    import pyttsx3
+
+    fd, path = tempfile.mkstemp(suffix=".wav")
+    os.close(fd)
+    try:
+        # pyttsx3 allows only one run loop at a time
+        with _render_lock:
+            if _render_engine is None:
+                _render_engine = pyttsx3.init()
+            engine = _render_engine
+            engine.setProperty("rate", rate)
+            engine.setProperty("volume", volume)
+            if voice_id:
+                engine.setProperty("voice", voice_id)
+            engine.save_to_file(text, path)
+            engine.runAndWait()
+        return read_wav(path)
+    finally:
+        os.remove(path)
+
+
+class Playback:
+    """Handle for a clip queued on one or more sinks."""
+
+    def __init__(self, count=1):
+        self.stopped = False
+        self._remaining = count
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        if count == 0:
+            self._done.set()
+
+    def _finished(self):
+        with self._lock:
+            self._remaining -= 1
+            if self._remaining <= 0:
+                self._done.set()
+
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        """Block until every sink finished the clip; returns False on timeout."""
+        return self._done.wait(timeout)
+
+    def stop(self):
+        """Cut the clip short; sinks drop it at their next block and waiters return now."""
+        self.stopped = True
+        self._done.set()
+
+
+class SoundDeviceSink:
+    """Non-blocking playback on a PortAudio device with a mixing queue.
+
+    A single output stream stays open; its callback mixes every active clip
+    into the output buffer, so overlapping clips play together instead of
+    queueing behind a blocking call.
+
+    Args:
+        device: PortAudio device index (None = system default)
+        samplerate: Stream sample rate (None = the device default)
+        name: Label used in logs and stats
+        blocksize: Frames per callback
+    """
+
+    def __init__(self, device=None, samplerate=None, name="default", blocksize=1024):
+        if not SOUNDDEVICE_AVAILABLE:
+            raise RuntimeError("sounddevice not available - install it or use the file/null sink")
+        self.name = name
+        if samplerate is None:
+            samplerate = int(sounddevice.query_devices(device, "output")["default_samplerate"])
+        self.samplerate = samplerate
+        self._clips = []   # [samples, position, playback]
+        self._lock = threading.Lock()
+        self.underruns = 0
+        self._stream = sounddevice.OutputStream(
+            device=device,
+            samplerate=samplerate,
+            channels=1,
+            dtype="float32",
+            blocksize=blocksize,
+            callback=self._callback,
+        )
+        self._stream.start()
+
+    def _callback(self, outdata, frames, time_info, status):
+        if status.output_underflow:
+            self.underruns += 1
+        out = outdata[:, 0]
+        out.fill(0)
+        finished = []
+        with self._lock:
+            for clip in self._clips:
+                samples, position, playback = clip
+                if playback.stopped:
+                    finished.append(clip)
+                    continue
+                chunk = samples[position:position + frames]
+                out[:len(chunk)] += chunk
+                clip[1] = position + len(chunk)
+                if clip[1] >= len(samples):
+                    finished.append(clip)
+            for clip in finished:
+                self._clips.remove(clip)
+        np.clip(out, -1.0, 1.0, out=out)
+        for clip in finished:
+            clip[2]._finished()
+
+    def play(self, samples, samplerate, playback):
+        samples = resample(samples, samplerate, self.samplerate)
+        with self._lock:
+            self._clips.append([samples, 0, playback])
+
+    def active(self):
+        with self._lock:
+            return len(self._clips)
+
+    def close(self):
+        self._stream.stop()
+        self._stream.close()
+        with self._lock:
+            clips, self._clips = self._clips, []
+        for clip in clips:
+            clip[2]._finished()
+
+
+class FileSink:
+    """Write each clip to a numbered WAV file (for testing without audio hardware)."""
+
+    def __init__(self, directory, name="file"):
+        self.name = name
+        self.directory = directory
+        self.clips = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def play(self, samples, samplerate, playback):
+        path = os.path.join(self.directory, f"clip_{self.clips:05d}.wav")
+        write_wav(path, samples, samplerate)
+        self.clips += 1
+        playback._finished()
+
+    def active(self):
+        return 0
+
+    def close(self):
+        pass
+
+
+class NullSink:
+    """Discard audio but keep counts; with `realtime=True` clips take their real duration."""
+
+    def __init__(self, name="null", realtime=False):
+        self.name = name
+        self.realtime = realtime
+        self.clips = 0
+        self.seconds = 0.0
+
+    def play(self, samples, samplerate, playback):
+        duration = len(samples) / samplerate
+        self.clips += 1
+        self.seconds += duration
+        if self.realtime:
+            threading.Timer(duration, playback._finished).start()
+        else:
+            playback._finished()
+
+    def active(self):
+        return 0
+
+    def close(self):
+        pass
+
+
+def create_sink(spec, registry=registry):
+    """Create a sink from a spec string.
+
+    Specs: "default", "null", "null:realtime", "file:<directory>",
+    "cable" (the VB-Audio "CABLE Input" device) or "device:<name or index>".
+    """
+    kind, _, argument = spec.strip().partition(":")
+    kind = kind.lower()
+    if kind == "null":
+        return NullSink(realtime=argument == "realtime")
+    if kind == "file":
+        return FileSink(argument or "tts_output")
+    if kind == "default":
+        return SoundDeviceSink(name="default")
+    if kind in ("cable", "device"):
+        target = argument or "CABLE Input"
+        if target.isdigit():
+            return SoundDeviceSink(device=int(target), name=spec)
+        device = registry.find_output(target)
+        if device is None:
+            raise RuntimeError(f"Audio output device matching {target!r} not found")
+        return SoundDeviceSink(device=device[0], samplerate=device[3], name=device[1])
+    raise ValueError(f"Unknown audio sink {spec!r}")
+
+
+class AudioOutput:
+    """Synthesize speech once and play it on several sinks at the same time.
+
+    Args:
+        sinks: Sink objects (see create_sink)
+    """
+
+    def __init__(self, sinks):
+        self.sinks = list(sinks)
+        self.utterances = 0
+        self.render_ms = 0.0
+
+    @classmethod
+    def from_specs(cls, specs, registry=registry):
+        """Build an output from sink specs, e.g. "default,cable" or ["file:out", "null"]."""
+        if isinstance(specs, str):
+            specs = [s for s in specs.split(",") if s.strip()]
+        return cls(create_sink(spec, registry) for spec in specs)
+
+    def play(self, samples, samplerate):
+        """Queue a PCM buffer on every sink; returns a Playback handle immediately."""
+        playback = Playback(len(self.sinks))
+        for sink in self.sinks:
+            sink.play(samples, samplerate, playback)
+        return playback
+
+    def speak(self, text, rate=120, volume=0.9, voice_id=None):
+        """Render `text` once and queue it on every sink; returns a Playback handle."""
+        start = time.perf_counter()
+        samples, samplerate = render_speech(text, rate=rate, volume=volume, voice_id=voice_id)
+        self.render_ms += (time.perf_counter() - start) * 1000
+        self.utterances += 1
+        return self.play(samples, samplerate)
+
+    def stats(self):
+        return {
+            "utterances": self.utterances,
+            "render_ms": round(self.render_ms, 1),
+            "sinks": [{"name": sink.name, "active": sink.active()} for sink in self.sinks],
+        }
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
@@ -1,13 +1,29 @@
 import os
+import sys
+import threading
 import time
 from openai import OpenAI
 from tts import speak_text, get_voice_id, list_sapi_devices
 
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'asl-text'))
+import metrics
+
+# LLM metrics (exposed by the process that serves metrics, e.g. the UI)
+llm_requests = metrics.counter("llm_requests_total", "Rewrite streams opened to OpenAI")
+llm_coalesced = metrics.counter("llm_coalesced_total", "Rewrite requests that joined an identical stream in flight")
+llm_errors = metrics.counter("llm_errors_total", "Rewrite requests that failed")
+llm_first_token_ms = metrics.histogram("llm_first_token_ms", "Time to first streamed token")
+llm_total_ms = metrics.histogram("llm_total_ms", "Time to last streamed token")
+
 # Global client instance (initialized on first use)
 _client = None
 # Global voice ID (initialized on first use)
 _voice_id = None
 
+# Upstream streams in flight, keyed by request, for coalescing identical rewrites
+_inflight = {}
+_inflight_lock = threading.Lock()
+
 # Prefix to prepend to all prompts
 # Using a clear structure to separate instruction from user input
 PROMPT_PREFIX = "You are a text clarity assistant. Your task is to ALWAYS rewrite the user's sentence to be clearer and more understandable. CRITICAL: You must NEVER return the original text unchanged, even if it seems clear. You must ALWAYS provide a rewritten version with improved clarity. Do not echo back the input. Do not return the same words in any form. Respond with exactly one improved sentence, nothing else.\n\nUser's sentence to rewrite: "
@@ -58,54 +74,161 @@ def get_client(api_key=None):
     return _client
 
 
-def send_prompt_and_speak_streaming(prompt, model="gpt-4o-mini", temperature=0.7, system_message=None, voice_index=1, rate=120, sapi_device_index=None):
-    """Send a prompt to OpenAI with streaming, collect the full response, then speak it all at once.
+class RewriteStreamError(RuntimeError):
+    """A shared rewrite stream failed; the original error is the `__cause__`."""
+
+
+class _Flight:
+    """One upstream OpenAI stream shared by every caller with the same request.
+
+    The stream is read on its own thread so a slow (or abandoned) caller never
+    holds up the others; tokens are appended to a list and each caller walks
+    that list at its own pace, waiting on the condition for new tokens.
+    """
+
+    def __init__(self, key):
+        self.key = key
+        self.tokens = []
+        self.done = False
+        self.error = None
+        self.condition = threading.Condition()
+
+    def run(self, messages, model, temperature):
+        try:
+            stream = get_client().chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                stream=True
+            )
+            for chunk in stream:
+                content = chunk.choices[0].delta.content
+                if content is not None:
+                    with self.condition:
+                        self.tokens.append(content)
+                        self.condition.notify_all()
+        except Exception as e:
+            llm_errors.inc()
+            self.error = e
+        finally:
+            # Later identical requests start a new stream (this is not a cache)
+            with _inflight_lock:
+                if _inflight.get(self.key) is self:
+                    del _inflight[self.key]
+            with self.condition:
+                self.done = True
+                self.condition.notify_all()
+
+    def follow(self):
+        """Yield every token of the stream, blocking until each one arrives."""
+        index = 0
+        while True:
+            with self.condition:
+                while index >= len(self.tokens) and not self.done:
+                    self.condition.wait()
+                tokens = self.tokens[index:]
+                done = self.done
+            for token in tokens:
+                yield token
+            index += len(tokens)
+            if done and index >= len(self.tokens):
+                if self.error is not None:
+                    # A fresh exception per caller: re-raising the shared one would
+                    # let every waiter's traceback pile onto the same object
+                    raise RewriteStreamError(f"Rewrite stream failed: {self.error}") from self.error
+                return
+
+
+def stream_rewrite(prompt, model="gpt-4o-mini", temperature=0.7, system_message=None):
+    """Stream the rewrite of `prompt` token by token.
+
+    Concurrent calls with the same (prompt, model, temperature, system message)
+    share one upstream stream: the first call opens it and later callers join
+    it, receiving the tokens already streamed followed by the rest as they
+    arrive. If the stream fails, every caller gets its own RewriteStreamError
+    chained from the upstream exception.
+
+    Args:
+        prompt: The user's prompt/question as a string
+        model: Model to use (must be valid; see rewrite_sentence)
+        temperature: Sampling temperature 0.0-2.0
+        system_message: Optional system message to set context
+
+    Returns:
+        Iterator over the response text chunks
+    """
+    key = (prompt, model, temperature, system_message)
+    with _inflight_lock:
+        flight = _inflight.get(key)
+        if flight is not None:
+            llm_coalesced.inc()
+            return flight.follow()
+        flight = _Flight(key)
+        _inflight[key] = flight
+        llm_requests.inc()
+
+    messages = []
+    if system_message:
+        messages.append({"role": "system", "content": system_message})
+    # Prepend the prompt with the instruction prefix
+    messages.append({"role": "user", "content": PROMPT_PREFIX + prompt})
+    threading.Thread(
+        target=flight.run, args=(messages, model, temperature), name="openai-stream", daemon=True
+    ).start()
+    return flight.follow()
+
+
+def coalescing_stats():
+    """Return request coalescing counters.
+
+    Returns:
+        Dict with 'upstream_streams' (streams opened), 'coalesced' (calls that
+        joined a stream already in flight) and 'in_flight' (open streams)
+    """
+    with _inflight_lock:
+        in_flight = len(_inflight)
+    return {
+        'upstream_streams': llm_requests.value,
+        'coalesced': llm_coalesced.value,
+        'in_flight': in_flight,
+    }
+
+
+def warm_connection():
+    """Open the API connection ahead of the first rewrite.
+    
+    Lists the models (not billed) so DNS, TCP and TLS setup are done and the
+    connection waits in the client's pool.
+    
+    Returns:
+        Elapsed time in milliseconds
+    """
+    start = time.perf_counter()
+    get_client().models.list()
+    return round((time.perf_counter() - start) * 1000, 2)
+
+
+def rewrite_sentence(prompt, model="gpt-4o-mini", temperature=0.7, system_message=None):
+    """Rewrite a recognized sentence with OpenAI (streaming), without speaking it.
+    
+    Identical concurrent requests share one upstream stream (see stream_rewrite).
     
     Args:
         prompt: The user's prompt/question as a string
         model: Model to use (default: "gpt-4o-mini"). If None or invalid, defaults to "gpt-4o-mini"
         temperature: Sampling temperature 0.0-2.0 (default: 0.7)
         system_message: Optional system message to set context
-        voice_index: Voice index to use for TTS (default: 1)
-        rate: Speech rate for TTS in words per minute (default: 120, which is 0.75x of normal 160 WPM)
-        sapi_device_index: SAPI audio output device index (default: None, uses system default)
     
     Returns:
         Tuple of (full response string, timing dict with metrics:
             - 'api_first_token_ms': Time from API call to first token received
-            - 'api_total_ms': Time from API call to last token received (total API time)
-            - 'api_to_speech_start_ms': Time from API call to when speaking starts
-            - 'speaking_total_ms': Total time spent speaking
-            - 'function_total_ms': Total function execution time)
-    
-    Raises:
-        ValueError: If the model is invalid and cannot be defaulted
+            - 'api_total_ms': Time from API call to last token received (total API time))
+        A single word is returned unchanged without an API call (timings are None).
     """
     # Check if prompt is a single word - if so, just repeat it
     words = prompt.strip().split()
     if len(words) == 1:
-        # Single word - just speak it directly without API call
-        api_call_start = time.time()
-        first_speech_start = time.time()
-        speak_start = time.time()
-        
-        # Get voice ID from the passed voice_index
-        current_voice_id = get_voice_id(voice_index)
-        speak_text(prompt.strip(), rate=rate, voice_id=current_voice_id, sapi_device_index=sapi_device_index)
-        
-        speak_end = time.time()
-        last_speech_end = speak_end
-        function_end = time.time()
-        
-        # Return timing metrics for single word case
-        timing = {
-            'api_first_token_ms': None,
-            'api_total_ms': None,
-            'api_to_speech_start_ms': round((first_speech_start - api_call_start) * 1000, 2),
-            'speaking_total_ms': round((speak_end - speak_start) * 1000, 2),
-            'function_total_ms': round((function_end - api_call_start) * 1000, 2)
-        }
-        return prompt.strip(), timing
+        return prompt.strip(), {'api_first_token_ms': None, 'api_total_ms': None}
     
     # Validate and default model if necessary
     if model is None or not is_valid_model(model):
@@ -113,76 +236,74 @@ def send_prompt_and_speak_streaming(prompt, model="gpt-4o-mini", temperature=0.7
             print(f"Warning: Invalid model '{model}', defaulting to 'gpt-4o-mini'")
         model = "gpt-4o-mini"
     
-    # Start comprehensive timing
     api_call_start = time.time()
     first_token_time = None
     last_token_time = None
-    first_speech_start = None
-    last_speech_end = None
     
-    client = get_client()
+    # Collect the full response
+    full_response = ""
+    for chunk_text in stream_rewrite(prompt, model=model, temperature=temperature, system_message=system_message):
+        # Record first token time
+        if first_token_time is None:
+            first_token_time = time.time()
+        
+        # Record last token time (updated with each chunk)
+        last_token_time = time.time()
+        
+        # Add chunk to full response
+        full_response += chunk_text
     
-    # Get voice ID from the passed voice_index (always use current voice, not cached)
-    current_voice_id = get_voice_id(voice_index)
+    timing = {
+        'api_first_token_ms': round((first_token_time - api_call_start) * 1000, 2) if first_token_time is not None else None,
+        'api_total_ms': round((last_token_time - api_call_start) * 1000, 2) if last_token_time is not None else None,
+    }
+    if timing['api_first_token_ms'] is not None:
+        llm_first_token_ms.observe(timing['api_first_token_ms'])
+        llm_total_ms.observe(timing['api_total_ms'])
+    return full_response, timing
+
+
+def send_prompt_and_speak_streaming(prompt, model="gpt-4o-mini", temperature=0.7, system_message=None, voice_index=1, rate=120, sapi_device_index=None):
+    """Send a prompt to OpenAI with streaming, collect the full response, then speak it all at once.
     
-    # Prepare messages
-    messages = []
-    if system_message:
-        messages.append({"role": "system", "content": system_message})
-    # Prepend the prompt with the instruction prefix
-    prefixed_prompt = PROMPT_PREFIX + prompt
-    messages.append({"role": "user", "content": prefixed_prompt})
+    Args:
+        prompt: The user's prompt/question as a string
+        model: Model to use (default: "gpt-4o-mini"). If None or invalid, defaults to "gpt-4o-mini"
+        temperature: Sampling temperature 0.0-2.0 (default: 0.7)
+        system_message: Optional system message to set context
+        voice_index: Voice index to use for TTS (default: 1)
+        rate: Speech rate for TTS in words per minute (default: 120, which is 0.75x of normal 160 WPM)
+        sapi_device_index: SAPI audio output device index (default: None, uses system default)
     
-    # Stream the response and collect it all
-    stream = client.chat.completions.create(
-        model=model,
-        messages=messages,
-        temperature=temperature,
-        stream=True
-    )
+    Returns:
+        Tuple of (full response string, timing dict with metrics:
+            - 'api_first_token_ms': Time from API call to first token received
+            - 'api_total_ms': Time from API call to last token received (total API time)
+            - 'api_to_speech_start_ms': Time from API call to when speaking starts
+            - 'speaking_total_ms': Total time spent speaking
+            - 'function_total_ms': Total function execution time)
     
-    # Collect the full response
-    full_response = ""
+    Raises:
+        ValueError: If the model is invalid and cannot be defaulted
+    """
+    api_call_start = time.time()
+    first_speech_start = None
+    last_speech_end = None
     
-    # Process stream chunks to collect full response
-    for chunk in stream:
-        if chunk.choices[0].delta.content is not None:
-            # Record first token time
-            if first_token_time is None:
-                first_token_time = time.time()
-            
-            # Record last token time (updated with each chunk)
-            last_token_time = time.time()
-            
-            # Add chunk to full response
-            chunk_text = chunk.choices[0].delta.content
-            full_response += chunk_text
+    # Get voice ID from the passed voice_index (always use current voice, not cached)
+    current_voice_id = get_voice_id(voice_index)
+    
+    full_response, timing = rewrite_sentence(prompt, model=model, temperature=temperature, system_message=system_message)
     
     # Speak the entire response at once
     if full_response.strip():
         first_speech_start = time.time()
-        speak_start = time.time()
         speak_text(full_response.strip(), rate=rate, voice_id=current_voice_id, sapi_device_index=sapi_device_index)
-        speak_end = time.time()
-        last_speech_end = speak_end
+        last_speech_end = time.time()
     
     # End of function timing
     function_end = time.time()
     
-    # Calculate comprehensive timing metrics
-    timing = {}
-    
-    # API timing
-    if first_token_time is not None:
-        timing['api_first_token_ms'] = round((first_token_time - api_call_start) * 1000, 2)
-    else:
-        timing['api_first_token_ms'] = None
-    
-    if last_token_time is not None:
-        timing['api_total_ms'] = round((last_token_time - api_call_start) * 1000, 2)
-    else:
-        timing['api_total_ms'] = None
-    
     # Speech timing
     if first_speech_start is not None:
         timing['api_to_speech_start_ms'] = round((first_speech_start - api_call_start) * 1000, 2)
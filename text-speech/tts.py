@@ -1,17 +1,25 @@
+import os
 import pyttsx3
 import sys
 import threading
 
-# Try to import comtypes for SAPI device selection
-try:
-    import comtypes.client
-    COMTYPES_AVAILABLE = True
-except ImportError:
-    COMTYPES_AVAILABLE = False
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'asl-text'))
+import metrics
+from audio_output import COMTYPES_AVAILABLE, AudioOutput, SoundDeviceSink, registry
 
-# Cache for VB-Audio device index (searched once at module load)
-_VB_AUDIO_DEVICE_INDEX = None
-_VB_AUDIO_SEARCHED = False
+# Speech is synthesized once to PCM and played without blocking through the
+# audio output engine. TTS_OUTPUTS picks the sinks, e.g. "default,cable" plays
+# one synthesis on the speakers and the virtual cable at once; "file:out" or
+# "null" work without audio hardware. TTS_OUTPUTS=pyttsx3 keeps the blocking
+# pyttsx3 playback, which is also the fallback when sounddevice is missing.
+TTS_OUTPUTS = os.getenv("TTS_OUTPUTS", "default")
+_audio_outputs = {}   # sapi_device_index (None = TTS_OUTPUTS) -> AudioOutput or None
+_audio_outputs_lock = threading.Lock()
+
+# Speech metrics (exposed by the process that serves metrics, e.g. the UI)
+tts_utterances = metrics.counter("tts_utterances_total", "Sentences spoken")
+tts_speak_ms = metrics.histogram("tts_speak_ms", "Time from speak_text call to end of speech (or queueing)")
+tts_render_ms = metrics.histogram("tts_render_ms", "Speech synthesis time on the audio output path")
 
 # Lock to ensure only one TTS operation at a time (prevents "run loop already started" error)
 _tts_lock = threading.Lock()
@@ -26,53 +34,22 @@ def find_vb_audio_device():
     Raises:
         RuntimeError: If "CABLE In" device is not found or comtypes is unavailable
     """
-    global _VB_AUDIO_DEVICE_INDEX, _VB_AUDIO_SEARCHED
-    
-    # Return cached value if already searched
-    if _VB_AUDIO_SEARCHED:
-        if _VB_AUDIO_DEVICE_INDEX is None:
-            raise RuntimeError("CABLE In device not found (cached result)")
-        return _VB_AUDIO_DEVICE_INDEX
-    
-    _VB_AUDIO_SEARCHED = True
-    
     if not COMTYPES_AVAILABLE:
         raise RuntimeError("comtypes not available - cannot search for CABLE In device")
-    
-    try:
-        category = comtypes.client.CreateObject("SAPI.SpObjectTokenCategory")
-        category.SetId("HKEY_LOCAL_MACHINE\\SOFTWARE\\Microsoft\\Speech\\AudioOutput", False)
-        tokens = category.EnumerateTokens()
-        
-        # Look for "CABLE In" device (required)
-        for i in range(tokens.Count):
-            token = tokens.Item(i)
-            description = token.GetDescription()
-            # Must have "CABLE In" in the description
-            if "CABLE In" in description:
-                _VB_AUDIO_DEVICE_INDEX = i
-                print(f"[DEBUG] Found CABLE In device: [{i}] {description}", file=sys.stderr, flush=True)
-                return i
-        
-        # If we get here, no CABLE In device was found
-        available_devices = []
-        for i in range(tokens.Count):
-            token = tokens.Item(i)
-            description = token.GetDescription()
-            available_devices.append(f"  [{i}] {description}")
-        
-        error_msg = (
-            "CABLE In device not found. Available SAPI audio output devices:\n" +
-            "\n".join(available_devices) +
-            "\n\nPlease ensure VB-Audio Virtual Cable is installed and configured."
-        )
-        raise RuntimeError(error_msg)
-        
-    except RuntimeError:
-        # Re-raise RuntimeError (our custom errors)
-        raise
-    except Exception as e:
-        raise RuntimeError(f"Error searching for CABLE In device: {e}") from e
+
+    # The registry enumerates once and rescans (rate-limited) only on a miss
+    index = registry.find_sapi("CABLE In")
+    if index is not None:
+        print(f"[DEBUG] Found CABLE In device: [{index}] {registry.sapi_devices()[index]}", file=sys.stderr, flush=True)
+        return index
+
+    available_devices = [f"  [{i}] {d}" for i, d in enumerate(registry.sapi_devices())]
+    error_msg = (
+        "CABLE In device not found. Available SAPI audio output devices:\n" +
+        "\n".join(available_devices) +
+        "\n\nPlease ensure VB-Audio Virtual Cable is installed and configured."
+    )
+    raise RuntimeError(error_msg)
 
 
 def list_sapi_devices():
@@ -86,24 +63,44 @@ def list_sapi_devices():
         return []
     
     devices = []
-    try:
-        category = comtypes.client.CreateObject("SAPI.SpObjectTokenCategory")
-        category.SetId("HKEY_LOCAL_MACHINE\\SOFTWARE\\Microsoft\\Speech\\AudioOutput", False)
-        tokens = category.EnumerateTokens()
-        
-        print("\nAvailable SAPI Audio Output Devices:", file=sys.stderr, flush=True)
-        for i in range(tokens.Count):
-            token = tokens.Item(i)
-            token_id = token.Id
-            description = token.GetDescription()
-            devices.append((i, token_id, description, token))
-            print(f"  [{i}] {description}", file=sys.stderr, flush=True)
-    except Exception as e:
-        print(f"Error listing SAPI devices: {e}", file=sys.stderr, flush=True)
-    
+    print("\nAvailable SAPI Audio Output Devices:", file=sys.stderr, flush=True)
+    for i, description in enumerate(registry.sapi_devices()):
+        devices.append((i, registry.sapi_token_id(i), description, registry.sapi_token(i)))
+        print(f"  [{i}] {description}", file=sys.stderr, flush=True)
     return devices
 
 
+def get_audio_output(sapi_device_index=None):
+    """Return the shared AudioOutput for one route (created on first use).
+
+    Args:
+        sapi_device_index: SAPI audio output device to speak on (e.g. the CABLE
+            In index from find_vb_audio_device); it is mapped to the matching
+            output device. None uses the sinks in TTS_OUTPUTS.
+
+    Returns:
+        AudioOutput, or None when speech uses blocking pyttsx3 playback
+    """
+    with _audio_outputs_lock:
+        if sapi_device_index in _audio_outputs:
+            return _audio_outputs[sapi_device_index]
+        output = None
+        if TTS_OUTPUTS != "pyttsx3":
+            try:
+                device = None if sapi_device_index is None else registry.output_for_sapi(sapi_device_index)
+                if device is not None:
+                    output = AudioOutput([SoundDeviceSink(device=device[0], samplerate=device[3], name=device[1])])
+                else:
+                    if sapi_device_index is not None:
+                        print(f"[DEBUG] No output device matches SAPI device {sapi_device_index}, "
+                              f"using TTS_OUTPUTS={TTS_OUTPUTS}", file=sys.stderr, flush=True)
+                    output = AudioOutput.from_specs(TTS_OUTPUTS)
+            except Exception as e:
+                print(f"[DEBUG] Audio output unavailable ({e}), using pyttsx3 playback", file=sys.stderr, flush=True)
+        _audio_outputs[sapi_device_index] = output
+        return output
+
+
 def get_voice_id(voice_index=1):
     """Get the voice ID for the specified voice index.
     
@@ -122,7 +119,7 @@ def get_voice_id(voice_index=1):
     return voice_id
 
 
-def speak_text(text, rate=120, volume=0.9, voice_id=None, sapi_device_index=None):
+def speak_text(text, rate=120, volume=0.9, voice_id=None, sapi_device_index=None, wait=True):
     """Speak the given text using TTS.
     
     Args:
@@ -131,9 +128,24 @@ def speak_text(text, rate=120, volume=0.9, voice_id=None, sapi_device_index=None
         volume: Volume level 0.0 to 1.0 (default: 0.9)
         voice_id: Voice ID to use (default: None, uses default voice)
         sapi_device_index: SAPI audio output device index (default: None, auto-finds VB-Audio or uses default)
+        wait: Block until playback finished (only audio output playback can return early)
+
+    Returns:
+        Playback handle on the audio output path, None with pyttsx3 playback
     """
+    tts_utterances.inc()
+    output = get_audio_output(sapi_device_index)
+    if output is not None:
+        with tts_speak_ms.time():
+            # Synthesize once to PCM; every sink of the route plays it without blocking
+            with tts_render_ms.time():
+                playback = output.speak(text, rate=rate, volume=volume, voice_id=voice_id)
+            if wait:
+                playback.wait()
+        return playback
+
     # Use lock to ensure only one TTS operation at a time (prevents "run loop already started" error)
-    with _tts_lock:
+    with _tts_lock, tts_speak_ms.time():
         # Create a new engine instance for each utterance to avoid Windows pyttsx3 issues
         engine = pyttsx3.init()
         engine.setProperty("rate", rate)
@@ -148,14 +160,11 @@ def speak_text(text, rate=120, volume=0.9, voice_id=None, sapi_device_index=None
                 print(f"[DEBUG] Using explicitly specified SAPI device at index {sapi_device_index}", 
                       file=sys.stderr, flush=True)
                 
-                # Get SAPI audio output tokens using comtypes
-                category = comtypes.client.CreateObject("SAPI.SpObjectTokenCategory")
-                category.SetId("HKEY_LOCAL_MACHINE\\SOFTWARE\\Microsoft\\Speech\\AudioOutput", False)
-                tokens = category.EnumerateTokens()
+                # Token resolved on this thread from the ID cached by the registry
+                selected_token = registry.sapi_token(sapi_device_index)
                 
-                if 0 <= sapi_device_index < tokens.Count:
-                    selected_token = tokens.Item(sapi_device_index)
-                    device_description = selected_token.GetDescription()
+                if selected_token is not None:
+                    device_description = registry.sapi_devices()[sapi_device_index]
                     print(f"[DEBUG] Setting SAPI device: [{sapi_device_index}] {device_description}", 
                           file=sys.stderr, flush=True)
                     # Access the SAPI Voice object and set AudioOutput
@@ -163,7 +172,7 @@ def speak_text(text, rate=120, volume=0.9, voice_id=None, sapi_device_index=None
                     voice.AudioOutput = selected_token
                     print("[DEBUG] SAPI device set successfully", file=sys.stderr, flush=True)
                 else:
-                    print(f"[DEBUG] Warning: Device index {sapi_device_index} out of range (0-{tokens.Count-1}), using default", 
+                    print(f"[DEBUG] Warning: Device index {sapi_device_index} out of range (0-{len(registry.sapi_devices())-1}), using default", 
                           file=sys.stderr, flush=True)
             except Exception as e:
                 # If device selection fails, continue with default device
@@ -1,24 +1,30 @@
+import os
+import sys
+
 import cv2
 import pyvirtualcam
 import zmq
 
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'asl-text'))
+from capture import CaptureConfig, open_capture
+
 context = zmq.Context()
 socket = context.socket(zmq.PUB)
 socket.bind("tcp://127.0.0.1:5555")
 
-cap = cv2.VideoCapture(0)
+cap = open_capture(CaptureConfig.from_env())
 if not cap.isOpened():
     raise RuntimeError("Could not open webcam")
 
-width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-fps = int(cap.get(cv2.CAP_PROP_FPS) or 30)
+width = cap.width
+height = cap.height
+fps = cap.fps
 
 with pyvirtualcam.Camera(width=width, height=height, fps=fps) as cam:
     print("Virtual camera:", cam.device)
 
     while True:
-        ret, frame = cap.read()
+        ret, frame, capture_time = cap.read()
         if not ret:
             break
 
@@ -0,0 +1,14 @@
+"""Put the sibling asl-text and text-speech directories on sys.path.
+
+UI modules import this first (`import _paths`) instead of each adding the
+directories themselves; asl-text takes precedence.
+"""
+import os
+import sys
+
+_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+for _name in ("text-speech", "asl-text"):
+    _path = os.path.normpath(os.path.join(_ROOT, _name))
+    if _path not in sys.path:
+        sys.path.insert(0, _path)
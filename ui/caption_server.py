@@ -0,0 +1,339 @@
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import struct
+import threading
+import time
+from collections import deque
+
+import _paths  # puts asl-text on sys.path
+import metrics
+
+# Event kinds
+TOKEN = "token"          # one recognized word
+PARTIAL = "partial"      # the sentence so far (supersedes earlier partials and tokens)
+SENTENCE = "sentence"    # finished sentence as recognized
+REWRITE = "rewrite"      # finished sentence after the LLM rewrite
+
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+HEARTBEAT_INTERVAL = 15.0
+
+OVERLAY_PAGE = """<!doctype html>
+<html><head><meta charset="utf-8"><title>SignSync captions</title>
+<style>
+body { margin: 0; background: transparent; font: 32px 'Open Sans', sans-serif; color: #fff; }
+#captions { position: fixed; bottom: 5%; width: 100%; text-align: center; text-shadow: 0 0 6px #000; }
+#partial { opacity: 0.7; }
+</style></head>
+<body><div id="captions"><div id="final"></div><div id="partial"></div></div>
+<script>
+const source = new EventSource("/events");
+const final = document.getElementById("final"), partial = document.getElementById("partial");
+source.addEventListener("partial", e => { partial.textContent = JSON.parse(e.data).text; });
+source.addEventListener("sentence", e => { final.textContent = JSON.parse(e.data).text; partial.textContent = ""; });
+source.addEventListener("rewrite", e => { final.textContent = JSON.parse(e.data).text; });
+</script></body></html>
+"""
+
+
+class _Client:
+    """Bounded event queue of one subscriber.
+
+    When the queue is full, events that a newer one makes redundant are merged
+    away first: a queued partial is replaced by the next partial, and queued
+    tokens are dropped (the partial that follows contains them). A client whose
+    queue is still full holds only unsent final sentences and is dropped.
+    """
+
+    def __init__(self, kind, peer, writer, max_queue):
+        self.kind = kind
+        self.peer = peer
+        self.writer = writer
+        self.max_queue = max_queue
+        self.queue = deque()
+        self.wakeup = asyncio.Event()
+        self.closed = False
+        self.merged = 0
+
+    def offer(self, event):
+        """Queue an event; returns False if the client has to be dropped."""
+        if event["kind"] == PARTIAL:
+            # Only the newest partial matters: replace one still waiting
+            for i in range(len(self.queue) - 1, -1, -1):
+                if self.queue[i]["kind"] == PARTIAL:
+                    self.queue[i] = event
+                    self.merged += 1
+                    self.wakeup.set()
+                    return True
+        if len(self.queue) >= self.max_queue:
+            kept = deque(e for e in self.queue if e["kind"] != TOKEN)
+            self.merged += len(self.queue) - len(kept)
+            self.queue = kept
+            if len(self.queue) >= self.max_queue:
+                return False
+        self.queue.append(event)
+        self.wakeup.set()
+        return True
+
+
+class CaptionServer:
+    """Broadcast live captions over Server-Sent Events and WebSockets.
+
+    Runs an asyncio loop on its own thread. `publish()` can be called from
+    any thread and never blocks: it hands the event to the loop, which puts
+    it in every subscriber's bounded queue (see _Client), and each subscriber
+    is written by its own coroutine, so a slow client only delays itself.
+
+    Endpoints:
+      - /events: SSE stream (event name = kind, data = JSON)
+      - /ws: WebSocket, one JSON text message per event
+      - /stats: JSON counters
+      - /: minimal caption overlay page (e.g. an OBS browser source)
+
+    Args:
+        port: TCP port
+        host: Interface to bind
+        max_queue: Events queued per client before merging / dropping
+    """
+
+    def __init__(self, port, host="127.0.0.1", max_queue=64):
+        self.host = host
+        self.port = port
+        self.max_queue = max_queue
+        self.clients = set()
+        self.published = 0
+        self.delivered = 0
+        self.merged = 0
+        self.dropped = 0
+        self._seq = 0
+        self._loop = None
+        self._server = None
+        self._error = None
+        self._ready = threading.Event()
+        self.fanout_ms = metrics.histogram("captions_fanout_ms", "Publish to socket write per caption event")
+        self.clients_gauge = metrics.gauge("captions_clients", "Connected caption subscribers")
+
+    def start(self):
+        """Start the server thread and wait until it listens.
+
+        Raises:
+            OSError: If the port cannot be bound (publish() then does nothing)
+        """
+        threading.Thread(target=self._run, name="caption-server", daemon=True).start()
+        self._ready.wait(5)
+        if self._error is not None:
+            raise self._error
+        return self
+
+    def _run(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            self._server = loop.run_until_complete(asyncio.start_server(self._handle, self.host, self.port))
+            # Only set once listening, so publish() never queues onto a dead loop
+            self._loop = loop
+        except Exception as e:
+            self._error = e
+            loop.close()
+            return
+        finally:
+            self._ready.set()
+        loop.run_forever()
+
+    def stop(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._shutdown)
+
+    def _shutdown(self):
+        self._server.close()
+        for client in list(self.clients):
+            self._drop(client)
+        self._loop.stop()
+
+    def publish(self, kind, text, **fields):
+        """Broadcast one caption event (thread-safe, returns immediately)."""
+        if self._loop is None:
+            return
+        event = {"kind": kind, "text": text, "time": time.time(), **fields}
+        self._loop.call_soon_threadsafe(self._fanout, event, time.perf_counter())
+
+    def _fanout(self, event, published_at):
+        self._seq += 1
+        event["seq"] = self._seq
+        event["_published"] = published_at
+        self.published += 1
+        for client in list(self.clients):
+            before = client.merged
+            if not client.offer(event):
+                print(f"Caption client {client.peer} too slow, dropped")
+                self.dropped += 1
+                self._drop(client)
+                # The pump may be stuck waiting for the socket: cut it off
+                client.writer.transport.abort()
+            self.merged += client.merged - before
+
+    def _drop(self, client):
+        client.closed = True
+        client.wakeup.set()
+        self.clients.discard(client)
+        self.clients_gauge.set(len(self.clients))
+
+    def stats(self):
+        return {
+            "clients": len(self.clients),
+            "published": self.published,
+            "delivered": self.delivered,
+            "merged": self.merged,
+            "dropped_clients": self.dropped,
+            "fanout_p50_ms": self.fanout_ms.quantile(0.5),
+            "fanout_p95_ms": self.fanout_ms.quantile(0.95),
+        }
+
+    async def _handle(self, reader, writer):
+        peer = writer.get_extra_info("peername")
+        try:
+            request = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), 10)
+            lines = request.decode("latin-1").split("\r\n")
+            path = lines[0].split()[1] if len(lines[0].split()) > 1 else "/"
+            headers = {}
+            for line in lines[1:]:
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+            if path.startswith("/events"):
+                await self._serve_sse(writer, peer)
+            elif path.startswith("/ws") and headers.get("upgrade", "").lower() == "websocket":
+                await self._serve_websocket(reader, writer, peer, headers)
+            elif path.startswith("/stats"):
+                self._respond(writer, "200 OK", "application/json", json.dumps(self.stats()).encode("utf-8"))
+            elif path == "/" or path.startswith("/?"):
+                self._respond(writer, "200 OK", "text/html; charset=utf-8", OVERLAY_PAGE.encode("utf-8"))
+            else:
+                self._respond(writer, "404 Not Found", "text/plain", b"not found")
+            await writer.drain()
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError,
+                ConnectionError, IndexError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    def _respond(writer, status, content_type, body):
+        writer.write(
+            f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\nContent-Length: {len(body)}\r\n"
+            f"Access-Control-Allow-Origin: *\r\nConnection: close\r\n\r\n".encode("latin-1") + body
+        )
+
+    def _subscribe(self, kind, peer, writer):
+        client = _Client(kind, peer, writer, self.max_queue)
+        self.clients.add(client)
+        self.clients_gauge.set(len(self.clients))
+        return client
+
+    async def _pump(self, client, writer, encode, heartbeat):
+        """Write queued events to one client until it disconnects or is dropped."""
+        try:
+            while not client.closed:
+                if not client.queue:
+                    client.wakeup.clear()
+                    try:
+                        await asyncio.wait_for(client.wakeup.wait(), HEARTBEAT_INTERVAL)
+                    except asyncio.TimeoutError:
+                        writer.write(heartbeat)
+                        await writer.drain()
+                    continue
+                # Write everything queued, then wait for the socket once
+                events = list(client.queue)
+                client.queue.clear()
+                writer.write(b"".join(encode(e) for e in events))
+                await writer.drain()
+                now = time.perf_counter()
+                for event in events:
+                    self.fanout_ms.observe((now - event["_published"]) * 1000)
+                self.delivered += len(events)
+        except ConnectionError:
+            pass
+        finally:
+            self._drop(client)
+
+    @staticmethod
+    def _public(event):
+        return json.dumps({k: v for k, v in event.items() if not k.startswith("_")})
+
+    async def _serve_sse(self, writer, peer):
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-cache\r\n"
+            b"Access-Control-Allow-Origin: *\r\nConnection: keep-alive\r\n\r\n"
+        )
+        await writer.drain()
+
+        def encode(event):
+            return f"id: {event['seq']}\nevent: {event['kind']}\ndata: {self._public(event)}\n\n".encode("utf-8")
+
+        await self._pump(self._subscribe("sse", peer, writer), writer, encode, b": keepalive\n\n")
+
+    async def _serve_websocket(self, reader, writer, peer, headers):
+        key = headers.get("sec-websocket-key", "")
+        accept = base64.b64encode(hashlib.sha1((key + WEBSOCKET_GUID).encode("ascii")).digest()).decode("ascii")
+        writer.write(
+            "HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {accept}\r\n\r\n".encode("ascii")
+        )
+        await writer.drain()
+
+        client = self._subscribe("websocket", peer, writer)
+        listener = asyncio.ensure_future(self._read_websocket(reader, writer, client))
+        try:
+            await self._pump(client, writer, lambda e: _websocket_frame(0x1, self._public(e).encode("utf-8")),
+                             _websocket_frame(0x9, b""))
+        finally:
+            listener.cancel()
+
+    async def _read_websocket(self, reader, writer, client):
+        """Handle control frames from a WebSocket client (messages are ignored)."""
+        try:
+            while not client.closed:
+                header = await reader.readexactly(2)
+                opcode, length = header[0] & 0x0F, header[1] & 0x7F
+                if length == 126:
+                    length = struct.unpack(">H", await reader.readexactly(2))[0]
+                elif length == 127:
+                    length = struct.unpack(">Q", await reader.readexactly(8))[0]
+                mask = await reader.readexactly(4) if header[1] & 0x80 else b"\0\0\0\0"
+                payload = bytes(b ^ mask[i % 4] for i, b in enumerate(await reader.readexactly(length)))
+                if opcode == 0x8:
+                    writer.write(_websocket_frame(0x8, payload[:2]))
+                    break
+                if opcode == 0x9:
+                    writer.write(_websocket_frame(0xA, payload))
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        self._drop(client)
+
+
+def _websocket_frame(opcode, payload):
+    # Server frames are final and unmasked
+    length = len(payload)
+    if length < 126:
+        header = struct.pack(">BB", 0x80 | opcode, length)
+    elif length < 1 << 16:
+        header = struct.pack(">BBH", 0x80 | opcode, 126, length)
+    else:
+        header = struct.pack(">BBQ", 0x80 | opcode, 127, length)
+    return header + payload
+
+
+def start_from_env(prefix="UI_"):
+    """Start a CaptionServer on <prefix>CAPTIONS_PORT (None if unset or the port is taken)."""
+    port = os.getenv(prefix + "CAPTIONS_PORT")
+    if not port:
+        return None
+    try:
+        server = CaptionServer(int(port), max_queue=int(os.getenv(prefix + "CAPTIONS_QUEUE", "64"))).start()
+    except OSError as e:
+        print(f"Captions disabled, cannot listen on port {port}: {e}")
+        return None
+    print(f"Captions on http://127.0.0.1:{port}/ (SSE /events, WebSocket /ws)")
+    return server
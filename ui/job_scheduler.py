@@ -0,0 +1,279 @@
+import heapq
+import itertools
+import threading
+import time
+from collections import OrderedDict
+
+# Job priorities (lower runs first)
+LIVE = 0       # recognized sentences and status announcements, spoken in order
+SAMPLE = 1     # voice samples, spoken when no live speech is waiting
+
+# Job states
+PENDING = "pending"
+REWRITING = "rewriting"
+READY = "ready"
+SPEAKING = "speaking"
+DONE = "done"
+CANCELLED = "cancelled"
+FAILED = "failed"
+
+
+class SpeechJob:
+    """One sentence moving through the rewrite and speech stages."""
+
+    def __init__(self, seq, text, priority, rewrite_options, speak_options):
+        self.seq = seq
+        self.text = text
+        self.priority = priority
+        self.rewrite_options = rewrite_options    # None = speak the text as-is
+        self.speak_options = speak_options
+        self.state = PENDING
+        self.output = None          # text to speak once rewritten
+        self.error = None
+        self.created = time.monotonic()
+        self.speech_started = None
+        self.playback = None        # handle returned by the speak callable, if any
+        self.stop_requested = False  # superseded while speaking
+
+    @property
+    def cancelled(self):
+        return self.state == CANCELLED
+
+
+class JobScheduler:
+    """Bounded two-stage pipeline: parallel LLM rewrites, ordered speech.
+
+    A small worker pool runs rewrites concurrently, highest priority first. A
+    single speech thread speaks live jobs strictly in submission order, so a
+    slow rewrite holds back later sentences instead of letting them jump
+    ahead; voice samples are spoken only while no live job is waiting.
+
+    Stale work is dropped rather than queued: when more than `max_live` live
+    jobs are pending the oldest are cancelled, live jobs older than `max_age`
+    seconds are skipped, and a new voice sample replaces any earlier sample.
+    This includes the job being spoken when the speak callable returns a
+    playback handle (an object with `wait(timeout)` and `stop()`, such as
+    audio_output.Playback): the utterance is stopped, and a live job runs
+    past `max_age` only while no newer live job is waiting.
+
+    Args:
+        rewrite: Callable (text, **rewrite_options) -> text for jobs that need rewriting
+        speak: Callable (text, **speak_options) that either blocks while speaking
+            and returns None, or starts playback and returns its handle
+        workers: Rewrite threads
+        max_live: Maximum live jobs waiting to be spoken
+        max_age: Seconds after which an unspoken live job is dropped (None = never)
+    """
+
+    def __init__(self, rewrite, speak, workers=2, max_live=4, max_age=20.0):
+        self.rewrite_fn = rewrite
+        self.speak_fn = speak
+        self.max_live = max_live
+        self.max_age = max_age
+
+        self._condition = threading.Condition()
+        self._rewrite_queue = []            # heap of (priority, seq, job)
+        self._live = OrderedDict()          # seq -> live job not yet spoken
+        self._samples = OrderedDict()       # seq -> sample job not yet spoken
+        self._sequence = itertools.count()
+        self._running = True
+
+        # Metrics
+        self.submitted = 0
+        self.completed = 0
+        self.cancelled = 0
+        self.failed = 0
+        self.max_depth = 0
+        self._latencies = []                # submit -> speech start (seconds), recent jobs
+
+        self._threads = [
+            threading.Thread(target=self._rewrite_worker, name=f"rewrite-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        self._threads.append(threading.Thread(target=self._speech_worker, name="speech", daemon=True))
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, text, priority=LIVE, rewrite=None, **speak_options):
+        """Queue a sentence; returns the SpeechJob immediately.
+
+        Args:
+            text: Sentence to speak
+            priority: LIVE or SAMPLE
+            rewrite: Keyword arguments for the rewrite callable (None = no rewrite)
+            **speak_options: Keyword arguments for the speak callable
+        """
+        with self._condition:
+            job = SpeechJob(next(self._sequence), text, priority, rewrite, speak_options)
+            self.submitted += 1
+            if priority == LIVE:
+                self._live[job.seq] = job
+                # Too far behind: drop the oldest sentences that have not started speaking
+                pending = [j for j in self._live.values() if not j.stop_requested]
+                excess = len(pending) - self.max_live
+                for stale in pending[:max(0, excess)]:
+                    self._cancel(stale)
+            else:
+                # Only the latest voice sample is worth hearing
+                for queued in list(self._samples.values()):
+                    self._cancel(queued)
+                self._samples[job.seq] = job
+
+            if rewrite is not None:
+                heapq.heappush(self._rewrite_queue, (priority, job.seq, job))
+            else:
+                job.output = text
+                job.state = READY
+            self.max_depth = max(self.max_depth, len(self._live) + len(self._samples))
+            self._condition.notify_all()
+            return job
+
+    def _cancel(self, job):
+        # Caller holds the condition
+        if job.state in (DONE, CANCELLED, FAILED):
+            return
+        if job.state == SPEAKING:
+            # The speech thread finishes the job; a blocking speak callable cannot be cut short
+            job.stop_requested = True
+            if job.playback is not None:
+                job.playback.stop()
+            return
+        job.state = CANCELLED
+        self.cancelled += 1
+        self._live.pop(job.seq, None)
+        self._samples.pop(job.seq, None)
+        self._condition.notify_all()
+
+    def cancel_all(self, priority=None):
+        """Cancel every unspoken job and stop the one speaking (optionally only one priority)."""
+        with self._condition:
+            for jobs in (self._live, self._samples):
+                for job in list(jobs.values()):
+                    if priority is None or job.priority == priority:
+                        self._cancel(job)
+
+    def _rewrite_worker(self):
+        while True:
+            with self._condition:
+                while self._running and not self._rewrite_queue:
+                    self._condition.wait()
+                if not self._running:
+                    return
+                _, _, job = heapq.heappop(self._rewrite_queue)
+                if job.cancelled:
+                    continue
+                job.state = REWRITING
+
+            try:
+                output = self.rewrite_fn(job.text, **job.rewrite_options)
+                error = None
+            except Exception as e:
+                # Fall back to speaking the recognized text as-is
+                output, error = job.text, e
+                print(f"Error rewriting '{job.text}': {e}")
+
+            with self._condition:
+                if job.cancelled:
+                    continue
+                job.output = output
+                job.error = error
+                job.state = READY
+                self._condition.notify_all()
+
+    def _next_to_speak(self):
+        # Caller holds the condition. Drops stale jobs; returns a ready job or None.
+        now = time.monotonic()
+        while self._live:
+            job = next(iter(self._live.values()))
+            if self.max_age is not None and now - job.created > self.max_age:
+                self._cancel(job)
+                continue
+            # Live speech stays in order: wait for the oldest live job
+            return job if job.state == READY else None
+        for job in self._samples.values():
+            if job.state == READY:
+                return job
+        return None
+
+    def _speech_worker(self):
+        while True:
+            with self._condition:
+                job = None
+                while self._running:
+                    job = self._next_to_speak()
+                    if job is not None:
+                        break
+                    # Wake up periodically so max_age applies to jobs stuck in a rewrite
+                    self._condition.wait(timeout=1.0)
+                if not self._running:
+                    return
+                job.state = SPEAKING
+                job.speech_started = time.monotonic()
+                self._latencies.append(job.speech_started - job.created)
+                del self._latencies[:-100]
+
+            try:
+                if job.output and job.output.strip():
+                    playback = self.speak_fn(job.output.strip(), **job.speak_options)
+                    if playback is not None:
+                        self._wait_for_playback(job, playback)
+                state = CANCELLED if job.stop_requested else DONE
+            except Exception as e:
+                print(f"Error speaking '{job.output}': {e}")
+                job.error = e
+                state = FAILED
+
+            with self._condition:
+                job.state = state
+                if state == DONE:
+                    self.completed += 1
+                elif state == CANCELLED:
+                    self.cancelled += 1
+                else:
+                    self.failed += 1
+                self._live.pop(job.seq, None)
+                self._samples.pop(job.seq, None)
+                self._condition.notify_all()
+
+    def _wait_for_playback(self, job, playback):
+        with self._condition:
+            job.playback = playback
+            if job.stop_requested:
+                playback.stop()
+        while not playback.wait(0.25):
+            with self._condition:
+                # Past max_age with a newer live sentence waiting: stop and move on
+                if (job.priority == LIVE and self.max_age is not None and len(self._live) > 1
+                        and time.monotonic() - job.created > self.max_age):
+                    self._cancel(job)
+
+    def metrics(self):
+        """Queue depths, counters and submit-to-speech latency."""
+        with self._condition:
+            latencies = sorted(self._latencies)
+            return {
+                "live_waiting": len(self._live),
+                "samples_waiting": len(self._samples),
+                "rewrite_queue": len(self._rewrite_queue),
+                "max_depth": self.max_depth,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "cancelled": self.cancelled,
+                "failed": self.failed,
+                "latency_p50_ms": round(latencies[len(latencies) // 2] * 1000, 1) if latencies else None,
+                "latency_max_ms": round(latencies[-1] * 1000, 1) if latencies else None,
+            }
+
+    def shutdown(self, timeout=1.0):
+        """Cancel pending work, stop the current playback and stop the threads.
+
+        Speech from a blocking speak callable finishes on its own.
+        """
+        with self._condition:
+            self._running = False
+            for jobs in (self._live, self._samples):
+                for job in list(jobs.values()):
+                    self._cancel(job)
+            self._condition.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
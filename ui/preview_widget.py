@@ -0,0 +1,92 @@
+from PyQt6 import sip
+from PyQt6.QtCore import Qt, QTimer, QRectF
+from PyQt6.QtGui import QImage, QPainter
+from PyQt6.QtWidgets import QSizePolicy, QWidget
+
+import _paths  # puts asl-text on sys.path
+from frame_share import FrameShareReader
+
+
+class PreviewWidget(QWidget):
+    """Camera preview painted straight from the recognizer's shared memory.
+
+    A timer polls the frame sequence number at most `max_fps` times a second
+    and only schedules a repaint (coalesced by Qt) when a new frame arrived.
+    The QImage wraps the shared buffer directly, so no frame is copied into
+    Python or Qt before it is drawn.
+
+    Args:
+        max_fps: Maximum repaint rate
+    """
+
+    def __init__(self, max_fps=15, parent=None):
+        super().__init__(parent)
+        self.reader = None
+        self._last_seq = -1
+        self.frames_painted = 0
+        self.setMinimumHeight(120)
+        self.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
+        self.setAttribute(Qt.WidgetAttribute.WA_OpaquePaintEvent)
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(max(1, int(1000 / max_fps)))
+        self._timer.timeout.connect(self._poll)
+
+    def attach(self, name):
+        """Attach to the shared memory segment announced by the recognizer."""
+        self.detach()
+        self.reader = FrameShareReader(name)
+        self._last_seq = -1
+        if self.isVisible():
+            self._timer.start()
+
+    def detach(self):
+        self._timer.stop()
+        if self.reader is not None:
+            self.reader.close()
+            self.reader = None
+        self.update()
+
+    def showEvent(self, event):
+        if self.reader is not None:
+            self._timer.start()
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        # Nothing to poll while hidden (the recognizer also stops rendering)
+        self._timer.stop()
+        super().hideEvent(event)
+
+    def _poll(self):
+        if self.reader is not None and self.reader.sequence() != self._last_seq:
+            self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), Qt.GlobalColor.black)
+        if self.reader is None or self.reader.sequence() == 0:
+            painter.end()
+            return
+
+        seq, frame = self.reader.latest()
+        reader = self.reader
+        image = QImage(
+            sip.voidptr(frame.ctypes.data),
+            reader.width,
+            reader.height,
+            reader.bytes_per_line,
+            QImage.Format.Format_BGR888,
+        )
+
+        # Letterbox into the widget, keeping the aspect ratio
+        scale = min(self.width() / reader.width, self.height() / reader.height)
+        w, h = reader.width * scale, reader.height * scale
+        target = QRectF((self.width() - w) / 2, (self.height() - h) / 2, w, h)
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+        painter.drawImage(target, image)
+        painter.end()
+
+        # The image must not outlive the frame view it points into
+        del image, frame
+        self._last_seq = seq
+        self.frames_painted += 1
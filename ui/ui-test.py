@@ -1,11 +1,18 @@
+import time
+
+# Startup time is measured from here, before any heavy import
+STARTUP_START = time.perf_counter()
+
 from PyQt6.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
     QComboBox, QSpacerItem, QSizePolicy, QTextEdit, QCheckBox
 )
 from PyQt6.QtGui import QIcon, QFontMetrics, QFont, QFontDatabase
-from PyQt6.QtCore import Qt, QPoint, pyqtSignal, QObject
+from PyQt6.QtCore import Qt, QPoint, QTimer, pyqtSignal, QObject
 import sys
 import os
+import importlib
+import json
 import threading
 import subprocess
 from qt_material import apply_stylesheet
@@ -17,14 +24,22 @@ if sys.platform == "win32":
     except Exception:
         pass
 
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'text-speech'))
-from tts import speak_text, get_voice_id, find_vb_audio_device
-from openai_client import get_client, send_prompt_and_speak_streaming
+import _paths  # puts asl-text and text-speech on sys.path
+import metrics
+# tts and openai_client (pyttsx3, openai) are imported by the warm-up threads
+# once the window is on screen, see start_warmup
+from job_scheduler import LIVE, SAMPLE, JobScheduler
+from preview_widget import PreviewWidget
+import caption_server
 
 
 class MainWindow(QWidget):
     # Signal for handling sentences from background thread
     sentence_received = pyqtSignal(str)
+    # Signal carrying the recognizer's shared memory preview segment name
+    preview_announced = pyqtSignal(str)
+    # Signal carrying (component, result or exception, milliseconds) from warm-up
+    warmup_finished = pyqtSignal(str, object, float)
     
     def __init__(self):
         super().__init__()
@@ -70,6 +85,7 @@ class MainWindow(QWidget):
         self.voice_dropdown = None
         self.speed_dropdown = None
         self.nlp_dropdown = None
+        self.model_dropdown = None
         self.current_voice_id = None
         self.cable_in_device_index = None
         self.use_cable_in_for_sample = False
@@ -83,15 +99,32 @@ class MainWindow(QWidget):
         self.asl_thread = None
         self.show_camera = False  # Camera display toggle
 
+        # One bounded pipeline for all speech: parallel rewrites, ordered playback
+        self.speech_jobs = JobScheduler(self._rewrite_for_job, self._speak_for_job)
+
+        # Metrics endpoint (UI_METRICS_PORT / UI_METRICS_FILE) with LLM, TTS and queue metrics
+        metrics.serve_from_env("UI_")
+        self.metrics_timer = QTimer(self)
+        self.metrics_timer.timeout.connect(self.update_speech_metrics)
+        self.metrics_timer.start(1000)
+
+        # Live captions for browser overlays (UI_CAPTIONS_PORT): SSE on /events, WebSocket on /ws
+        self.captions = caption_server.start_from_env("UI_")
+
+        # Warm-up state: component -> None (pending), "ready" or "failed"
+        self.warming = {"tts": None, "openai": None, "recognizer": None}
+        self.startup = {}
+
         self.init_ui()
-        self.initialize_tts()
-        self.initialize_nlp()
         
         # Connect signal to handler (thread-safe GUI update)
         self.sentence_received.connect(self.handle_line)
+        self.preview_announced.connect(self.preview_widget.attach)
+        self.warmup_finished.connect(self.on_warmup_finished)
         
-        # Start ASL recognition subprocess in background (always running)
-        self.start_asl_process()
+        # TTS, OpenAI and the ASL recognition subprocess (always running) start
+        # once the event loop runs, i.e. after the window has been shown
+        QTimer.singleShot(0, self.start_warmup)
 
     def init_ui(self):
         layout = QVBoxLayout()
@@ -111,6 +144,11 @@ class MainWindow(QWidget):
         title_label.setObjectName("title_label")
         top_bar.addWidget(title_label)
         top_bar.addStretch()
+
+        # Readiness of the background warm-up (see update_readiness)
+        self.status_label = QLabel("Starting...")
+        self.status_label.setObjectName("status_label")
+        top_bar.addWidget(self.status_label)
         
         self.close_button = QPushButton("✕")
         self.close_button.setFixedSize(26, 26)
@@ -159,6 +197,7 @@ class MainWindow(QWidget):
         self.voice_sample_button.setObjectName("voice_sample_button")
         self.voice_sample_button.clicked.connect(self.play_voice_sample)
         self.voice_sample_button.setSizePolicy(QSizePolicy.Policy.MinimumExpanding, QSizePolicy.Policy.Expanding)
+        self.voice_sample_button.setEnabled(False)  # until the TTS warm-up is done
 
         self.external_play_button = QPushButton("External Play")
         external_button_width = max(120, int(font_metrics.horizontalAdvance("External Play: ON") * 1.3))
@@ -178,6 +217,13 @@ class MainWindow(QWidget):
         nlp_layout, self.nlp_dropdown = self.create_dropdown("NLP interpreter", ["None", "gpt-3.5-turbo", "gpt-4o-mini"], self.on_nlp_changed)
         self.nlp_dropdown.setCurrentText("gpt-4o-mini")
         content_layout.addLayout(nlp_layout)
+
+        # Classifier model (hot-swapped by the recognizer, no restart needed)
+        model_files = self.list_asl_models()
+        model_layout, self.model_dropdown = self.create_dropdown("Model:", model_files, self.on_model_changed)
+        if "best_cnn_asl_model.npz" in model_files:
+            self.model_dropdown.setCurrentText("best_cnn_asl_model.npz")
+        content_layout.addLayout(model_layout)
         
         # Camera display checkbox
         camera_checkbox_layout = QHBoxLayout()
@@ -188,6 +234,11 @@ class MainWindow(QWidget):
         camera_checkbox_layout.addStretch()
         content_layout.addLayout(camera_checkbox_layout)
 
+        # Annotated camera preview rendered by the recognizer into shared memory
+        self.preview_widget = PreviewWidget(max_fps=15)
+        self.preview_widget.hide()
+        content_layout.addWidget(self.preview_widget)
+
         spacer_height = max(20, int(font_metrics.height() * 2))
         content_layout.addItem(QSpacerItem(int(font_metrics.height()), spacer_height, QSizePolicy.Policy.Minimum, QSizePolicy.Policy.Expanding))
 
@@ -354,39 +405,146 @@ class MainWindow(QWidget):
         """Handle camera checkbox toggle - send command via stdin."""
         # state is 0 for unchecked, 2 for checked
         self.show_camera = (state == 2)
-        # Send command to ASL process via stdin
+        self.preview_widget.setVisible(self.show_camera)
+        self.send_asl_command("show_camera" if self.show_camera else "hide_camera")
+
+    def on_model_changed(self, value):
+        """Ask the recognizer to hot-swap its classifier model."""
+        if value:
+            self.send_asl_command(f"model {value}")
+
+    def list_asl_models(self):
+        """Return the models the running recognizer can hot-swap to.
+
+        Only NumPy models (.npz) and export manifests (exports/manifest.json)
+        are offered, as they load without TensorFlow, and only those with the
+        input shape and class count of the recognizer's startup model; the
+        recognizer rejects a swap to anything else. The good*.keras LSTMs
+        ((86|87, 258) input, 2 classes) are therefore never listed next to
+        the 63-feature CNN.
+        """
+        asl_dir = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'asl-text'))
+        try:
+            names = os.listdir(asl_dir)
+        except OSError:
+            return []
+        candidates = [n for n in names if n.endswith('.npz')]
+        candidates += [os.path.join(n, 'manifest.json') for n in names
+                       if os.path.isfile(os.path.join(asl_dir, n, 'manifest.json'))]
+
+        model_signature = importlib.import_module("model_backends").model_signature
+        startup_model = os.getenv("ASL_MODEL") or "best_cnn_asl_model.npz"
+        expected = model_signature(os.path.join(asl_dir, startup_model))
+        compatible = []
+        for name in candidates:
+            signature = model_signature(os.path.join(asl_dir, name))
+            if signature is not None and (expected is None or signature == expected):
+                compatible.append(name)
+        return sorted(compatible)
+
+    def send_asl_command(self, command):
+        """Send a control command line to the ASL process via stdin."""
         if self.asl_process and self.asl_process.stdin:
             try:
-                if self.show_camera:
-                    self.asl_process.stdin.write("show_camera\n")
-                else:
-                    self.asl_process.stdin.write("hide_camera\n")
+                self.asl_process.stdin.write(command + "\n")
                 self.asl_process.stdin.flush()
             except Exception as e:
-                print(f"Error sending camera command: {e}")
+                print(f"Error sending command '{command}': {e}")
     
     def get_nlp_model(self):
         return self.current_nlp_model if self.current_nlp_model else "gpt-4o-mini"
 
-    def initialize_tts(self):
-        self.update_voice_id()
+    def start_warmup(self):
+        """Warm up TTS, the OpenAI connection and the recognizer in parallel."""
+        self.startup["window_ms"] = round((time.perf_counter() - STARTUP_START) * 1000, 1)
+        print(f"Startup: window shown after {self.startup['window_ms']} ms")
+        self.update_readiness()
+        for name, task in (("tts", self._warm_tts), ("openai", self._warm_openai)):
+            threading.Thread(target=self._run_warmup, args=(name, task), name=f"warmup-{name}", daemon=True).start()
+        # The recognizer reports "status:ready" once its frame loop runs
+        self.recognizer_started = time.perf_counter()
+        self.start_asl_process()
+        if self.asl_process is None:
+            self.warmup_finished.emit("recognizer", RuntimeError("recognizer did not start"), 0.0)
+
+    def _run_warmup(self, name, task):
+        start = time.perf_counter()
         try:
-            self.cable_in_device_index = find_vb_audio_device()
-        except Exception:
-            self.cable_in_device_index = None
-    
-    def initialize_nlp(self):
+            result = task()
+        except Exception as e:
+            result = e
+        self.warmup_finished.emit(name, result, (time.perf_counter() - start) * 1000)
+
+    def _warm_tts(self):
+        """Import pyttsx3, resolve the voice and find the CABLE In device (warm-up thread)."""
+        tts = importlib.import_module("tts")
+        voice_index = self.current_voice_index
+        voice_id = tts.get_voice_id(voice_index)
         try:
-            get_client()
+            cable_in_device_index = tts.find_vb_audio_device()
         except Exception:
-            pass
+            cable_in_device_index = None
+        # Open the output streams now rather than on the first sentence
+        tts.get_audio_output()
+        if cable_in_device_index is not None:
+            tts.get_audio_output(cable_in_device_index)
+        return voice_index, voice_id, cable_in_device_index
+
+    def _warm_openai(self):
+        """Import openai and open the API connection (warm-up thread)."""
+        return importlib.import_module("openai_client").warm_connection()
+
+    def on_warmup_finished(self, name, result, elapsed_ms):
+        failed = isinstance(result, Exception)
+        self.warming[name] = "failed" if failed else "ready"
+        self.startup[f"{name}_ms"] = round(elapsed_ms, 1)
+        metrics.gauge(f"ui_warmup_{name}_ms").set(round(elapsed_ms, 1))
+        if failed:
+            print(f"Warm-up {name} failed after {elapsed_ms:.0f} ms: {result}")
+        else:
+            print(f"Warm-up {name} ready in {elapsed_ms:.0f} ms")
+
+        if name == "tts" and not failed:
+            voice_index, self.current_voice_id, self.cable_in_device_index = result
+            if voice_index != self.current_voice_index:
+                self.update_voice_id()  # voice changed while warming up
+            self.voice_sample_button.setEnabled(True)
+        self.update_readiness()
+
+    def update_readiness(self):
+        """Show warm-up progress; report time-to-interactive once everything settled."""
+        names = {"tts": "voice", "openai": "LLM", "recognizer": "recognizer"}
+        pending = [names[n] for n, state in self.warming.items() if state is None]
+        failed = [names[n] for n, state in self.warming.items() if state == "failed"]
+        if pending:
+            self.status_label.setText("Warming up: " + ", ".join(pending))
+            self.status_label.setStyleSheet("color: #f1c40f;")
+            return
+        if failed:
+            self.status_label.setText("Ready (" + ", ".join(failed) + " unavailable)")
+            self.status_label.setStyleSheet("color: #e67e22;")
+        else:
+            self.status_label.setText("Ready")
+            self.status_label.setStyleSheet("color: #2ecc71;")
+
+        if "interactive_ms" not in self.startup:
+            self.startup["interactive_ms"] = round((time.perf_counter() - STARTUP_START) * 1000, 1)
+            metrics.gauge("ui_startup_window_ms").set(self.startup["window_ms"])
+            metrics.gauge("ui_startup_interactive_ms").set(self.startup["interactive_ms"])
+            print("startup:" + json.dumps(self.startup), flush=True)
+            # UI_EXIT_AFTER_STARTUP=1 benchmarks startup alone
+            if os.getenv("UI_EXIT_AFTER_STARTUP") == "1":
+                QTimer.singleShot(0, self.close)
 
     def update_voice_id(self):
+        if self.warming["tts"] != "ready":
+            return  # the TTS warm-up resolves the voice
+        tts = importlib.import_module("tts")
         try:
-            self.current_voice_id = get_voice_id(self.current_voice_index)
+            self.current_voice_id = tts.get_voice_id(self.current_voice_index)
         except Exception:
             try:
-                self.current_voice_id = get_voice_id(0)
+                self.current_voice_id = tts.get_voice_id(0)
             except:
                 self.current_voice_id = None
 
@@ -405,7 +563,7 @@ class MainWindow(QWidget):
             self.current_speed = self.speed_dropdown.currentText()
         
         rate = self._calculate_rate()
-        voice_id = self.current_voice_id or get_voice_id(0)
+        voice_id = self.current_voice_id or importlib.import_module("tts").get_voice_id(0)
         if not voice_id:
             return
         
@@ -414,13 +572,13 @@ class MainWindow(QWidget):
         # Add to transcription box
         self.add_to_transcription_box("this is a test voice sample")
         
-        def speak_in_thread():
-            try:
-                speak_text("this is a test voice sample", rate=rate, voice_id=voice_id, sapi_device_index=device_index)
-            except Exception as e:
-                print(f"Error speaking: {e}")
-        
-        threading.Thread(target=speak_in_thread, daemon=True).start()
+        self.speech_jobs.submit(
+            "this is a test voice sample",
+            priority=SAMPLE,
+            rate=rate,
+            voice_id=voice_id,
+            sapi_device_index=device_index,
+        )
 
     def get_audio_device_index(self):
         return self.cable_in_device_index if (not self.start_button.isStart and self.cable_in_device_index) else None
@@ -433,13 +591,41 @@ class MainWindow(QWidget):
         if not (self.cable_in_device_index and self.current_voice_id):
             return
         
-        rate = self._calculate_rate()
-        def speak():
-            try:
-                speak_text(text, rate=rate, voice_id=self.current_voice_id, sapi_device_index=self.cable_in_device_index)
-            except Exception as e:
-                print(f"Error speaking: {e}")
-        threading.Thread(target=speak, daemon=True).start()
+        self.speech_jobs.submit(
+            text,
+            priority=LIVE,
+            rate=self._calculate_rate(),
+            voice_id=self.current_voice_id,
+            sapi_device_index=self.cable_in_device_index,
+        )
+
+    def update_speech_metrics(self):
+        """Publish the speech pipeline's queue depths and counters as gauges."""
+        for key, value in self.speech_jobs.metrics().items():
+            if value is not None:
+                metrics.gauge(f"ui_speech_{key}").set(value)
+
+    def publish_caption(self, kind, text, **fields):
+        """Send a caption event to overlay subscribers while SignSync is live (any thread)."""
+        if self.captions is not None and not self.start_button.isStart:
+            self.captions.publish(kind, text, **fields)
+
+    def _rewrite_for_job(self, text, model):
+        """Rewrite stage of the speech pipeline (runs on a scheduler worker)."""
+        response, timing = importlib.import_module("openai_client").rewrite_sentence(text, model=model)
+        print(f"Rewrite: {timing.get('api_total_ms')} ms")
+        self.publish_caption(caption_server.REWRITE, response, source=text)
+        return response
+
+    def _speak_for_job(self, text, rate, voice_id, sapi_device_index):
+        """Speech stage of the speech pipeline (one sentence at a time, in order).
+
+        Returns the playback handle, so the scheduler can stop a superseded
+        utterance (None after blocking pyttsx3 playback).
+        """
+        tts = importlib.import_module("tts")
+        return tts.speak_text(text, rate=rate, voice_id=voice_id or tts.get_voice_id(self.current_voice_index),
+                              sapi_device_index=sapi_device_index, wait=False)
 
     def start_asl_process(self):
         """Start the ASL recognition subprocess and capture its stdout."""
@@ -454,7 +640,8 @@ class MainWindow(QWidget):
         try:
             # Start the subprocess with unbuffered output
             # Use -u flag for unbuffered output on Windows
-            cmd = [sys.executable, '-u', asl_main_path]
+            # The preview is drawn in this window from shared memory, not a cv2 window
+            cmd = [sys.executable, '-u', asl_main_path, '--preview-shm']
             # Add --show-camera flag if checkbox is checked (initial state)
             if self.show_camera:
                 cmd.append('--show-camera')
@@ -484,12 +671,25 @@ class MainWindow(QWidget):
         if not self.asl_process:
             return
         
+        ready = False
         try:
             for line in iter(self.asl_process.stdout.readline, ''):
                 if line:
                     line = line.rstrip()
+                    if line.startswith("preview_shm:"):
+                        # "preview_shm:<name> <width>x<height>" - attach in the GUI thread
+                        self.preview_announced.emit(line[len("preview_shm:"):].split()[0])
+                    elif line == "status:ready":
+                        ready = True
+                        elapsed_ms = (time.perf_counter() - self.recognizer_started) * 1000
+                        self.warmup_finished.emit("recognizer", None, elapsed_ms)
+                    elif line.startswith("token:"):
+                        # Captions go straight to the server's loop, not through the GUI thread
+                        self.publish_caption(caption_server.TOKEN, line[len("token:"):])
+                    elif line.startswith("partial:"):
+                        self.publish_caption(caption_server.PARTIAL, line[len("partial:"):])
                     # Check if this is a sentence output from ASL
-                    if line.startswith("sentence:"):
+                    elif line.startswith("sentence:"):
                         # Extract the sentence text (everything after "sentence:")
                         sentence_text = line[len("sentence:"):].strip()
                         if sentence_text:
@@ -502,6 +702,9 @@ class MainWindow(QWidget):
         except Exception as e:
             print(f"Error reading ASL output: {e}")
         finally:
+            if not ready:
+                elapsed_ms = (time.perf_counter() - self.recognizer_started) * 1000
+                self.warmup_finished.emit("recognizer", RuntimeError("recognizer exited during startup"), elapsed_ms)
             if self.asl_process:
                 self.asl_process.stdout.close()
     
@@ -548,6 +751,8 @@ class MainWindow(QWidget):
             self.start_button.setText("START")
             self.external_play_button.hide()
             self.use_cable_in_for_sample = False
+            # Sentences still waiting are stale once SignSync is switched off
+            self.speech_jobs.cancel_all(LIVE)
             self._speak_text("SignSync off")
             
             # Add to transcription box
@@ -589,34 +794,25 @@ class MainWindow(QWidget):
 
         # Add to transcription box
         self.add_to_transcription_box(sentence_text)
-        
-        # Run API call and TTS in background thread to avoid blocking UI
-        def process_and_speak():
-            try:
-                rate = self._calculate_rate()
-                voice_id = self.current_voice_id or get_voice_id(self.current_voice_index)
-                
-                # If no NLP model is set, just speak the text directly
-                if self.current_nlp_model is None:
-                    speak_text(sentence_text, rate=rate, voice_id=voice_id, sapi_device_index=self.cable_in_device_index)
-                else:
-                    # Use NLP model to process and then speak
-                    send_prompt_and_speak_streaming(
-                        sentence_text, 
-                        model=self.current_nlp_model,
-                        voice_index=self.current_voice_index, 
-                        rate=rate, 
-                        sapi_device_index=self.cable_in_device_index
-                    )
-            except Exception as e:
-                print(f"Error processing and speaking: {e}")
-                import traceback
-                traceback.print_exc()
-        
-        threading.Thread(target=process_and_speak, daemon=True).start()
+        self.publish_caption(caption_server.SENTENCE, sentence_text)
+        
+        # Rewrite (if an NLP model is set) and speak in the background, in arrival order
+        self.speech_jobs.submit(
+            sentence_text,
+            priority=LIVE,
+            rewrite=None if self.current_nlp_model is None else {"model": self.current_nlp_model},
+            rate=self._calculate_rate(),
+            voice_id=self.current_voice_id,
+            sapi_device_index=self.cable_in_device_index,
+        )
+        print(f"Speech queue: {self.speech_jobs.metrics()}")
     
     def closeEvent(self, event):
         """Handle window close event - cleanup subprocess."""
+        self.speech_jobs.shutdown()
+        if self.captions is not None:
+            self.captions.stop()
+        self.preview_widget.detach()
         self.stop_asl_process()
         event.accept()
 